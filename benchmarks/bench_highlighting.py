@@ -0,0 +1,166 @@
+"""
+Benchmarks the highlighting engine (highlighting.py) without Tk.
+
+For every language and size it measures a full highlighting pass (tokens and lines
+per second), the peak memory of that pass (tracemalloc), and the latency of
+re-highlighting after a single-character edit in the middle of the viewport, using
+the editor's default lazy settings. Results are printed as a table and can be
+written as JSON with --json; --compare prints the change against an earlier file.
+
+    python benchmarks/bench_highlighting.py --json bench.json
+    python benchmarks/bench_highlighting.py --sizes 1K,1M --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from highlighting import LineBuffer, SyntaxHighlighter # noqa: E402
+from synthetic import generate # noqa: E402
+
+LANGUAGES = ["py", "html", "css", "js"]
+DEFAULT_SIZES = "1K,64K,1M,10M"
+ALL_SIZES = "1K,64K,1M,10M,50M"
+UNITS = {"K": 1024, "M": 1024 * 1024}
+EDITS = 30 # Single-character edits timed per input
+
+
+def parse_size(text):
+    text = text.strip().upper()
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def full_pass(text, file_type):
+    """Highlights the whole buffer eagerly; returns (seconds, tokens, lines)."""
+    buffer = LineBuffer(text)
+    highlighter = SyntaxHighlighter(buffer, file_type, lazy_threshold=float("inf"))
+    start = time.perf_counter()
+    highlighter.highlight()
+    return time.perf_counter() - start, buffer.ranges_added, buffer.line_count()
+
+
+def peak_memory(text, file_type):
+    """Peak bytes allocated while building and running a full pass (excluding the text itself)."""
+    tracemalloc.start()
+    try:
+        buffer = LineBuffer(text)
+        SyntaxHighlighter(buffer, file_type, lazy_threshold=float("inf")).highlight()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def edit_latency(text, file_type):
+    """
+    Milliseconds to re-highlight after typing one character in the middle of the
+    viewport, with the editor's default margin and lazy threshold.
+    """
+    buffer = LineBuffer(text)
+    highlighter = SyntaxHighlighter(buffer, file_type)
+    buffer.highlighters.append(highlighter)
+    buffer.scroll_to(buffer.line_count() // 2)
+    highlighter.highlight()
+    top, bottom = buffer.visible_lines()
+    samples = []
+    for edit in range(EDITS):
+        line = top + edit % (bottom - top + 1)
+        buffer.edit(line, line, "x" + buffer.lines[line - 1])
+        start = time.perf_counter()
+        highlighter.highlight()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max": samples[-1]
+    }
+
+
+def run(languages, sizes, measure_memory=True):
+    results = []
+    for file_type in languages:
+        for size in sizes:
+            text = generate(file_type, size)
+            seconds, tokens, lines = full_pass(text, file_type)
+            result = {
+                "language": file_type,
+                "size_bytes": len(text.encode("utf-8")),
+                "lines": lines,
+                "full_pass_s": seconds,
+                "tokens": tokens,
+                "tokens_per_s": tokens / seconds if seconds else None,
+                "lines_per_s": lines / seconds if seconds else None,
+                "peak_memory_bytes": peak_memory(text, file_type) if measure_memory else None,
+                "edit_latency_ms": edit_latency(text, file_type)
+            }
+            results.append(result)
+            print_row(result)
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "benchmark": "highlighting",
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    }
+
+
+def print_row(result):
+    memory = result["peak_memory_bytes"]
+    print(f"{result['language']:>4} {result['size_bytes'] / 1024:>10.0f} KB {result['lines']:>9} lines "
+          f"{result['tokens_per_s'] or 0:>12,.0f} tok/s "
+          f"{'-' if memory is None else f'{memory / 1024 / 1024:.1f}':>8} MB peak "
+          f"edit p50 {result['edit_latency_ms']['p50']:.2f} ms, p95 {result['edit_latency_ms']['p95']:.2f} ms", flush=True)
+
+
+def compare(results, baseline_path):
+    """Prints the change of each result against the same language and size in a baseline file."""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {(result["language"], result["size_bytes"]): result for result in json.load(file)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get((result["language"], result["size_bytes"]))
+        if old is None:
+            continue
+        speed = result["tokens_per_s"] / old["tokens_per_s"] - 1 if old["tokens_per_s"] else 0
+        latency = result["edit_latency_ms"]["p50"] / old["edit_latency_ms"]["p50"] - 1 if old["edit_latency_ms"]["p50"] else 0
+        print(f"{result['language']:>4} {result['size_bytes'] / 1024:>10.0f} KB  throughput {speed:+.1%}  edit p50 {latency:+.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--languages", default=",".join(LANGUAGES), help="comma separated, default: %(default)s")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma separated, default: %(default)s; 'all' for {ALL_SIZES}")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slow) tracemalloc pass")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="compare with results written earlier by --json")
+    args = parser.parse_args()
+
+    sizes = [parse_size(size) for size in (ALL_SIZES if args.sizes == "all" else args.sizes).split(",")]
+    results = run(args.languages.split(","), sizes, measure_memory=not args.no_memory)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"meta": metadata(), "results": results}, file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
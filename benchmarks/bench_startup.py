@@ -0,0 +1,68 @@
+"""
+Benchmarks how long the editor takes to start: from the first line of code.py to the
+first paint of the window (as measured by the editor itself, see --startup-time), and
+the wall time of the whole launch including the interpreter. Optionally opens files
+given on the command line. Needs a display; on a headless machine run it under Xvfb:
+
+    xvfb-run -a python benchmarks/bench_startup.py --json startup.json
+
+Each launch runs with empty temporary cache and state directories, so neither the
+token cache nor a saved session from normal use affects the numbers.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_highlighting import metadata # noqa: E402
+from bench_widgets import percentiles # noqa: E402
+
+TARGET_MS = 200
+
+
+def launch(files, directory):
+    """Starts one editor; returns (first paint ms reported by the editor, wall ms of the process)."""
+    environment = dict(os.environ, XDG_CACHE_HOME=os.path.join(directory, "cache"), XDG_STATE_HOME=os.path.join(directory, "state"))
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.join(REPO_DIR, "code.py"), "--new-instance", "--startup-time", *files],
+        env=environment, capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    return float(result.stdout.split()[-1]), wall_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the editor's startup (needs a display).")
+    parser.add_argument("files", nargs="*", help="files to open at startup")
+    parser.add_argument("--runs", type=int, default=10, help="default: %(default)s")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    args = parser.parse_args()
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        sys.exit("No display; run this under xvfb-run (see the module docstring).")
+
+    paints, walls = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        launch(args.files, directory) # Warm the disk cache and .pyc files
+        for _ in range(args.runs):
+            paint_ms, wall_ms = launch(args.files, directory)
+            paints.append(paint_ms)
+            walls.append(wall_ms)
+    results = {"first_paint_ms": percentiles(paints), "wall_ms": percentiles(walls), "runs": args.runs, "files": len(args.files)}
+    print(f"first paint p50 {results['first_paint_ms']['p50']:.1f} ms (target {TARGET_MS} ms)  "
+          f"max {results['first_paint_ms']['max']:.1f} ms  process p50 {results['wall_ms']['p50']:.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"meta": dict(metadata(), benchmark="startup"), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
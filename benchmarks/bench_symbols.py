@@ -0,0 +1,126 @@
+"""
+Benchmarks the symbol index (symbols.py) without Tk: indexing a directory tree of
+synthetic Python and JavaScript files, re-indexing it from the disk cache, and the
+latency of Quick Open queries typed one keystroke at a time over its symbols.
+
+    python benchmarks/bench_symbols.py --json symbols.json
+    python benchmarks/bench_symbols.py --symbols 20000 --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_highlighting import metadata # noqa: E402
+from bench_widgets import percentiles # noqa: E402
+from synthetic import generate # noqa: E402
+from symbols import SymbolIndexer, SymbolTable # noqa: E402
+
+TARGET_MS = 20 # Per keystroke
+FILE_SIZE = 64 * 1024
+QUERIES = 200 # Typed one character at a time
+
+
+def write_tree(directory, wanted):
+    """Writes synthetic files into directory until they hold about wanted symbols; returns the count."""
+    total = 0
+    seed = 0
+    while total < wanted:
+        file_type = ("py", "js")[seed % 2]
+        text = generate(file_type, FILE_SIZE, seed=seed)
+        subdirectory = os.path.join(directory, f"package{seed % 20}")
+        os.makedirs(subdirectory, exist_ok=True)
+        with open(os.path.join(subdirectory, f"module{seed}.{file_type}"), "w", encoding="utf-8") as file:
+            file.write(text)
+        total += len(SymbolTable(file_type, text).symbols())
+        seed += 1
+    return total
+
+
+def index(root, cache_dir, executor):
+    """Indexes root with a fresh SymbolIndexer; returns (its DirectorySymbols, seconds)."""
+    indexer = SymbolIndexer(cache_dir)
+    start = time.perf_counter()
+    indexer.index_directory(root, (lambda: executor) if executor is not None else None)
+    while True:
+        directory = indexer.directory(root)
+        if directory is not None and directory.complete and root not in indexer.walking:
+            return directory, time.perf_counter() - start
+        time.sleep(0.01)
+
+
+def keystrokes(names, count, seed=0):
+    """
+    Queries as a user types them: prefixes of abbreviations of real names (every
+    other character, or a camel/snake-case initialism) and of a few names that match nothing.
+    """
+    rng = random.Random(seed)
+    typed = []
+    for _ in range(count):
+        name = rng.choice(names)
+        choice = rng.random()
+        if choice < 0.4:
+            query = name
+        elif choice < 0.8:
+            query = name[::2]
+        else:
+            query = name[:3] + "zq"
+        typed.extend(query[:length] for length in range(1, min(len(query), 12) + 1))
+    return typed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the symbol index and Quick Open queries.")
+    parser.add_argument("--symbols", type=int, default=100000, help="symbols in the tree (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=0, help="processes to index with; 0 indexes on the walking thread")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    args = parser.parse_args()
+
+    executor = None
+    if args.workers:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(args.workers)
+    with tempfile.TemporaryDirectory() as directory:
+        root = os.path.join(directory, "tree")
+        cache_dir = os.path.join(directory, "cache")
+        written = write_tree(root, args.symbols)
+        directory_symbols, cold_s = index(root, cache_dir, executor)
+        _, cached_s = index(root, cache_dir, executor)
+    if executor is not None:
+        executor.shutdown()
+
+    matcher = directory_symbols.symbol_matcher
+    names = [symbol[0] for symbol in directory_symbols.symbols]
+    samples = []
+    for query in keystrokes(names, QUERIES):
+        start = time.perf_counter()
+        matcher.search(query, 50)
+        samples.append((time.perf_counter() - start) * 1000)
+    results = {
+        "symbols": len(names),
+        "written": written,
+        "files": len(directory_symbols.files),
+        "index_s": cold_s,
+        "cached_index_s": cached_s,
+        "query_ms": percentiles(samples),
+        "keystrokes": len(samples)
+    }
+    print(f"{results['symbols']} symbols in {results['files']} files: indexed in {cold_s:.2f} s, "
+          f"from the cache in {cached_s:.2f} s")
+    print(f"query p50 {results['query_ms']['p50']:.2f} ms  p95 {results['query_ms']['p95']:.2f} ms  "
+          f"max {results['query_ms']['max']:.2f} ms (target {TARGET_MS} ms) over {len(samples)} keystrokes")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"meta": dict(metadata(), benchmark="symbols"), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
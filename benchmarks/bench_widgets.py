@@ -0,0 +1,128 @@
+"""
+Benchmarks the editor's widgets: opening a file into a tab (until it is fully
+highlighted), typing a character, and scrolling a page. Needs a display; on a
+headless machine run it under Xvfb:
+
+    xvfb-run -a python benchmarks/bench_widgets.py --json widgets.json
+
+The editor runs with empty temporary cache and state directories, so neither the
+token cache nor a saved session from normal use affects the numbers.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_highlighting import LANGUAGES, metadata, parse_size # noqa: E402
+from synthetic import generate # noqa: E402
+
+DEFAULT_SIZES = "64K,1M"
+KEYSTROKES = 30
+SCROLLS = 30
+
+
+def load_editor_module():
+    """Imports code.py under another name; 'code' is also a standard library module."""
+    spec = importlib.util.spec_from_file_location("breeze_code", os.path.join(REPO_DIR, "code.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def settle(editor):
+    """Processes events until no highlight pass is pending or running."""
+    while True:
+        editor.update()
+        pending = any(tab.highlighter.after_id is not None for tab in editor.tabs if tab.highlighter)
+        if not pending and editor.highlight_worker.is_idle() and editor.highlight_poll_id is None:
+            return
+        time.sleep(0.001)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max": samples[-1]
+    }
+
+
+def bench(editor, file_type, size, directory):
+    text = generate(file_type, size)
+    path = os.path.join(directory, f"bench.{file_type}")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+    start = time.perf_counter()
+    tab = editor.add_new_tab(file_path=path, content=text)
+    settle(editor)
+    open_ms = (time.perf_counter() - start) * 1000
+    text_area = tab.text_area
+    text_area.mark_set("insert", f"{tab.highlighter.line_count() // 2}.0")
+    text_area.see("insert")
+    settle(editor)
+
+    keystrokes = []
+    for _ in range(KEYSTROKES):
+        start = time.perf_counter()
+        text_area.insert("insert", "x")
+        settle(editor)
+        keystrokes.append((time.perf_counter() - start) * 1000)
+
+    scrolls = []
+    for scroll in range(SCROLLS):
+        start = time.perf_counter()
+        text_area.yview_scroll(1 if scroll % 2 == 0 else -1, "pages")
+        settle(editor)
+        scrolls.append((time.perf_counter() - start) * 1000)
+
+    tab.text_area.edit_modified(False) # Close without a save prompt
+    editor.close_current_tab()
+    return {
+        "language": file_type,
+        "size_bytes": len(text.encode("utf-8")),
+        "open_ms": open_ms,
+        "keystroke_ms": percentiles(keystrokes),
+        "scroll_ms": percentiles(scrolls)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the editor's widgets (needs a display).")
+    parser.add_argument("--languages", default=",".join(LANGUAGES), help="comma separated, default: %(default)s")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated, default: %(default)s")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    args = parser.parse_args()
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        sys.exit("No display; run this under xvfb-run (see the module docstring).")
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["XDG_CACHE_HOME"] = os.path.join(directory, "cache")
+        os.environ["XDG_STATE_HOME"] = os.path.join(directory, "state")
+        editor = load_editor_module().CodeEditor()
+        settle(editor)
+        results = []
+        for file_type in args.languages.split(","):
+            for size in (parse_size(size) for size in args.sizes.split(",")):
+                result = bench(editor, file_type, size, directory)
+                results.append(result)
+                print(f"{file_type:>4} {result['size_bytes'] / 1024:>8.0f} KB  open {result['open_ms']:8.1f} ms  "
+                      f"keystroke p50 {result['keystroke_ms']['p50']:.2f} ms  scroll p50 {result['scroll_ms']['p50']:.2f} ms", flush=True)
+        editor.destroy()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"meta": dict(metadata(), benchmark="widgets"), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Synthetic source files for the benchmarks.
+
+generate() repeats a language-specific block with varying names and numbers until
+the requested size is reached, so every size has the same mix of keywords, strings,
+comments and multi-line constructs (docstrings, block comments, template literals).
+"""
+import random
+
+PYTHON_BLOCK = '''
+class Widget{n}(Base):
+    """
+    Docstring for widget {n}.
+    It spans several lines, like most real docstrings.
+    """
+    limit = {n} * 2.5
+
+    def render(self, value="default {n}"):
+        # Comment {n}: keep the cache warm
+        if value is None or not self.enabled:
+            return compute_{n}(value, 'single', {n}, 0.{n})
+        for item in range({n}):
+            yield format_item(item, "item %d" % item)
+'''
+
+HTML_BLOCK = '''
+<div class="card card-{n}" id="card{n}" data-index="{n}">
+    <!-- Card {n}:
+         comments may span lines -->
+    <h2 class="title">Heading {n}</h2>
+    <p>Some text for paragraph {n} with <a href="/page/{n}" target="_blank">a link</a>.</p>
+    <img src="/images/{n}.png" alt="Picture {n}" width="{n}">
+</div>
+'''
+
+CSS_BLOCK = '''
+/* Section {n}
+   spans two lines */
+.card-{n} > .title, #card{n}:hover {
+    color: #{n:06x};
+    margin: {n}px auto 0 auto;
+    font-family: "Helvetica Neue", sans-serif;
+}
+@media (max-width: {n}px) { .card-{n} { display: none; } }
+'''
+
+JS_BLOCK = '''
+/* Module {n}
+ * with a block comment */
+const handler{n} = function(event, options) {
+    let total = {n} + 0.5;
+    // Line comment {n}
+    if (event.type === "click" && options.enabled) {
+        return render{n}(`template {n}
+spanning ${total} lines`, 'single', total);
+    }
+    var items = new Array({n});
+    return items.map(item => format(item, "value {n}"));
+};
+'''
+
+BLOCKS = {"py": PYTHON_BLOCK, "html": HTML_BLOCK, "css": CSS_BLOCK, "js": JS_BLOCK}
+
+
+def generate(file_type, size, seed=0):
+    """Returns about size bytes of file_type source (never less than one block)."""
+    block = BLOCKS[file_type]
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        # str.replace rather than format(): the blocks are full of braces
+        part = block.replace("{n:06x}", f"{rng.randrange(0x1000000):06x}").replace("{n}", str(rng.randrange(1, 100000)))
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)[:max(size, len(parts[0]))]
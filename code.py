@@ -1,539 +1,2735 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from tkinter import ttk # Import ttk for Notebook widget
-import re # Import regex for syntax highlighting
-
-class CodeEditor(tk.Tk):
-    """
-    A simple code editor application similar to Notepad++ using Tkinter.
-    It provides basic functionalities like creating new files, opening existing files,
-    saving files, saving files with a new name, line numbers, and basic syntax highlighting.
-    Now with tabbed interface.
-    """
-    def __init__(self):
-        super().__init__()
-        self.title("Breeze Code Editor")
-        self.geometry("1000x700") # Increased size for line numbers
-
-        # --- Tab Control ---
-        self.notebook = ttk.Notebook(self)
-        self.notebook.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-        self.grid_rowconfigure(0, weight=1)
-        self.grid_columnconfigure(0, weight=1)
-
-        self.tabs = [] # List to hold tab information: {'frame', 'text_area', 'line_numbers', 'current_file_path', 'file_type'}
-        self.add_new_tab() # Start with one new tab
-
-        # Create the menu bar
-        self.create_menus()
-
-        # Set a protocol for closing the window to handle unsaved changes
-        self.protocol("WM_DELETE_WINDOW", self.on_closing)
-
-        # Bind the tab change event
-        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_change)
-
-    def add_new_tab(self, file_path=None, content=""):
-        """
-        Adds a new tab to the notebook.
-        """
-        tab_frame = tk.Frame(self.notebook)
-        self.notebook.add(tab_frame, text="Untitled" if file_path is None else file_path.split('/')[-1])
-
-        # Configure tab_frame grid
-        tab_frame.grid_rowconfigure(0, weight=1)
-        tab_frame.grid_columnconfigure(1, weight=1)
-
-        # --- Line Numbers Canvas for this tab ---
-        line_numbers = tk.Canvas(tab_frame, width=40, bg="#282c34", highlightthickness=0) # Dark background
-        line_numbers.grid(row=0, column=0, sticky="nswe")
-
-        # --- Text Area for this tab ---
-        text_area = tk.Text(
-            tab_frame,
-            wrap="word",
-            undo=True,
-            bg="#282c34", # Dark background
-            fg="#abb2bf", # Light foreground
-            insertbackground="#abb2bf", # Cursor color
-            selectbackground="#4b5263", # Selection background
-            font=("Consolas", 11) # Monospace font for code
-        )
-        text_area.grid(row=0, column=1, sticky="nsew")
-        text_area.insert(1.0, content)
-
-        # --- Scrollbar for this tab ---
-        scrollbar = tk.Scrollbar(tab_frame, command=text_area.yview)
-        scrollbar.grid(row=0, column=2, sticky="ns")
-        text_area.config(yscrollcommand=scrollbar.set)
-
-        # Bindings for this tab's text_area
-        text_area.bind("<Configure>", lambda event, ta=text_area, ln=line_numbers: self._on_text_area_change(ta, ln))
-        text_area.bind("<KeyRelease>", lambda event, ta=text_area, ln=line_numbers: self._on_text_area_change(ta, ln))
-        text_area.bind("<ButtonRelease-1>", lambda event, ta=text_area, ln=line_numbers: self._on_text_area_change(ta, ln))
-        # No need for <<Change>> or other virtual events unless explicitly emitted
-        # text_area.bind("<<Change>>", lambda event, ta=text_area, ln=line_numbers: self._on_text_area_change(ta, ln))
-        text_area.bind("<<Undo>>", lambda event, ta=text_area, ln=line_numbers: self._on_text_area_change(ta, ln))
-        text_area.bind("<<Redo>>", lambda event, ta=text_area, ln=line_numbers: self._on_text_area_change(ta, ln))
-        text_area.bind("<MouseWheel>", lambda event, ta=text_area, ln=line_numbers: self._on_mouse_wheel(event, ta, ln))
-        
-        # Add a binding for tab key to insert spaces
-        text_area.bind("<Tab>", self.handle_tab_key)
-
-
-        # Store tab information
-        tab_info = {
-            'frame': tab_frame,
-            'text_area': text_area,
-            'line_numbers': line_numbers,
-            'current_file_path': file_path,
-            'file_type': "txt"
-        }
-        self.tabs.append(tab_info)
-
-        # Select the newly added tab
-        self.notebook.select(tab_frame)
-        self.set_file_type_for_tab(tab_info, file_path)
-        self.configure_syntax_highlighting(text_area)
-        self.apply_syntax_highlighting_for_tab(tab_info)
-        self.update_line_numbers_for_tab(tab_info)
-        self.update_title()
-
-    def handle_tab_key(self, event):
-        """
-        Inserts 4 spaces when the Tab key is pressed.
-        """
-        current_tab = self.get_current_tab_info()
-        if current_tab:
-            current_tab['text_area'].insert(tk.INSERT, "    ") # Insert 4 spaces
-            return "break" # Prevent default tab behavior (focus change)
-        return None # Allow default behavior if no tab is active
-
-    def _on_tab_change(self, event):
-        """Called when a tab is changed."""
-        self.update_title()
-        current_tab_info = self.get_current_tab_info()
-        if current_tab_info:
-            self.update_line_numbers_for_tab(current_tab_info)
-            self.apply_syntax_highlighting_for_tab(current_tab_info)
-
-    def get_current_tab_info(self):
-        """Returns the dictionary containing information about the currently selected tab."""
-        current_tab_id = self.notebook.select()
-        # FIX: Corrected from nametoawidget to nametowidget
-        current_tab_widget = self.notebook.nametowidget(current_tab_id)
-        for tab_info in self.tabs:
-            if tab_info['frame'] == current_tab_widget:
-                return tab_info
-        return None
-
-    def create_menus(self):
-        """
-        Creates the main menu bar with File, Edit, and Help options.
-        """
-        menubar = tk.Menu(self)
-        self.config(menu=menubar)
-
-        # File menu
-        file_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="New Tab", command=self.add_new_tab)
-        file_menu.add_command(label="Open...", command=self.open_file)
-        file_menu.add_command(label="Save", command=self.save_file)
-        file_menu.add_command(label="Save As...", command=self.save_file_as)
-        file_menu.add_command(label="Close Tab", command=self.close_current_tab)
-        file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.on_closing)
-
-        # Edit menu (basic undo/redo for demonstration)
-        edit_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Edit", menu=edit_menu)
-        edit_menu.add_command(label="Undo", command=lambda: self.get_current_tab_info()['text_area'].edit_undo() if self.get_current_tab_info() else None)
-        edit_menu.add_command(label="Redo", command=lambda: self.get_current_tab_info()['text_area'].edit_redo() if self.get_current_tab_info() else None)
-        edit_menu.add_separator()
-        edit_menu.add_command(label="Cut", command=lambda: self.get_current_tab_info()['text_area'].event_generate("<<Cut>>") if self.get_current_tab_info() else None)
-        edit_menu.add_command(label="Copy", command=lambda: self.get_current_tab_info()['text_area'].event_generate("<<Copy>>") if self.get_current_tab_info() else None)
-        edit_menu.add_command(label="Paste", command=lambda: self.get_current_tab_info()['text_area'].event_generate("<<Paste>>") if self.get_current_tab_info() else None)
-
-
-        # Help menu (optional)
-        help_menu = tk.Menu(menubar, tearoff=0)
-        menubar.add_cascade(label="Help", menu=help_menu)
-        help_menu.add_command(label="About", command=self.show_about_info)
-
-    def new_file(self):
-        """
-        This method is now redundant as add_new_tab handles creating a new, empty file.
-        Kept for backward compatibility if needed elsewhere.
-        """
-        self.add_new_tab()
-
-    def open_file(self):
-        """
-        Opens an existing file and loads its content into a new tab.
-        """
-        file_path = filedialog.askopenfilename(
-            defaultextension=".txt",
-            filetypes=[
-                ("All Files", "*.*"),
-                ("Text Documents", "*.txt"),
-                ("Python Files", "*.py"),
-                ("HTML Files", "*.html"),
-                ("CSS Files", "*.css"),
-                ("JavaScript Files", "*.js")
-            ]
-        )
-        if file_path:
-            try:
-                with open(file_path, "r", encoding="utf-8") as file:
-                    content = file.read()
-                self.add_new_tab(file_path=file_path, content=content)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not open file: {e}")
-
-    def save_file(self):
-        """
-        Saves the current content of the active tab to its current file path.
-        If no file path is set, it calls save_file_as for the active tab.
-        """
-        current_tab = self.get_current_tab_info()
-        if not current_tab:
-            return
-
-        if current_tab['current_file_path']:
-            try:
-                with open(current_tab['current_file_path'], "w", encoding="utf-8") as file:
-                    file.write(current_tab['text_area'].get(1.0, tk.END))
-                messagebox.showinfo("Save", f"File saved: {current_tab['current_file_path']}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not save file: {e}")
-        else:
-            self.save_file_as()
-
-    def save_file_as(self):
-        """
-        Saves the current content of the active tab to a new file path chosen by the user.
-        """
-        current_tab = self.get_current_tab_info()
-        if not current_tab:
-            return
-
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".txt",
-            filetypes=[
-                ("All Files", "*.*"),
-                ("Text Documents", "*.txt"),
-                ("Python Files", "*.py"),
-                ("HTML Files", "*.html"),
-                ("CSS Files", "*.css"),
-                ("JavaScript Files", "*.js")
-            ]
-        )
-        if file_path:
-            current_tab['current_file_path'] = file_path
-            self.set_file_type_for_tab(current_tab, file_path)
-            self.notebook.tab(current_tab['frame'], text=file_path.split('/')[-1]) # Update tab title
-            self.save_file() # Call save_file to actually write the content
-            self.update_title()
-            self.apply_syntax_highlighting_for_tab(current_tab)
-
-    def close_current_tab(self):
-        """Closes the currently active tab after prompting to save changes."""
-        current_tab_info = self.get_current_tab_info()
-        if not current_tab_info:
-            return
-
-        if self.confirm_save_changes_for_tab(current_tab_info):
-            self.notebook.forget(current_tab_info['frame'])
-            self.tabs.remove(current_tab_info)
-            if not self.tabs: # If no tabs left, open a new empty one
-                self.add_new_tab()
-            self.update_title()
-
-
-    def confirm_save_changes_for_tab(self, tab_info):
-        """
-        Checks if the current text area content of a specific tab is different from the saved file content.
-        If so, it prompts the user to save changes for that tab.
-        Returns True if it's safe to proceed (either saved or user chose not to save),
-        False if the operation should be cancelled.
-        """
-        current_content = tab_info['text_area'].get(1.0, tk.END).strip()
-        saved_content = ""
-
-        if tab_info['current_file_path']:
-            try:
-                with open(tab_info['current_file_path'], "r", encoding="utf-8") as file:
-                    saved_content = file.read().strip()
-            except FileNotFoundError:
-                saved_content = "" # File might have been deleted externally
-
-        if current_content != saved_content:
-            response = messagebox.askyesnocancel(
-                "Save Changes",
-                f"Do you want to save changes to {'Untitled' if tab_info['current_file_path'] is None else tab_info['current_file_path'].split('/')[-1]}?"
-            )
-            if response is True:  # Yes
-                # Activate the tab to ensure save_file operates on the correct one
-                self.notebook.select(tab_info['frame'])
-                self.save_file()
-                return True
-            elif response is False:  # No
-                return True
-            else:  # Cancel
-                return False
-        return True # No changes or no current file
-
-    def on_closing(self):
-        """
-        Handles the window closing event, prompting to save unsaved changes for all tabs.
-        """
-        # Iterate over a copy of the list because tabs might be removed during the loop
-        for tab_info in list(self.tabs):
-            # Temporarily select the tab to ensure confirm_save_changes_for_tab operates on the correct one
-            self.notebook.select(tab_info['frame'])
-            if not self.confirm_save_changes_for_tab(tab_info):
-                return # If user cancels saving for any tab, stop closing
-        self.destroy() # Close the application
-
-    def update_title(self):
-        """Updates the main window title based on the active tab."""
-        current_tab = self.get_current_tab_info()
-        if current_tab:
-            file_name = "Untitled"
-            if current_tab['current_file_path']:
-                file_name = current_tab['current_file_path'].split('/')[-1]
-            self.title(f"Breeze Code Editor - {file_name}")
-        else:
-            self.title("Breeze Code Editor")
-
-    def show_about_info(self):
-        """
-        Displays a simple 'About' message box.
-        """
-        messagebox.showinfo("About", "Breeze Code Editor\nVersion 1.0\nCreated by Mahendra.uk")
-
-    # --- Line Number Functions (adapted for tabs) ---
-    def _on_text_area_change(self, text_area, line_numbers, event=None):
-        """
-        Callback for text area changes. Updates line numbers and performs syntax highlighting.
-        """
-        self.update_line_numbers_for_tab({'text_area': text_area, 'line_numbers': line_numbers})
-        # Only highlight if this is the active tab
-        current_tab_info = self.get_current_tab_info()
-        if current_tab_info and current_tab_info['text_area'] == text_area:
-            self.apply_syntax_highlighting_for_tab(current_tab_info)
-
-    def _on_mouse_wheel(self, event, text_area, line_numbers):
-        """
-        Handle mouse wheel scrolling to synchronize text area and line numbers for a specific tab.
-        """
-        text_area.yview_scroll(-1 * (event.delta // 120), "units")
-        self.update_line_numbers_for_tab({'text_area': text_area, 'line_numbers': line_numbers})
-        return "break" # Prevent default scroll behavior for Mac/Linux
-
-    def update_line_numbers_for_tab(self, tab_info):
-        """
-        Updates the line numbers displayed in the line_numbers canvas for a specific tab.
-        """
-        line_numbers = tab_info['line_numbers']
-        text_area = tab_info['text_area']
-
-        line_numbers.delete("all") # Clear existing line numbers
-
-        # Get the first and last visible line in the text area
-        first_line_index = text_area.index("@0,0")
-        last_line_index = text_area.index(f"@0,{text_area.winfo_height()}")
-
-        # Get the actual line numbers from the text area
-        first_line = int(first_line_index.split('.')[0])
-        last_line = int(last_line_index.split('.')[0]) + 1 # Include the potentially partial last line
-
-        # Iterate through visible lines and draw line numbers
-        for i in range(first_line, last_line):
-            dline = text_area.dlineinfo(f"{i}.0") # Get bounding box info for the line
-            if dline:
-                y = dline[1] # Y-coordinate of the line
-                # Draw the line number text
-                line_numbers.create_text(
-                    35, y,
-                    anchor="ne", # Align text to the top-right
-                    text=str(i),
-                    fill="#61afef", # Color for line numbers
-                    font=("Consolas", 10)
-                )
-
-    # --- Syntax Highlighting Functions (adapted for tabs) ---
-    def configure_syntax_highlighting(self, text_widget):
-        """
-        Configures the text area tags for different syntax elements.
-        This method should be called for each new text_area.
-        """
-        # Define a base font for syntax highlighting
-        base_font = ("Consolas", 11)
-
-        # Python
-        text_widget.tag_configure("python_keyword", foreground="#c678dd", font=base_font)
-        text_widget.tag_configure("python_string", foreground="#98c379", font=base_font)
-        text_widget.tag_configure("python_comment", foreground="#5c6370", font=(base_font[0], base_font[1], "italic"))
-        text_widget.tag_configure("python_function", foreground="#61afef", font=base_font)
-        text_widget.tag_configure("python_class", foreground="#e6c07b", font=base_font)
-        text_widget.tag_configure("python_number", foreground="#d19a66", font=base_font)
-
-        # HTML
-        text_widget.tag_configure("html_tag", foreground="#e06c75", font=base_font)
-        text_widget.tag_configure("html_attribute", foreground="#d19a66", font=base_font)
-        text_widget.tag_configure("html_string", foreground="#98c379", font=base_font)
-        text_widget.tag_configure("html_comment", foreground="#5c6370", font=(base_font[0], base_font[1], "italic"))
-
-        # CSS
-        text_widget.tag_configure("css_property", foreground="#61afef", font=base_font)
-        text_widget.tag_configure("css_value", foreground="#98c379", font=base_font)
-        text_widget.tag_configure("css_selector", foreground="#e06c75", font=base_font)
-        text_widget.tag_configure("css_comment", foreground="#5c6370", font=(base_font[0], base_font[1], "italic"))
-
-        # JavaScript
-        text_widget.tag_configure("js_keyword", foreground="#c678dd", font=base_font)
-        text_widget.tag_configure("js_string", foreground="#98c379", font=base_font)
-        text_widget.tag_configure("js_comment", foreground="#5c6370", font=(base_font[0], base_font[1], "italic"))
-        text_widget.tag_configure("js_function", foreground="#61afef", font=base_font)
-        text_widget.tag_configure("js_number", foreground="#d19a66", font=base_font)
-        text_widget.tag_configure("js_variable", foreground="#e6c07b", font=base_font) # let, const, var
-
-        self.highlight_patterns = {
-            "py": {
-                "keywords": r'\b(False|None|True|and|as|assert|async|await|break|class|continue|def|del|elif|else|except|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|return|try|while|with|yield)\b',
-                "strings": r'"[^"]*"|\'[^\']*\'',
-                "comments": r'#.*',
-                "functions": r'\b(\w+)(?=\()', # Simple regex for function calls (not def)
-                "classes": r'\b(class)\s+(\w+)\b',
-                "numbers": r'\b\d+(\.\d*)?\b|\b\.\d+\b'
-            },
-            "html": {
-                "tags": r'</?[\w\d]+>',
-                "attributes": r'\b([\w\d-]+)=',
-                "strings": r'"[^"]*"|\'[^\']*\'',
-                "comments": r''
-            },
-            "css": {
-                "properties": r'\b([\w-]+)(?=\s*:)',
-                "values": r':\s*([^;]+)',
-                "selectors": r'[\.#]?[\w\d_ -]+(\s*,\s*[\.#]?[\w\d_ -]+)*|\b[\w\d]+\b',
-                "comments": r'/\*.*?\*/'
-            },
-            "js": {
-                "keywords": r'\b(break|case|catch|class|const|continue|debugger|default|delete|do|else|export|extends|finally|for|function|if|import|in|instanceof|new|return|super|switch|this|throw|try|typeof|var|void|while|with|yield)\b',
-                "strings": r'"[^"]*"|\'[^\']*\'|`[^`]*`', # Includes template literals
-                "comments": r'//.*|/\*.*?\*/',
-                "functions": r'\b(\w+)(?=\()',
-                "numbers": r'\b\d+(\.\d*)?\b|\b\.\d+\b',
-                "variables": r'\b(let|const|var)\s+(\w+)\b'
-            }
-        }
-
-    def set_file_type_for_tab(self, tab_info, file_path):
-        """Determines the file type for a specific tab based on its extension."""
-        extension = file_path.split('.')[-1].lower() if file_path else "txt"
-        if extension in ["py"]:
-            tab_info['file_type'] = "py"
-        elif extension in ["html", "htm"]:
-            tab_info['file_type'] = "html"
-        elif extension in ["css"]:
-            tab_info['file_type'] = "css"
-        elif extension in ["js"]:
-            tab_info['file_type'] = "js"
-        else:
-            tab_info['file_type'] = "txt" # Default for unknown extensions
-
-    def apply_syntax_highlighting_for_tab(self, tab_info):
-        """
-        Applies syntax highlighting to the text area of a specific tab based on its detected file type.
-        """
-        text_area = tab_info['text_area']
-        file_type = tab_info['file_type']
-
-        # Remove all existing tags first
-        for tag in text_area.tag_names():
-            if tag.startswith(("python_", "html_", "css_", "js_")):
-                text_area.tag_remove(tag, "1.0", tk.END)
-
-        if file_type == "txt":
-            return # No highlighting for plain text
-
-        text_content = text_area.get("1.0", tk.END)
-        patterns = self.highlight_patterns.get(file_type, {})
-
-        if file_type == "py":
-            # Keywords
-            for match in re.finditer(patterns.get("keywords", ""), text_content):
-                text_area.tag_add("python_keyword", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Strings
-            for match in re.finditer(patterns.get("strings", ""), text_content):
-                text_area.tag_add("python_string", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Comments
-            for match in re.finditer(patterns.get("comments", ""), text_content):
-                text_area.tag_add("python_comment", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Functions (calls)
-            for match in re.finditer(patterns.get("functions", ""), text_content):
-                text_area.tag_add("python_function", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Class definitions (only the 'class' keyword and class name)
-            for match in re.finditer(patterns.get("classes", ""), text_content):
-                text_area.tag_add("python_keyword", f"1.0+{match.start(1)}c", f"1.0+{match.end(1)}c")
-                text_area.tag_add("python_class", f"1.0+{match.start(2)}c", f"1.0+{match.end(2)}c")
-            # Numbers
-            for match in re.finditer(patterns.get("numbers", ""), text_content):
-                text_area.tag_add("python_number", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-
-        elif file_type == "html":
-            # Tags
-            for match in re.finditer(patterns.get("tags", ""), text_content):
-                text_area.tag_add("html_tag", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Attributes (need to be careful not to highlight values)
-            for match in re.finditer(patterns.get("attributes", ""), text_content):
-                text_area.tag_add("html_attribute", f"1.0+{match.start(1)}c", f"1.0+{match.end(1)}c")
-            # Strings (attribute values)
-            for match in re.finditer(patterns.get("strings", ""), text_content):
-                text_area.tag_add("html_string", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Comments
-            for match in re.finditer(patterns.get("comments", ""), text_content, re.DOTALL):
-                text_area.tag_add("html_comment", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-
-        elif file_type == "css":
-            # Properties
-            for match in re.finditer(patterns.get("properties", ""), text_content):
-                text_area.tag_add("css_property", f"1.0+{match.start(1)}c", f"1.0+{match.end(1)}c")
-            # Values (basic, might need refinement)
-            for match in re.finditer(patterns.get("values", ""), text_content):
-                text_area.tag_add("css_value", f"1.0+{match.start(1)}c", f"1.0+{match.end(1)}c")
-            # Selectors (basic)
-            for match in re.finditer(patterns.get("selectors", ""), text_content):
-                text_area.tag_add("css_selector", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Comments
-            for match in re.finditer(patterns.get("comments", ""), text_content, re.DOTALL):
-                text_area.tag_add("css_comment", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-
-        elif file_type == "js":
-            # Keywords
-            for match in re.finditer(patterns.get("keywords", ""), text_content):
-                text_area.tag_add("js_keyword", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Strings
-            for match in re.finditer(patterns.get("strings", ""), text_content):
-                text_area.tag_add("js_string", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Comments
-            for match in re.finditer(patterns.get("comments", ""), text_content, re.DOTALL):
-                text_area.tag_add("js_comment", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Functions (calls)
-            for match in re.finditer(patterns.get("functions", ""), text_content):
-                text_area.tag_add("js_function", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Numbers
-            for match in re.finditer(patterns.get("numbers", ""), text_content):
-                text_area.tag_add("js_number", f"1.0+{match.start()}c", f"1.0+{match.end()}c")
-            # Variables (let, const, var declarations)
-            for match in re.finditer(patterns.get("variables", ""), text_content):
-                text_area.tag_add("js_keyword", f"1.0+{match.start(1)}c", f"1.0+{match.end(1)}c")
-                text_area.tag_add("js_variable", f"1.0+{match.start(2)}c", f"1.0+{match.end(2)}c")
-
-
-if __name__ == "__main__":
-    editor = CodeEditor()
-    editor.mainloop()
\ No newline at end of file
+import sys
+import time
+STARTED_AT = time.perf_counter() # Startup is measured from here (see CodeEditor._on_first_paint)
+
+import instance
+if __name__ == "__main__":
+    if getattr(sys, "frozen", False): # Search worker processes of a frozen (PyInstaller) build start here too
+        import multiprocessing
+        multiprocessing.freeze_support()
+    # Hand the files to an editor that is already running before paying for Tk and the other imports
+    ARGUMENTS = instance.parse_arguments(sys.argv[1:])
+    if not ARGUMENTS.new_instance and not ARGUMENTS.startup_time and instance.forward(ARGUMENTS.targets):
+        sys.exit(0)
+
+import tkinter as tk
+from tkinter import filedialog, messagebox, simpledialog
+from tkinter import ttk # Import ttk for Notebook widget
+from tkinter import font as tkfont
+import os
+import json
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import diffing
+from fileio import FileFollower, FileStream, PagedFile, content_digest, content_hasher, file_digest, write_file_atomically
+from highlighting import HighlightWorker, SyntaxHighlighter, TokenCache, file_type_for, lexer_for
+from instrumentation import METRICS, ProfileCapture, build_report, pattern_costs
+import journal
+import search
+import symbols
+from watcher import FileWatcher
+
+# Per-user cache directory (token cache, ...)
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "breeze-code")
+# Per-user state directory (last session, ...)
+STATE_DIR = os.path.join(os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state"), "breeze-code")
+# Journals of unsaved edits, for recovery after a crash
+RECOVERY_DIR = os.path.join(STATE_DIR, "recovery")
+EMPTY_DIGEST = content_digest("")
+
+
+def read_for_tab(file_path, size_limit):
+    """
+    Reads a file to open in a tab (on a reader thread). Returns None for files of at
+    least size_limit bytes, which are streamed in or paged instead.
+    """
+    if os.path.getsize(file_path) >= size_limit:
+        return None
+    with open(file_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+class SaveRequest:
+    """A snapshot of a tab's text on its way to disk; filled in by FileSaver."""
+    def __init__(self, tab_info, file_path, text):
+        self.tab_info = tab_info
+        self.file_path = file_path
+        self.text = text
+        self.digest = None # content_digest(text), computed off the Tk thread
+        self.error = None
+        self.superseded = False # Replaced by a newer save of the same file before it started
+        self.done = threading.Event()
+
+
+class FileSaver:
+    """
+    Writes files with write_file_atomically() on a small thread pool. Different files
+    are written concurrently; saves of the same file run one after the other, and one
+    that is still waiting is replaced by a newer snapshot. Finished requests are handed
+    back to the Tk thread through collect().
+    """
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="file-saver")
+        self.waiting = {} # file path -> request queued behind the running save of that path
+        self.finished = []
+        self.lock = threading.Lock()
+
+    def submit(self, request):
+        with self.lock:
+            if request.file_path in self.waiting:
+                superseded = self.waiting[request.file_path]
+                self.waiting[request.file_path] = request
+                if superseded is not None:
+                    superseded.superseded = True
+                    self._finish(superseded)
+                return
+            self.waiting[request.file_path] = None
+        self.executor.submit(self._write, request)
+
+    def collect(self):
+        """Returns the requests finished since the last call."""
+        with self.lock:
+            finished, self.finished = self.finished, []
+        return finished
+
+    def is_idle(self):
+        with self.lock:
+            return not self.waiting and not self.finished
+
+    def _write(self, request):
+        try:
+            with METRICS.timer("save.write"):
+                request.digest = content_digest(request.text)
+                write_file_atomically(request.file_path, request.text)
+        except Exception as e:
+            request.error = e
+        with self.lock:
+            self._finish(request)
+            following = self.waiting.pop(request.file_path)
+            if following is not None:
+                self.waiting[request.file_path] = None
+                self.executor.submit(self._write, following)
+
+    def _finish(self, request):
+        request.text = None # Can be large; only the digest is needed from here on
+        self.finished.append(request)
+        request.done.set()
+
+
+class TextWidgetView:
+    """Lets a SyntaxHighlighter read and tag a Tk Text widget."""
+    def __init__(self, text_widget):
+        self.text_widget = text_widget
+
+    def line_count(self):
+        return int(self.text_widget.index("end-1c").split('.')[0])
+
+    def visible_lines(self):
+        """Returns the first and last line shown in the widget."""
+        first = self.text_widget.index("@0,0")
+        last = self.text_widget.index(f"@0,{self.text_widget.winfo_height()}")
+        return int(first.split('.')[0]), int(last.split('.')[0])
+
+    def get_lines(self, first, last):
+        return self.text_widget.get(f"{first}.0", f"{last}.end").split("\n")
+
+    def tag_ranges(self, operation, tag, indices):
+        """Adds or removes a tag over any number of index pairs in one Tcl call."""
+        self.text_widget.tk.call(self.text_widget._w, "tag", operation, tag, *indices)
+
+    def remove_tags(self, prefixes):
+        for tag in self.text_widget.tag_names():
+            if tag.startswith(prefixes):
+                self.text_widget.tag_remove(tag, "1.0", tk.END)
+
+    def exists(self):
+        return self.text_widget.winfo_exists()
+
+
+class LineNumberGutter:
+    """
+    Draws the line numbers of one Text widget on a Canvas. The canvas items are kept
+    in a pool and reused (moved and relabelled) instead of being recreated, and the
+    gutter is only redrawn when the first visible line, the line count or the geometry
+    changed since the last time. line_offset is added to every number shown, for text
+    widgets that hold a window of a larger file (see PagedView). Lines changed since the
+    last save get a marker at the left edge (see set_changes()); like the numbers, only
+    the visible lines are looked at.
+    """
+    PADDING = 10 # Pixels around the widest line number
+    MARKER_WIDTH = 3 # Pixels of the change markers
+    MARKER_COLORS = {"added": "#98c379", "modified": "#e5c07b", "removed": "#e06c75"}
+
+    def __init__(self, canvas, text_widget, font=("Consolas", 10), fill="#61afef"):
+        self.canvas = canvas
+        self.text_widget = text_widget
+        self.font = tkfont.Font(root=canvas, font=font)
+        self.fill = fill
+        self.items = [] # Canvas text items, reused across redraws
+        self.labels = [] # Text currently shown by each item ("" when hidden)
+        self.digits = 0 # Digits the gutter width was last computed for
+        self.drawn = None # What the visible numbers were drawn for; see redraw()
+        self.idle_id = None
+        self.line_offset = 0
+        self.changes = None # diffing.Changes of the text, or None for no markers
+        self.changes_version = 0 # Bumped by set_changes(), so redraw() notices
+        self.markers = [] # Canvas rectangles of the change markers, reused like items
+        self.markers_shown = 0
+
+    def set_changes(self, changes):
+        """Shows the markers of changes (a diffing.Changes, or None for none)."""
+        if changes is self.changes:
+            return
+        self.changes = changes
+        self.changes_version += 1
+        self.schedule()
+
+    def close(self):
+        """Cancels a pending redraw and deletes the gutter's font; call before the canvas is destroyed."""
+        if self.idle_id is not None:
+            self.canvas.after_cancel(self.idle_id)
+            self.idle_id = None
+        if self.font is not None:
+            self.canvas.tk.call("font", "delete", self.font.name)
+            self.font.delete_font = False # Font.__del__ would delete it again
+            self.font = None
+
+    def schedule(self):
+        """Redraws once the pending display updates are done; repeated calls coalesce."""
+        if self.idle_id is None:
+            self.idle_id = self.canvas.after_idle(self._redraw_when_idle)
+
+    def _redraw_when_idle(self):
+        self.idle_id = None
+        if self.canvas.winfo_exists():
+            self.redraw()
+
+    def redraw(self, force=False):
+        with METRICS.timer("line_numbers"):
+            self._redraw(force)
+
+    def _redraw(self, force):
+        text = self.text_widget
+        line_count = int(text.index("end-1c").split('.')[0])
+        self._fit_width(line_count + self.line_offset)
+
+        # A wrapped first line can be scrolled part way, hence the full index and its y
+        first_index = text.index("@0,0")
+        first_info = text.dlineinfo(first_index)
+        height = text.winfo_height()
+        key = (first_index, first_info[1] if first_info else None, text.index(f"@0,{height}"), line_count, height, text.winfo_width(), self.line_offset, self.changes_version)
+        if key == self.drawn and not force:
+            return
+        self.drawn = key
+
+        x = int(self.canvas.cget("width")) - self.PADDING // 2
+        first_line = int(first_index.split('.')[0])
+        shown = 0
+        visible = [] # (line, y, height) on screen
+        for line in range(first_line, line_count + 1):
+            info = text.dlineinfo(f"{line}.0")
+            if info is None:
+                if line > first_line:
+                    break # Below the bottom edge
+                continue # First line starts above the top edge (scrolled part way)
+            self._show(shown, x, info[1], str(line + self.line_offset))
+            visible.append((line, info[1], info[3]))
+            shown += 1
+        for item in range(shown, len(self.items)):
+            if self.labels[item]:
+                self.canvas.itemconfigure(self.items[item], state="hidden")
+                self.labels[item] = ""
+        self._draw_markers(visible)
+
+    def _draw_markers(self, visible):
+        """Draws the change markers of the visible lines; a removal is a bar under its line."""
+        markers = self.changes.markers(visible[0][0], visible[-1][0]) if self.changes and visible else {}
+        shown = 0
+        for line, y, height in visible:
+            kind = markers.get(line)
+            if kind is None:
+                continue
+            if kind == "removed":
+                coords = (0, y + height - 2, self.MARKER_WIDTH + 4, y + height + 1)
+            else:
+                coords = (0, y, self.MARKER_WIDTH, y + height)
+            if shown == len(self.markers):
+                self.markers.append(self.canvas.create_rectangle(*coords, width=0, fill=self.MARKER_COLORS[kind]))
+            else:
+                self.canvas.coords(self.markers[shown], *coords)
+                self.canvas.itemconfigure(self.markers[shown], fill=self.MARKER_COLORS[kind], state="normal")
+            shown += 1
+        for slot in range(shown, self.markers_shown):
+            self.canvas.itemconfigure(self.markers[slot], state="hidden")
+        self.markers_shown = shown
+
+    def _show(self, slot, x, y, label):
+        if slot == len(self.items):
+            self.items.append(self.canvas.create_text(x, y, anchor="ne", text=label, fill=self.fill, font=self.font))
+            self.labels.append(label)
+            return
+        item = self.items[slot]
+        self.canvas.coords(item, x, y)
+        if self.labels[slot] != label:
+            self.canvas.itemconfigure(item, text=label, state="normal")
+            self.labels[slot] = label
+
+    def _fit_width(self, line_count):
+        """Resizes the gutter when the line count gains or loses a digit."""
+        digits = len(str(line_count))
+        if digits == self.digits:
+            return
+        self.digits = digits
+        self.canvas.config(width=self.font.measure("9" * max(digits, 2)) + self.PADDING + self.MARKER_WIDTH)
+        self.drawn = None # Every item moves with the right edge
+
+
+class PagedView:
+    """
+    Shows a PagedFile in a read-only Text widget, WINDOW_LINES lines at a time. When the
+    view scrolls within EDGE_LINES of either end of the window, the window is moved so
+    the same lines stay on screen. The scrollbar, the gutter and jumps work in the file's
+    absolute line numbers. The highlighter only lexes the window, starting from the state
+    reached by lexing the LEAD_IN_LINES lines before it; that is exact unless a
+    multi-line construct (a docstring, a block comment) is open across more lines.
+    """
+    WINDOW_LINES = 3000
+    EDGE_LINES = 500
+    LEAD_IN_LINES = 1000
+    POLL_INTERVAL = 250 # ms between index progress updates
+    REFRESH_INTERVAL = 2000 # ms between refreshes after the file changed on disk (a growing log changes constantly)
+
+    def __init__(self, editor, paged_file):
+        self.editor = editor
+        self.file = paged_file
+        self.start = 1 # Absolute line number of the widget's first line
+        self.pending = None # Line to show once indexing gets there
+        self.tab_info = None
+        self.scrollbar = None
+        self.poll_id = None
+        self.refresh_id = None # Pending refresh()
+        self.refreshed_at = 0.0 # time.monotonic() of the last one
+
+    def attach(self, tab_info, scrollbar):
+        """Takes over the scrolling of a tab built by CodeEditor._build_tab_widgets()."""
+        self.tab_info = tab_info
+        self.scrollbar = scrollbar
+        tab_info.text_area.config(state="disabled", undo=False, yscrollcommand=self.on_scroll)
+        scrollbar.config(command=self.on_scrollbar)
+        self.load(1)
+        self._poll_index()
+
+    def absolute(self, index):
+        """The absolute "line.column" of a widget index."""
+        line, column = self.tab_info.text_area.index(index).split('.')
+        return f"{int(line) + self.start - 1}.{column}"
+
+    def window_lines(self):
+        return int(self.tab_info.text_area.index("end-1c").split('.')[0])
+
+    def load(self, start):
+        """Fills the widget with the window starting at absolute line start."""
+        tab_info = self.tab_info
+        text_area, highlighter = tab_info.text_area, tab_info.highlighter
+        try:
+            with METRICS.timer("paged.window"):
+                lines = self.file.read_lines(start, self.WINDOW_LINES)
+            start_state = self._lead_in_state(start, highlighter.lexer) if lines else None
+        except OSError as e: # Truncated underneath us; the file watcher reopens it
+            self.editor.set_status(f"Could not read {self.file.file.name}: {e}", error=True)
+            return
+        if not lines:
+            return
+        self.start = start
+        highlighter.start_state = start_state
+        text_area.config(state="normal")
+        text_area.delete("1.0", tk.END)
+        text_area.insert("1.0", "\n".join(lines))
+        text_area.config(state="disabled")
+        text_area.edit_modified(False)
+        highlighter.reset()
+        tab_info.gutter.line_offset = start - 1
+        self.editor.schedule_highlight(highlighter, delay=0)
+
+    def _lead_in_state(self, start, lexer):
+        if lexer is None or start == 1:
+            return None
+        first = max(1, start - self.LEAD_IN_LINES)
+        state = None
+        for line in self.file.read_lines(first, start - first):
+            state = lexer.end_state(line, state)
+        return state
+
+    def show(self, line, column=0, top=False, wait=False):
+        """
+        Moves the cursor to absolute line (and column), loading the window around it if
+        needed, and scrolls it into view (to the top with top). A line that is not indexed
+        yet is shown as far as the index goes; with wait, it is shown once it is indexed.
+        """
+        if line > self.file.known_lines():
+            if wait and self.file.line_count is None and self.file.error is None:
+                self.pending = line
+                self.editor.set_status(f"Line {line} is not indexed yet; it is shown once indexing gets there")
+            line = self.file.known_lines()
+        line = max(1, line)
+        end = self.start + self.window_lines() - 1
+        if line < self.start + self.EDGE_LINES and self.start > 1 or line > end - self.EDGE_LINES and end < self.file.known_lines():
+            self.load(max(1, line - self.WINDOW_LINES // 2))
+        text_area = self.tab_info.text_area
+        index = f"{line - self.start + 1}.{column}"
+        text_area.mark_set("insert", index)
+        if top:
+            text_area.yview(index)
+        else:
+            text_area.see(index)
+
+    def on_scroll(self, first, last):
+        """yscrollcommand of the widget: moves the window when needed, then maps the scrollbar to the whole file."""
+        tab_info = self.tab_info
+        text_area = tab_info.text_area
+        top = int(text_area.index("@0,0").split('.')[0])
+        bottom = int(text_area.index(f"@0,{text_area.winfo_height()}").split('.')[0])
+        window_lines = self.window_lines()
+        near_top = top <= self.EDGE_LINES and self.start > 1
+        near_bottom = bottom > window_lines - self.EDGE_LINES and self.start + window_lines - 1 < self.file.known_lines()
+        if near_top or near_bottom:
+            absolute_top = self.start + top - 1
+            cursor = self.absolute("insert")
+            self.load(max(1, absolute_top - self.WINDOW_LINES // 2))
+            line, column = cursor.split('.')
+            if self.start <= int(line) < self.start + self.window_lines():
+                text_area.mark_set("insert", f"{int(line) - self.start + 1}.{column}")
+            text_area.yview(f"{absolute_top - self.start + 1}.0") # Tk calls on_scroll again for this
+            return
+        total = self.file.estimated_lines()
+        first = (self.start + top - 2) / total
+        self.editor._on_text_area_scroll(self.scrollbar, tab_info.highlighter, tab_info.gutter, first, min(1.0, first + (bottom - top + 1) / total))
+
+    def on_scrollbar(self, command, *args):
+        """Scrollbar command: dragging jumps by absolute line, arrows and paging scroll the widget."""
+        if command == "moveto":
+            self.show(1 + int(float(args[0]) * self.file.estimated_lines()), top=True)
+        else:
+            self.tab_info.text_area.yview(command, *args)
+
+    def _poll_index(self):
+        """Reports the indexing progress and keeps the scrollbar in step with the growing line count."""
+        self.poll_id = None
+        text_area = self.tab_info.text_area
+        if not text_area.winfo_exists():
+            return
+        file, name = self.file, self.tab_info.current_file_path
+        is_current = self.editor.tabs.current() is self.tab_info
+        if file.error is not None:
+            self.editor.set_status(f"Could not index {name}: {file.error}", error=True)
+            return
+        if self.pending is not None and (self.pending <= file.known_lines() or file.line_count is not None):
+            line, self.pending = self.pending, None
+            self.show(line)
+        self.on_scroll(*text_area.yview())
+        if file.line_count is None:
+            if is_current:
+                self.editor.set_status(f"Indexing {name}: {file.progress():.0%}")
+            self.poll_id = text_area.after(self.POLL_INTERVAL, self._poll_index)
+        elif is_current:
+            self.editor.set_status(f"{name}: {file.line_count:,} lines (read-only)")
+
+    def request_refresh(self):
+        """Refreshes the view after its file changed on disk, at most every REFRESH_INTERVAL ms."""
+        if self.refresh_id is not None:
+            return # Coalesced with the one already scheduled
+        wait = int((self.refreshed_at - time.monotonic()) * 1000) + self.REFRESH_INTERVAL
+        self.refresh_id = self.tab_info.text_area.after(max(wait, 0), self.refresh)
+
+    def refresh(self):
+        """Takes in lines appended to the file without reading it again; any other change reopens it."""
+        self.refresh_id = None
+        self.refreshed_at = time.monotonic()
+        text_area = self.tab_info.text_area
+        if not text_area.winfo_exists():
+            return
+        at_end = self.start + self.window_lines() - 1 >= self.file.known_lines()
+        try:
+            grown = self.file.grow()
+        except (OSError, ValueError):
+            grown = False
+        if not grown:
+            name = self.tab_info.current_file_path
+            try:
+                self.reopen()
+            except OSError as e:
+                self.editor.set_status(f"Could not reload {name}: {e}", error=True)
+                return
+            self.editor.set_status(f"Reloaded {name}, which was changed by another program")
+            return
+        if at_end and self.window_lines() < self.WINDOW_LINES: # Fill the window up with the new lines
+            top, cursor = text_area.index("@0,0"), text_area.index("insert")
+            self.load(self.start) # Same start, so widget indexes still name the same lines
+            text_area.yview(top)
+            text_area.mark_set("insert", cursor)
+        if self.poll_id is None:
+            self._poll_index()
+
+    def reopen(self):
+        """Maps the file again after it changed on disk, staying at the same line."""
+        line = int(self.absolute("@0,0").split('.')[0])
+        paged_file = PagedFile(self.tab_info.current_file_path)
+        self.file.close()
+        self.file = paged_file
+        self.load(1)
+        self.show(line, top=True, wait=True)
+        if self.poll_id is None:
+            self._poll_index()
+
+    def close(self):
+        if self.poll_id is not None:
+            self.tab_info.text_area.after_cancel(self.poll_id)
+            self.poll_id = None
+        if self.refresh_id is not None:
+            self.tab_info.text_area.after_cancel(self.refresh_id)
+            self.refresh_id = None
+        self.file.close()
+
+
+class TabState:
+    """
+    Everything the editor keeps about one tab. Tabs restored from the last session
+    start out as placeholders: only the (empty) frame exists and text_area is None
+    until CodeEditor.materialize_tab() reads the file and builds the widgets.
+    """
+    __slots__ = ('frame', 'text_area', 'line_numbers', 'gutter', 'current_file_path', 'file_type',
+                 'highlighter', 'loader', 'saved_digest', 'partial_of', 'saving', 'restore', 'pager', 'follower',
+                 'journal')
+
+    def __init__(self, frame, current_file_path=None):
+        self.frame = frame
+        self.text_area = None # These four are set by CodeEditor._build_tab_widgets()
+        self.line_numbers = None
+        self.gutter = None
+        self.highlighter = None
+        self.current_file_path = current_file_path
+        self.file_type = "txt"
+        self.loader = None # FileStream while the file is still being streamed in
+        self.saved_digest = None # content_digest() of the text as last loaded/saved
+        self.partial_of = None # File name, if the tab holds an incomplete load of that file
+        self.saving = None # SaveRequest of the newest save still in progress
+        self.restore = None # {'cursor', 'top'} text indices to show once the file is loaded
+        self.pager = None # PagedView for files shown read-only in the large-file viewer
+        self.follower = None # FileFollower while the tab follows its (growing) file
+        self.journal = None # journal.Journal of the edits since the tab was last saved
+
+
+class TabRegistry:
+    """
+    The open tabs in the order they were added, indexed by the Tk path of their frame
+    (which is what ttk.Notebook.select() returns). The selected tab is cached until
+    invalidate() is called.
+    """
+    def __init__(self, notebook):
+        self.notebook = notebook
+        self.by_path = {}
+        self.current_tab = None
+
+    def add(self, tab):
+        self.by_path[str(tab.frame)] = tab
+
+    def remove(self, tab):
+        del self.by_path[str(tab.frame)]
+        self.invalidate() # The notebook selects a neighbour of a removed tab
+
+    def current(self):
+        """Returns the selected tab, or None."""
+        if self.current_tab is None:
+            self.current_tab = self.by_path.get(str(self.notebook.select()))
+        return self.current_tab
+
+    def invalidate(self):
+        self.current_tab = None
+
+    def __contains__(self, tab):
+        return self.by_path.get(str(tab.frame)) is tab
+
+    def __iter__(self):
+        return iter(list(self.by_path.values())) # A copy: callers may close tabs while iterating
+
+    def __len__(self):
+        return len(self.by_path)
+
+    def find_file(self, file_path):
+        """Returns the tab showing file_path, or None."""
+        tabs = self.with_file(file_path)
+        return tabs[0] if tabs else None
+
+    def with_file(self, file_path):
+        """Returns every tab showing file_path."""
+        file_path = os.path.abspath(file_path)
+        return [tab for tab in self.by_path.values() if tab.current_file_path and os.path.abspath(tab.current_file_path) == file_path]
+
+
+class FindDialog(tk.Toplevel):
+    """
+    Non-modal Find / Replace window. Searches the active tab, all open tabs, or a
+    directory tree (see search.py). Matches in the active tab are stepped through
+    with Find Next; the other scopes list every match, and double-clicking one jumps
+    to it. Directory results stream in while the search runs.
+    """
+    MAX_LISTED = 20000 # Results shown in the list; the count keeps going
+    POLL_INTERVAL = 50 # ms between checks for directory search results
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.title("Find / Replace")
+        self.transient(editor)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.find_var = tk.StringVar()
+        self.replace_var = tk.StringVar()
+        self.regex_var = tk.BooleanVar(value=False)
+        self.case_var = tk.BooleanVar(value=False)
+        self.word_var = tk.BooleanVar(value=False)
+        self.scope_var = tk.StringVar(value="tab")
+        self.directory_var = tk.StringVar(value=os.getcwd())
+        self.index_var = tk.BooleanVar(value=True)
+
+        tk.Label(self, text="Find:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        find_entry = tk.Entry(self, textvariable=self.find_var, width=50)
+        find_entry.grid(row=0, column=1, columnspan=3, sticky="ew", padx=5, pady=2)
+        find_entry.bind("<Return>", lambda event: self.find())
+        tk.Label(self, text="Replace:").grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        tk.Entry(self, textvariable=self.replace_var, width=50).grid(row=1, column=1, columnspan=3, sticky="ew", padx=5, pady=2)
+
+        options = tk.Frame(self)
+        options.grid(row=2, column=1, columnspan=3, sticky="w")
+        tk.Checkbutton(options, text="Regular expression", variable=self.regex_var).pack(side="left")
+        tk.Checkbutton(options, text="Match case", variable=self.case_var).pack(side="left")
+        tk.Checkbutton(options, text="Whole word", variable=self.word_var).pack(side="left")
+
+        scopes = tk.Frame(self)
+        scopes.grid(row=3, column=1, columnspan=3, sticky="w")
+        tk.Radiobutton(scopes, text="Current tab", value="tab", variable=self.scope_var).pack(side="left")
+        tk.Radiobutton(scopes, text="All tabs", value="tabs", variable=self.scope_var).pack(side="left")
+        tk.Radiobutton(scopes, text="Directory", value="directory", variable=self.scope_var).pack(side="left")
+
+        tk.Label(self, text="Directory:").grid(row=4, column=0, sticky="w", padx=5, pady=2)
+        tk.Entry(self, textvariable=self.directory_var).grid(row=4, column=1, sticky="ew", padx=5, pady=2)
+        tk.Button(self, text="Browse...", command=self.browse_directory).grid(row=4, column=2, padx=2)
+        tk.Checkbutton(self, text="Use index", variable=self.index_var).grid(row=4, column=3, sticky="w")
+
+        buttons = tk.Frame(self)
+        buttons.grid(row=5, column=0, columnspan=4, sticky="ew", pady=4)
+        tk.Button(buttons, text="Find", command=self.find).pack(side="left", padx=2)
+        tk.Button(buttons, text="Replace", command=self.replace).pack(side="left", padx=2)
+        tk.Button(buttons, text="Replace All", command=self.replace_all).pack(side="left", padx=2)
+        tk.Button(buttons, text="Stop", command=self.stop).pack(side="left", padx=2)
+
+        self.results_list = tk.Listbox(self, height=15, font=("Consolas", 10), activestyle="none")
+        self.results_list.grid(row=6, column=0, columnspan=4, sticky="nsew", padx=5)
+        self.results_list.bind("<Double-Button-1>", lambda event: self.jump_to_selected())
+        self.results_list.bind("<Return>", lambda event: self.jump_to_selected())
+        self.summary = tk.Label(self, text="", anchor="w")
+        self.summary.grid(row=7, column=0, columnspan=4, sticky="ew", padx=5)
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(6, weight=1)
+
+        self.results = [] # (tab or path, line, column, end_line, end_column) per listed match
+        self.match_count = 0
+        self.directory_search = None
+        self.directory_regex = None
+        self.searched_directory = None # (root, regex, stat_key of each file with matches) of the last finished directory search
+        self.poll_id = None
+        self.replace_futures = [] # Files of a directory Replace All still being rewritten
+        self.replaced = None # (matches replaced in tabs, files) of that Replace All
+        find_entry.focus_set()
+
+    def close(self):
+        self.stop()
+        self.withdraw()
+
+    def browse_directory(self):
+        directory = filedialog.askdirectory(initialdir=self.directory_var.get() or None)
+        if directory:
+            self.directory_var.set(directory)
+            self.scope_var.set("directory")
+
+    def compiled_query(self):
+        """Returns the compiled search pattern, or None (after telling the user) if it is empty or invalid."""
+        if not self.find_var.get():
+            return None
+        try:
+            return search.compile_query(self.find_var.get(), self.regex_var.get(), self.case_var.get(), self.word_var.get())
+        except re.error as e:
+            messagebox.showerror("Find", f"Invalid regular expression: {e}", parent=self)
+            return None
+
+    def expand(self, match):
+        """The replacement text for one match (with \\1 etc. in regex mode)."""
+        return match.expand(self.replace_var.get()) if self.regex_var.get() else self.replace_var.get()
+
+    # --- Finding ---
+    def find(self):
+        regex = self.compiled_query()
+        if regex is None:
+            return
+        scope = self.scope_var.get()
+        if scope == "tab":
+            self.find_next(regex)
+        elif scope == "tabs":
+            self.find_in_tabs(regex)
+        else:
+            self.find_in_directory(regex)
+
+    def find_next(self, regex):
+        """Selects the next match after the cursor in the active tab, wrapping around."""
+        tab = self.editor.get_current_tab_info()
+        if not tab:
+            return
+        text_area = tab.text_area
+        text = text_area.get("1.0", "end-1c")
+        offset = int(text_area.count("1.0", "insert", "chars")[0] or 0) if text_area.compare("insert", ">", "1.0") else 0
+        match = next((m for m in regex.finditer(text, offset) if m.end() > m.start()), None)
+        if match is None:
+            match = next((m for m in regex.finditer(text) if m.end() > m.start()), None)
+        if match is None:
+            self.summary.config(text="No matches")
+            return
+        start, end = f"1.0 + {match.start()} chars", f"1.0 + {match.end()} chars"
+        text_area.tag_remove("sel", "1.0", tk.END)
+        text_area.tag_add("sel", start, end)
+        text_area.mark_set("insert", end)
+        text_area.see(start)
+        self.summary.config(text=f"Match at line {text_area.index(start).split('.')[0]}")
+
+    def find_in_tabs(self, regex):
+        """Lists the matches in every open tab; tabs not shown yet are searched on disk."""
+        self.stop()
+        self.clear_results()
+        for tab in self.editor.tabs:
+            if tab.pager is not None:
+                continue # Only a window of the file is in the widget; too large to search here
+            if tab.text_area is not None:
+                text = tab.text_area.get("1.0", "end-1c")
+            else:
+                text = search.read_text(tab.current_file_path) or ""
+            name = tab.current_file_path or "Untitled"
+            self.add_results(tab, name, search.find_matches(regex, text, search.MAX_MATCHES_PER_FILE))
+        self.summary.config(text=f"{self.match_count} matches in {len(self.editor.tabs)} tabs")
+
+    def find_in_directory(self, regex):
+        """Starts a background search of the chosen directory tree; results are polled in."""
+        root = os.path.abspath(self.directory_var.get())
+        if not os.path.isdir(root):
+            messagebox.showerror("Find", f"Not a directory: {root}", parent=self)
+            return
+        self.stop()
+        self.clear_results()
+        self.searched_directory = None
+        index = self.editor.search_index_for(root) if self.index_var.get() else None
+        literals = search.required_literals(self.find_var.get(), self.regex_var.get())
+        executor, workers = self.editor.search_pool()
+        self.directory_search = search.DirectorySearch(executor, workers, root, regex, literals, index)
+        self.directory_regex = regex
+        self.summary.config(text="Searching...")
+        self.poll_id = self.after(self.POLL_INTERVAL, self._poll_directory_search)
+
+    def _poll_directory_search(self):
+        current = self.directory_search
+        for path, *match in current.collect():
+            self.add_results(path, os.path.relpath(path, current.root), [match])
+        if not current.finished:
+            self.summary.config(text=f"Searching... {current.files_scanned} files, {self.match_count} matches")
+            self.poll_id = self.after(self.POLL_INTERVAL, self._poll_directory_search)
+            return
+        self.poll_id = None
+        self.directory_search = None
+        if current.error is not None:
+            self.summary.config(text=f"Search failed: {current.error}")
+            return
+        if not current.cancelled.is_set():
+            self.searched_directory = (current.root, self.directory_regex, current.keys)
+        how = "indexed, " if current.used_index else ""
+        self.summary.config(text=f"{self.match_count} matches ({how}{current.files_scanned} files read in {current.elapsed * 1000:.0f} ms)")
+        METRICS.record("search.directory", current.elapsed * 1000)
+
+    def stop(self):
+        """Cancels a running directory search."""
+        if self.directory_search is not None:
+            self.directory_search.cancel()
+            if self.poll_id is not None:
+                self.after_cancel(self.poll_id)
+                self.poll_id = None
+            self.summary.config(text=f"Stopped; {self.match_count} matches")
+            self.directory_search = None
+
+    def clear_results(self):
+        self.results = []
+        self.match_count = 0
+        self.results_list.delete(0, tk.END)
+
+    def add_results(self, location, name, matches):
+        self.match_count += len(matches)
+        room = self.MAX_LISTED - len(self.results)
+        if room <= 0 or not matches:
+            return
+        matches = matches[:room]
+        self.results += [(location, line, column, end_line, end_column) for line, column, end_line, end_column, _ in matches]
+        self.results_list.insert(tk.END, *(f"{name}:{line}: {line_text.strip()}" for line, _, _, _, line_text in matches))
+
+    def jump_to_selected(self):
+        selection = self.results_list.curselection()
+        if not selection:
+            return
+        location, line, column, end_line, end_column = self.results[selection[0]]
+        tab = location if isinstance(location, TabState) else self.editor.tabs.find_file(location) or self.editor.open_path(location)
+        if tab is None or tab not in self.editor.tabs:
+            return
+        self.editor.select_tab(tab)
+        self.editor.show_range(tab, f"{line}.{column}", f"{end_line}.{end_column}")
+
+    # --- Replacing ---
+    def replace(self):
+        """Replaces the selected match in the active tab and moves on to the next one."""
+        regex = self.compiled_query()
+        tab = self.editor.get_current_tab_info()
+        if regex is None or not tab:
+            return
+        text_area = tab.text_area
+        if text_area.tag_ranges("sel"):
+            match = regex.fullmatch(text_area.get("sel.first", "sel.last"))
+            if match:
+                try:
+                    replacement = self.expand(match)
+                except (re.error, IndexError) as e:
+                    messagebox.showerror("Replace", f"Invalid replacement: {e}", parent=self)
+                    return
+                text_area.replace("sel.first", "sel.last", replacement)
+        self.find_next(regex)
+
+    def replace_all(self):
+        regex = self.compiled_query()
+        if regex is None:
+            return
+        scope = self.scope_var.get()
+        try:
+            if scope == "tab":
+                tab = self.editor.get_current_tab_info()
+                count = self.replace_in_tab(tab, regex) if tab else 0
+                self.summary.config(text=f"Replaced {count} matches")
+            elif scope == "tabs":
+                tabs = list(self.editor.tabs)
+                count = sum(self.replace_in_tab(self.editor.materialized(tab), regex) for tab in tabs)
+                self.summary.config(text=f"Replaced {count} matches in {len(tabs)} tabs")
+            else:
+                self.replace_in_directory(regex)
+        except (re.error, IndexError) as e:
+            messagebox.showerror("Replace", f"Invalid replacement: {e}", parent=self)
+
+    def replace_in_tab(self, tab, regex, limit=None):
+        """Replaces every match (the first limit, if given) in a tab's buffer as a single undo step; returns the count."""
+        if tab.loader or tab.pager is not None:
+            return 0 # Only part of the file is there
+        text_area = tab.text_area
+        matches = [match for match in regex.finditer(text_area.get("1.0", "end-1c")) if match.end() > match.start()][:limit]
+        if not matches:
+            return 0
+        replacements = [self.expand(match) for match in matches] # Fail before changing anything
+        text_area.config(autoseparators=False)
+        text_area.edit_separator()
+        for match, replacement in zip(reversed(matches), reversed(replacements)):
+            text_area.replace(f"1.0 + {match.start()} chars", f"1.0 + {match.end()} chars", replacement)
+        text_area.edit_separator()
+        text_area.config(autoseparators=True)
+        return len(matches)
+
+    def replace_in_directory(self, regex):
+        """
+        Replaces the matches of the last directory search of the same query; in files with
+        more than MAX_MATCHES_PER_FILE matches only the listed ones. Files open in a tab are
+        changed in the tab (unsaved); all others are rewritten on the process pool, unless
+        they changed since the search, and the outcome is polled in like search results.
+        """
+        if self.replace_futures:
+            messagebox.showinfo("Replace", "The previous Replace All is still running.", parent=self)
+            return
+        if self.searched_directory is None or self.searched_directory[1] != regex or self.searched_directory[0] != os.path.abspath(self.directory_var.get()):
+            messagebox.showinfo("Replace", "Run Find on the directory with this query first.", parent=self)
+            return
+        listed = {} # path -> matches listed for it
+        for location, *_ in self.results:
+            listed[location] = listed.get(location, 0) + 1
+        paths = sorted(listed)
+        if self.match_count > len(self.results):
+            messagebox.showinfo("Replace", "Too many matches to replace from here; narrow the search.", parent=self)
+            return
+        question = f"Replace {len(self.results)} matches in {len(paths)} files?\nFiles that are not open cannot be undone."
+        if any(count >= search.MAX_MATCHES_PER_FILE for count in listed.values()):
+            question += f"\nOnly the first {search.MAX_MATCHES_PER_FILE} matches of a file are listed, and only those are replaced."
+        if not paths or not messagebox.askyesno("Replace", question, parent=self):
+            return
+        replacement = self.replace_var.get()
+        literal = not self.regex_var.get()
+        if not literal:
+            regex.sub(replacement, "") # Raises for an invalid template before any file is touched
+        executor, _ = self.editor.search_pool()
+        keys = self.searched_directory[2]
+        count = 0
+        futures = []
+        for path in paths:
+            tab = self.editor.tabs.find_file(path)
+            if tab is not None:
+                count += self.replace_in_tab(self.editor.materialized(tab), regex, listed[path])
+            else:
+                # Skipped if the file changed since the search: its matches may not be the listed ones
+                future = executor.submit(search.replace_in_file, path, regex.pattern, regex.flags, replacement, literal, listed[path], keys.get(path))
+                futures.append((path, future))
+        self.searched_directory = None # The results are out of date now
+        self.replace_futures = futures
+        self.replaced = (count, len(paths))
+        self._poll_directory_replace()
+
+    def _poll_directory_replace(self):
+        """Reports a directory Replace All once every file is rewritten."""
+        futures = self.replace_futures
+        done = sum(future.done() for _, future in futures)
+        if done < len(futures):
+            self.summary.config(text=f"Replacing... {done} of {len(futures)} files written")
+            self.after(self.POLL_INTERVAL, self._poll_directory_replace)
+            return
+        count, files = self.replaced
+        failures = []
+        changed = []
+        for path, future in futures:
+            try:
+                replaced = future.result()
+            except Exception:
+                failures.append(path)
+                continue
+            if replaced is None:
+                changed.append(path)
+                continue
+            count += replaced
+            if replaced:
+                self.editor.mark_search_stale(path)
+        self.replace_futures = []
+        summary = f"Replaced {count} matches in {files - len(failures) - len(changed)} files"
+        if failures:
+            summary += f"; {len(failures)} files could not be written"
+        if changed:
+            summary += f"; {len(changed)} files changed since the search and were skipped (search again to replace in them)"
+        self.summary.config(text=summary)
+
+
+class QuickOpenDialog(tk.Toplevel):
+    """
+    Fuzzy finder over the files of the projects of the open tabs (see symbols.py),
+    filtered on every keystroke. "#" searches their symbols instead, "@" only the
+    symbols of the open tabs. Return or a double-click opens the selected entry.
+    """
+    LIMIT = 50 # Entries listed
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.title("Quick Open")
+        self.transient(editor)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.query_var = tk.StringVar()
+        self.entry = tk.Entry(self, textvariable=self.query_var, width=70, font=("Consolas", 11))
+        self.entry.grid(row=0, column=0, sticky="ew", padx=5, pady=5)
+        self.entry.bind("<Return>", lambda event: self.open_selected())
+        self.entry.bind("<Escape>", lambda event: self.close())
+        self.entry.bind("<Down>", lambda event: self.move_selection(1))
+        self.entry.bind("<Up>", lambda event: self.move_selection(-1))
+        self.results_list = tk.Listbox(self, height=20, font=("Consolas", 10), activestyle="none")
+        self.results_list.grid(row=1, column=0, sticky="nsew", padx=5)
+        self.results_list.bind("<Double-Button-1>", lambda event: self.open_selected())
+        self.results_list.bind("<Return>", lambda event: self.open_selected())
+        self.summary = tk.Label(self, text="", anchor="w")
+        self.summary.grid(row=2, column=0, sticky="ew", padx=5)
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.targets = [] # (tab or path, line or None) per listed entry
+        self.tab_matchers = {} # tab -> (its symbols, FuzzyMatcher over their names)
+        self.query_var.trace_add("write", lambda *args: self.refresh())
+
+    def show(self, query=""):
+        self.deiconify()
+        self.lift()
+        self.query_var.set(query) # Refreshes the list
+        self.entry.icursor(tk.END)
+        self.entry.focus_set()
+
+    def close(self):
+        self.withdraw()
+
+    def move_selection(self, step):
+        if not self.targets:
+            return "break"
+        selection = self.results_list.curselection()
+        index = min(max((selection[0] if selection else 0) + step, 0), len(self.targets) - 1)
+        self.results_list.selection_clear(0, tk.END)
+        self.results_list.selection_set(index)
+        self.results_list.see(index)
+        return "break"
+
+    def refresh(self):
+        """Lists the best matches for the query; runs on every keystroke."""
+        start = time.perf_counter()
+        query = self.query_var.get().strip()
+        found = [] # (rank, label, target)
+        directories = self.editor.symbol_directories()
+        if query[:1] in ("@", "#"):
+            needle = query[1:].strip()
+            for tab, (tab_symbols, matcher) in self.open_tab_matchers().items():
+                name = os.path.basename(tab.current_file_path) if tab.current_file_path else "Untitled"
+                for rank, index in matcher.search(needle, self.LIMIT):
+                    symbol, kind, line, _ = tab_symbols[index]
+                    found.append((rank, f"{symbol}  ({kind})  {name}:{line}", (tab, line)))
+            if query[0] == "#":
+                open_paths = {tab.current_file_path for tab in self.editor.tabs} # Their tabs are more recent
+                for directory in directories:
+                    for rank, index in directory.symbol_matcher.search(needle, self.LIMIT):
+                        symbol, kind, path, line = directory.symbols[index]
+                        if path not in open_paths:
+                            found.append((rank, f"{symbol}  ({kind})  {os.path.relpath(path, directory.root)}:{line}", (path, line)))
+        else:
+            for directory in directories:
+                matcher = directory.path_matcher if "/" in query else directory.file_matcher
+                for rank, index in matcher.search(query, self.LIMIT):
+                    path = directory.files[index]
+                    found.append((rank, os.path.relpath(path, os.path.dirname(directory.root)), (path, None)))
+        found.sort(key=lambda entry: entry[0])
+        found = found[:self.LIMIT]
+        self.targets = [target for _, _, target in found]
+        self.results_list.delete(0, tk.END)
+        if found:
+            self.results_list.insert(tk.END, *(label for _, label, _ in found))
+            self.results_list.selection_set(0)
+        elapsed = (time.perf_counter() - start) * 1000
+        METRICS.record("quick_open.query", elapsed)
+        indexing = " (indexing...)" if any(not directory.complete for directory in directories) or len(directories) < len(self.editor.symbol_roots()) else ""
+        self.summary.config(text=f"{len(found)} shown in {elapsed:.1f} ms{indexing}   # symbols, @ symbols of open tabs")
+
+    def open_tab_matchers(self):
+        """FuzzyMatchers over the symbols of each open tab, rebuilt when those change."""
+        matchers = {}
+        for tab in self.editor.tabs:
+            tab_symbols = self.editor.symbol_indexer.symbols(tab)
+            if not tab_symbols:
+                continue
+            cached = self.tab_matchers.get(tab)
+            if cached is None or cached[0] is not tab_symbols:
+                cached = (tab_symbols, symbols.FuzzyMatcher([symbol[0] for symbol in tab_symbols]))
+            matchers[tab] = cached
+        self.tab_matchers = matchers
+        return matchers
+
+    def open_selected(self):
+        selection = self.results_list.curselection()
+        if not selection:
+            return
+        location, line = self.targets[selection[0]]
+        tab = location if isinstance(location, TabState) else self.editor.tabs.find_file(location) or self.editor.open_path(location)
+        if tab is None or tab not in self.editor.tabs:
+            return
+        self.close()
+        self.editor.select_tab(tab)
+        if line:
+            self.editor.show_line(tab, line)
+        if tab.text_area is not None:
+            tab.text_area.focus_set()
+
+
+class CodeEditor(tk.Tk):
+    """
+    A simple code editor application similar to Notepad++ using Tkinter.
+    It provides basic functionalities like creating new files, opening existing files,
+    saving files, saving files with a new name, line numbers, and basic syntax highlighting.
+    Now with tabbed interface.
+    """
+    HIGHLIGHT_POLL_INTERVAL = 15 # ms between checks for finished highlight jobs
+    SAVE_POLL_INTERVAL = 50 # ms between checks for finished saves
+    INSTANCE_POLL_INTERVAL = 100 # ms between checks for files sent by other launches
+    def __init__(self, targets=(), instance_server=None, report_startup=False):
+        """
+        targets are (path, line) pairs to open, e.g. from the command line; they are read
+        on a thread pool while the window is built. instance_server (instance.py) receives
+        the files of later launches.
+        """
+        super().__init__()
+        # Read the files to open in parallel while the window is being built
+        self.read_pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 2), thread_name_prefix="file-reader")
+        self.pending_opens = [] # (path, line, future) in the order they were asked for
+        self.open_poll_id = None
+        self.instance_server = instance_server
+        self.report_startup = report_startup
+        self.first_paint_ms = None
+        self.title("Breeze Code Editor")
+        self.geometry("1000x700") # Increased size for line numbers
+
+        # --- Tab Control ---
+        self.notebook = ttk.Notebook(self)
+        self.notebook.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        # --- Status Bar ---
+        # Reports things like finished saves without interrupting with a dialog
+        self.status_bar = tk.Label(self, text="", anchor="w", bd=1, relief="sunken", padx=5)
+        self.status_bar.grid(row=1, column=0, columnspan=2, sticky="ew")
+        # p50/p99 of the hot paths, shown below it when enabled from the Help menu
+        self.perf_label = tk.Label(self, text="", anchor="w", bd=1, relief="sunken", padx=5, font=("Consolas", 9))
+        self.perf_overlay_var = tk.BooleanVar(value=False)
+        self.perf_overlay_id = None
+        self.perf_tick = None
+        self.profiling_var = tk.BooleanVar(value=False)
+        self.profile_capture = ProfileCapture()
+
+        # Buffers longer than lazy_highlight_threshold lines are only highlighted around the
+        # viewport, highlight_margin lines above and below it
+        self.highlight_margin = 100
+        self.lazy_highlight_threshold = 5000
+
+        # Lexing runs on a worker thread; requests are debounced by highlight_delay ms
+        self.highlight_worker = HighlightWorker()
+        self.highlight_delay = 40
+        self.highlight_max_delay = 150
+        self.highlight_poll_id = None
+        # Files of at least streaming_threshold bytes are loaded in chunks; files of at least
+        # paged_threshold bytes are not loaded at all but paged through read-only
+        self.streaming_threshold = 2 * 1024 * 1024
+        self.paged_threshold = 256 * 1024 * 1024
+
+        # Highlight results of unchanged files are reused across tabs and sessions
+        self.token_cache = TokenCache(disk_dir=os.path.join(CACHE_DIR, "tokens"))
+
+        # Files are written on background threads; results are picked up by polling
+        self.file_saver = FileSaver()
+        self.save_poll_id = None
+
+        # Files changed by other programs are reloaded (or, with unsaved changes, asked about)
+        self.file_watcher = FileWatcher(hash_limit=self.paged_threshold)
+        self.file_changes = [] # FileChanges waiting to be handled
+        self.resolving_conflict = False
+        self.after(self.WATCH_INTERVAL, self._collect_file_changes)
+
+        # Tabs in follow mode get what is appended to their file every FOLLOW_INTERVAL ms
+        self.follow_var = tk.BooleanVar(value=False) # Follow mode of the active tab, for the menu
+        self.follow_poll_id = None
+
+        # Find / Replace; the process pool and trigram indexes are created on first use
+        self.find_dialog = None
+        self.search_executor = None
+        self.search_pool_lock = threading.Lock()
+        self.search_indexes = {} # directory -> search.TrigramIndex
+
+        # Symbols of the open tabs and of their projects (see symbols.py): outline, Go to Symbol, Quick Open
+        self.symbol_indexer = symbols.SymbolIndexer(os.path.join(CACHE_DIR, "symbols"))
+        self.outline_var = tk.BooleanVar(value=False)
+        self.outline_frame = None # Built when first shown
+        self.outline_lines = {} # outline item -> line
+        self.quick_open_dialog = None
+        self.after(self.SYMBOL_POLL_INTERVAL, self._collect_symbol_changes)
+
+        # Lines changed since the last save are marked in the gutter; diffed on a worker thread
+        self.diff_worker = diffing.DiffWorker()
+        self.after(self.DIFF_POLL_INTERVAL, self._collect_diff_changes)
+
+        # Open tabs are remembered across runs
+        self.session_file = os.path.join(STATE_DIR, "session.json")
+
+        # Unsaved edits are journaled in the background (see journal.py)
+        self.journal_writer = journal.JournalWriter(RECOVERY_DIR)
+        self.journal_paused = False # Set while the editor itself replaces a tab's text
+
+        self.tabs = TabRegistry(self.notebook) # TabState of every open tab
+        self.open_targets(targets)
+        if not self.restore_session() and not targets:
+            self.add_new_tab() # Start with one new tab
+
+        # Create the menu bar
+        self.create_menus()
+
+        # Set a protocol for closing the window to handle unsaved changes
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # Bind the tab change event
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_change)
+
+        # Everything that can wait (dialogs, opening the files read meanwhile) runs after the first paint
+        self.bind("<Expose>", self._on_first_paint)
+
+    def add_new_tab(self, file_path=None, content=""):
+        """
+        Adds a new tab to the notebook.
+        """
+        tab_info = self._add_tab_frame(file_path)
+        self._build_tab_widgets(tab_info, content)
+
+        # Select the newly added tab
+        self.select_tab(tab_info)
+        self.update_line_numbers_for_tab(tab_info)
+        self.update_title()
+        return tab_info
+
+    def _add_tab_frame(self, file_path):
+        """Adds an empty frame to the notebook and registers a TabState for it."""
+        tab_frame = tk.Frame(self.notebook)
+        self.notebook.add(tab_frame, text="Untitled" if file_path is None else file_path.split('/')[-1])
+        tab_info = TabState(tab_frame, current_file_path=file_path)
+        self.tabs.add(tab_info)
+        return tab_info
+
+    def _build_tab_widgets(self, tab_info, content):
+        """
+        Creates the line numbers, text area and scrollbar of a tab, filled with content.
+        """
+        tab_frame = tab_info.frame
+
+        # Configure tab_frame grid
+        tab_frame.grid_rowconfigure(0, weight=1)
+        tab_frame.grid_columnconfigure(1, weight=1)
+
+        # --- Line Numbers Canvas for this tab ---
+        line_numbers = tk.Canvas(tab_frame, width=40, bg="#282c34", highlightthickness=0) # Dark background
+        line_numbers.grid(row=0, column=0, sticky="nswe")
+
+        # --- Text Area for this tab ---
+        text_area = tk.Text(
+            tab_frame,
+            wrap="word",
+            undo=True,
+            bg="#282c34", # Dark background
+            fg="#abb2bf", # Light foreground
+            insertbackground="#abb2bf", # Cursor color
+            selectbackground="#4b5263", # Selection background
+            font=("Consolas", 11) # Monospace font for code
+        )
+        text_area.grid(row=0, column=1, sticky="nsew")
+        text_area.insert(1.0, content)
+        text_area.edit_reset() # Loading the file is not an undoable edit
+        text_area.edit_modified(False)
+        highlighter = SyntaxHighlighter(TextWidgetView(text_area), "txt", margin=self.highlight_margin, lazy_threshold=self.lazy_highlight_threshold, cache=self.token_cache)
+        gutter = LineNumberGutter(line_numbers, text_area)
+        self._intercept_text_edits(text_area, highlighter, gutter, tab_info)
+
+        # --- Scrollbar for this tab ---
+        scrollbar = tk.Scrollbar(tab_frame, command=text_area.yview)
+        scrollbar.grid(row=0, column=2, sticky="ns")
+        # Every scroll source (wheel, scrollbar drag, cursor movement) ends up here
+        text_area.config(yscrollcommand=lambda first, last, sb=scrollbar, hl=highlighter, gt=gutter: self._on_text_area_scroll(sb, hl, gt, first, last))
+
+        # Bindings for this tab's text_area
+        # Edits schedule the gutter themselves (see _intercept_text_edits) and scrolling
+        # goes through yscrollcommand; only resizes are left
+        text_area.bind("<Configure>", lambda event, gt=gutter: gt.schedule())
+        text_area.bind("<MouseWheel>", lambda event, ta=text_area: self._on_mouse_wheel(event, ta))
+        
+        # Add a binding for tab key to insert spaces
+        text_area.bind("<Tab>", self.handle_tab_key)
+
+
+        # Store tab information
+        tab_info.text_area = text_area
+        tab_info.line_numbers = line_numbers
+        tab_info.gutter = gutter
+        tab_info.highlighter = highlighter
+        tab_info.saved_digest = content_digest(content)
+        # The modified flag only changes on the first edit and on save, so this is cheap
+        text_area.bind("<<Modified>>", lambda event, tab=tab_info: self._on_modified_flag_change(tab))
+
+        self.set_file_type_for_tab(tab_info, tab_info.current_file_path)
+        self.configure_syntax_highlighting(text_area)
+        self.apply_syntax_highlighting_for_tab(tab_info, content)
+        if tab_info.pager is not None:
+            tab_info.pager.attach(tab_info, scrollbar)
+        else:
+            self.diff_worker.load(tab_info, content)
+        self.index_tab(tab_info, content)
+
+    # --- Sessions ---
+    def save_session(self):
+        """
+        Writes the open files, their cursor and scroll positions and the active tab to
+        session_file. Untitled tabs are not part of the session.
+        """
+        tabs = []
+        active = None
+        current_tab = self.tabs.current()
+        for tab_info in self.tabs:
+            if not tab_info.current_file_path:
+                continue
+            if tab_info is current_tab:
+                active = len(tabs)
+            if tab_info.text_area is None: # Never shown; keep what it was restored with
+                view = tab_info.restore or {}
+            elif tab_info.pager is not None: # Positions in the file, not in the window
+                view = {'cursor': tab_info.pager.absolute("insert"), 'top': tab_info.pager.absolute("@0,0")}
+            else:
+                view = {'cursor': tab_info.text_area.index("insert"), 'top': tab_info.text_area.index("@0,0")}
+            tabs.append(dict(view, path=tab_info.current_file_path))
+        try:
+            os.makedirs(os.path.dirname(self.session_file), exist_ok=True)
+            write_file_atomically(self.session_file, json.dumps({'version': 1, 'tabs': tabs, 'active': active}))
+        except OSError:
+            pass # Losing the session is not worth bothering the user on exit
+
+    def restore_session(self):
+        """
+        Reopens the tabs of the last session as placeholders, so no file is read and no
+        widgets are built until a tab is first selected. Returns the number of tabs.
+        """
+        try:
+            with open(self.session_file, "r", encoding="utf-8") as file:
+                session = json.load(file)
+            entries = session['tabs']
+            active = session.get('active')
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+        restored = []
+        for entry in entries:
+            if not isinstance(entry, dict) or not isinstance(entry.get('path'), str):
+                continue # Skip anything unexpected rather than lose the whole session
+            tab_info = self._add_tab_frame(entry['path'])
+            tab_info.restore = {'cursor': entry.get('cursor', "1.0"), 'top': entry.get('top', "1.0")}
+            restored.append(tab_info)
+        if restored:
+            # The tab is built when <<NotebookTabChanged>> arrives from the event loop
+            self.select_tab(restored[active] if isinstance(active, int) and 0 <= active < len(restored) else restored[0])
+        return len(restored)
+
+    def materialize_tab(self, tab_info):
+        """Reads the file of a placeholder tab and builds its widgets."""
+        file_path = tab_info.current_file_path
+        restore, tab_info.restore = tab_info.restore, None
+        content = ""
+        stream = None
+        try:
+            size = os.path.getsize(file_path)
+            if size >= self.paged_threshold:
+                tab_info.pager = PagedView(self, PagedFile(file_path))
+            elif size >= self.streaming_threshold:
+                stream = FileStream(file_path)
+            else:
+                with open(file_path, "r", encoding="utf-8") as file:
+                    content = file.read()
+        except Exception as e:
+            # Keep the tab, but detached: saving must not overwrite a file we could not read
+            tab_info.current_file_path = None
+            self.set_status(f"Could not reopen {file_path}: {e}", error=True)
+        self._build_tab_widgets(tab_info, content)
+        if stream is not None:
+            tab_info.restore = restore # Applied once the whole file is in
+            self._start_streaming_load(tab_info, stream)
+        else:
+            self.update_tab_label(tab_info)
+            self.restore_view(tab_info, restore)
+            self.track_file(tab_info)
+        self.update_line_numbers_for_tab(tab_info)
+
+    def materialized(self, tab_info):
+        """Returns tab_info with its widgets built (see materialize_tab)."""
+        if tab_info.text_area is None:
+            self.materialize_tab(tab_info)
+        return tab_info
+
+    def restore_view(self, tab_info, restore):
+        """Moves the cursor and scrolls a tab to the positions saved in the session."""
+        if not restore:
+            return
+        try:
+            if tab_info.pager is not None:
+                tab_info.pager.show(int(str(restore['top']).split('.')[0]), top=True, wait=True)
+                return
+            tab_info.text_area.mark_set("insert", restore['cursor'])
+            tab_info.text_area.yview(restore['top']) # Puts that line at the top
+        except (tk.TclError, ValueError):
+            pass # Not a valid text index (hand-edited session file)
+
+    def _intercept_text_edits(self, text_area, highlighter, gutter, tab_info):
+        """
+        Routes the Text widget's Tcl command through a Python proxy so that every insert
+        and delete (typing, paste, undo/redo, programmatic edits) tells the highlighter,
+        the symbol index and the diff against the saved file which lines it touched, gets
+        the line numbers redrawn and is journaled for crash recovery.
+        """
+        widget_command = text_area._w + "_orig"
+        self.tk.call("rename", text_area._w, widget_command)
+
+        def line_of(index):
+            return int(self.tk.call(widget_command, "index", index).split('.')[0])
+
+        def proxy(*args):
+            if not args or args[0] not in ("insert", "delete", "replace"):
+                return self.tk.call((widget_command,) + args)
+
+            start = time.perf_counter()
+            # insert takes one index, replace two, delete one or more
+            indices = args[1:2] if args[0] == "insert" else args[1:3] if args[0] == "replace" else args[1:]
+            positions = [self.tk.call(widget_command, "index", index) for index in indices] # "line.column", before the edit
+            lines_before = line_of("end-1c")
+            touched = [min(int(position.split('.')[0]), lines_before) for position in positions]
+            tab_journal = self.journal_for(tab_info)
+            result = self.tk.call((widget_command,) + args)
+            if tab_journal is not None:
+                self.journal_edit(tab_info, tab_journal, args, positions)
+            lines_after = line_of("end-1c")
+            first, old_last = min(touched), max(touched)
+            new_last = old_last + lines_after - lines_before
+            highlighter.lines_changed(first, old_last, new_last)
+            if tab_info in self.symbol_indexer or tab_info in self.diff_worker:
+                new_lines = str(self.tk.call(widget_command, "get", f"{first}.0", f"{new_last}.0 lineend")).split("\n")
+                if tab_info in self.symbol_indexer:
+                    self.symbol_indexer.edit(tab_info, first, old_last, new_lines)
+                if tab_info in self.diff_worker:
+                    self.diff_worker.edit(tab_info, first, old_last, new_lines)
+            self.schedule_highlight(highlighter)
+            gutter.schedule()
+            METRICS.record("edit", (time.perf_counter() - start) * 1000)
+            return result
+
+        self.tk.createcommand(text_area._w, proxy)
+
+    def handle_tab_key(self, event):
+        """
+        Inserts 4 spaces when the Tab key is pressed.
+        """
+        current_tab = self.get_current_tab_info()
+        if current_tab:
+            current_tab.text_area.insert(tk.INSERT, "    ") # Insert 4 spaces
+            return "break" # Prevent default tab behavior (focus change)
+        return None # Allow default behavior if no tab is active
+
+    def _on_tab_change(self, event):
+        """Called when a tab is changed."""
+        self.tabs.invalidate()
+        self.update_title()
+        current_tab_info = self.get_current_tab_info()
+        if current_tab_info:
+            self.follow_var.set(current_tab_info.follower is not None)
+            self.update_line_numbers_for_tab(current_tab_info)
+            if self.outline_var.get():
+                self.refresh_outline()
+            self.schedule_highlight(current_tab_info.highlighter, delay=0) # Tags are kept per widget; only pending edits need work
+
+    def get_current_tab_info(self):
+        """Returns the TabState of the currently selected tab, building it first if it is a placeholder."""
+        tab_info = self.tabs.current()
+        if tab_info is not None and tab_info.text_area is None:
+            self.materialize_tab(tab_info)
+        return tab_info
+
+    def select_tab(self, tab_info):
+        """
+        Selects a tab. <<NotebookTabChanged>> only arrives through the event queue, so the
+        cached current tab is dropped here for code that runs before it is delivered.
+        """
+        self.notebook.select(tab_info.frame)
+        self.tabs.invalidate()
+
+    def run_on_current_text_area(self, action):
+        """Calls action(text_area) for the active tab, if there is one."""
+        current_tab = self.get_current_tab_info()
+        if current_tab:
+            action(current_tab.text_area)
+
+    def create_menus(self):
+        """
+        Creates the main menu bar with File, Edit, and Help options.
+        """
+        menubar = tk.Menu(self)
+        self.config(menu=menubar)
+
+        # File menu
+        file_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="File", menu=file_menu)
+        file_menu.add_command(label="New Tab", command=self.add_new_tab)
+        file_menu.add_command(label="Open...", command=self.open_file)
+        file_menu.add_command(label="Save", command=self.save_file)
+        file_menu.add_command(label="Save As...", command=self.save_file_as)
+        file_menu.add_command(label="Save All", command=self.save_all)
+        file_menu.add_command(label="Close Tab", command=self.close_current_tab)
+        file_menu.add_command(label="Cancel Loading", command=self.cancel_loading)
+        file_menu.add_checkbutton(label="Follow File", variable=self.follow_var, command=self.toggle_follow)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.on_closing)
+
+        # Edit menu (basic undo/redo for demonstration)
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Edit", menu=edit_menu)
+        edit_menu.add_command(label="Undo", command=lambda: self.run_on_current_text_area(lambda ta: ta.edit_undo()))
+        edit_menu.add_command(label="Redo", command=lambda: self.run_on_current_text_area(lambda ta: ta.edit_redo()))
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Cut", command=lambda: self.run_on_current_text_area(lambda ta: ta.event_generate("<<Cut>>")))
+        edit_menu.add_command(label="Copy", command=lambda: self.run_on_current_text_area(lambda ta: ta.event_generate("<<Copy>>")))
+        edit_menu.add_command(label="Paste", command=lambda: self.run_on_current_text_area(lambda ta: ta.event_generate("<<Paste>>")))
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Find / Replace...", command=self.show_find_dialog)
+        edit_menu.add_command(label="Find in Files...", command=lambda: self.show_find_dialog(scope="directory"))
+        edit_menu.add_command(label="Go to Line...", command=self.go_to_line)
+        edit_menu.add_command(label="Go to Symbol...", command=lambda: self.show_quick_open("@"))
+        edit_menu.add_command(label="Quick Open...", command=self.show_quick_open)
+        edit_menu.add_separator()
+        edit_menu.add_command(label="Next Change", command=self.next_change)
+        edit_menu.add_command(label="Revert Change", command=self.revert_change)
+
+        # View menu
+        view_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="View", menu=view_menu)
+        view_menu.add_checkbutton(label="Outline", variable=self.outline_var, command=self.toggle_outline)
+
+
+        # Help menu (optional)
+        help_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Help", menu=help_menu)
+        help_menu.add_command(label="Highlight Cache Statistics", command=self.show_cache_stats)
+        help_menu.add_checkbutton(label="Performance Overlay", variable=self.perf_overlay_var, command=self.toggle_perf_overlay)
+        help_menu.add_checkbutton(label="Profile Session (cProfile + tracemalloc)", variable=self.profiling_var, command=self.toggle_profiling)
+        help_menu.add_command(label="Export Performance Report...", command=self.export_performance_report)
+        help_menu.add_command(label="About", command=self.show_about_info)
+
+    def new_file(self):
+        """
+        This method is now redundant as add_new_tab handles creating a new, empty file.
+        Kept for backward compatibility if needed elsewhere.
+        """
+        self.add_new_tab()
+
+    def open_file(self):
+        """
+        Opens an existing file and loads its content into a new tab.
+        """
+        file_path = filedialog.askopenfilename(
+            defaultextension=".txt",
+            filetypes=[
+                ("All Files", "*.*"),
+                ("Text Documents", "*.txt"),
+                ("Python Files", "*.py"),
+                ("HTML Files", "*.html"),
+                ("CSS Files", "*.css"),
+                ("JavaScript Files", "*.js")
+            ]
+        )
+        if file_path:
+            self.open_path(file_path)
+
+    def open_path(self, file_path):
+        """
+        Opens a file in a new tab (streaming it in if it is large). Returns the tab, or
+        None if the file could not be opened.
+        """
+        try:
+            with METRICS.timer("open"):
+                size = os.path.getsize(file_path)
+                if size >= self.paged_threshold:
+                    return self.open_paged_file(file_path)
+                if size >= self.streaming_threshold:
+                    return self.stream_file_into_new_tab(file_path)
+                with open(file_path, "r", encoding="utf-8") as file:
+                    content = file.read()
+                tab_info = self.add_new_tab(file_path=file_path, content=content)
+                self.track_file(tab_info)
+                return tab_info
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open file: {e}")
+            return None
+
+    def open_paged_file(self, file_path):
+        """Opens a file in the read-only large-file viewer (see PagedView) in a new tab."""
+        pager = PagedView(self, PagedFile(file_path))
+        tab_info = self._add_tab_frame(file_path)
+        tab_info.pager = pager
+        self._build_tab_widgets(tab_info, "")
+        self.track_file(tab_info)
+        self.select_tab(tab_info)
+        self.update_line_numbers_for_tab(tab_info)
+        self.update_title()
+        return tab_info
+
+    def go_to_line(self):
+        """Asks for a line number and moves the cursor of the active tab there."""
+        current_tab = self.get_current_tab_info()
+        if not current_tab:
+            return
+        line = simpledialog.askinteger("Go to Line", "Line number:", parent=self, minvalue=1)
+        if line is None:
+            return
+        self.show_line(current_tab, line)
+        current_tab.text_area.focus_set()
+
+    def show_line(self, tab_info, line):
+        """Moves a tab's cursor to the start of line, or arranges for that once the tab is loaded."""
+        if tab_info.pager is not None:
+            tab_info.pager.show(line, wait=True)
+        elif tab_info.text_area is None or tab_info.loader:
+            tab_info.restore = {'cursor': f"{line}.0", 'top': f"{max(1, line - 5)}.0"}
+        else:
+            tab_info.text_area.mark_set("insert", f"{line}.0")
+            tab_info.text_area.see("insert")
+
+    def show_range(self, tab_info, start, end):
+        """Selects start..end in a tab and scrolls to it; for a tab still loading, once it has loaded."""
+        if tab_info.loader:
+            tab_info.restore = {'cursor': start, 'top': f"{start} linestart"}
+            return
+        text_area = tab_info.text_area
+        text_area.tag_remove("sel", "1.0", tk.END)
+        text_area.tag_add("sel", start, end)
+        text_area.mark_set("insert", start)
+        text_area.see(start)
+        text_area.focus_set()
+
+    # --- Streaming File Loading ---
+    def stream_file_into_new_tab(self, file_path):
+        """
+        Opens a large file in a new tab and inserts its content in batches from after()
+        callbacks, so the tab can be used (and the load cancelled) while it fills up.
+        """
+        stream = FileStream(file_path)
+        tab_info = self.add_new_tab(file_path=file_path)
+        self._start_streaming_load(tab_info, stream)
+        return tab_info
+
+    def _start_streaming_load(self, tab_info, stream):
+        """Starts filling an (empty) tab from stream."""
+        tab_info.loader = stream
+        text_area = tab_info.text_area
+        text_area.config(undo=False) # Loaded text is not undoable; edits during the load aren't either
+        text_area.mark_set("stream_end", "end-1c") # Right gravity: stays after the inserted text
+        text_area.edit_modified(False)
+        self.stop_diffing(tab_info) # Too large to keep a second copy of, line by line
+        stream.user_edited = False
+        stream.digest = TokenCache.hasher(tab_info.file_type) if lexer_for(tab_info.file_type) else None
+        stream.content_digest = hashlib.blake2b(digest_size=20)
+        stream.after_id = self.after(1, self._continue_streaming_load, tab_info)
+
+    def _continue_streaming_load(self, tab_info):
+        """Inserts the next chunk of a streaming load and reschedules itself."""
+        stream = tab_info.loader
+        text_area = tab_info.text_area
+        if text_area.edit_modified(): # Reset after each of our own inserts, so this was the user
+            stream.user_edited = True
+        try:
+            chunk = stream.read_chunk()
+        except (OSError, ValueError) as e: # UnicodeDecodeError is a ValueError
+            self._finish_streaming_load(tab_info, completed=False)
+            messagebox.showerror("Error", f"Could not open file: {e}")
+            return
+        if chunk:
+            text_area.insert("stream_end", chunk)
+            text_area.edit_modified(False)
+            encoded = chunk.encode("utf-8", "surrogatepass")
+            stream.content_digest.update(encoded)
+            if stream.digest is not None:
+                stream.digest.update(encoded)
+        if stream.finished:
+            self._finish_streaming_load(tab_info, completed=True)
+            return
+        file_name = tab_info.current_file_path.split('/')[-1]
+        self.notebook.tab(tab_info.frame, text=f"{file_name} ({stream.progress():.0%})")
+        stream.after_id = self.after(1, self._continue_streaming_load, tab_info)
+
+    def _finish_streaming_load(self, tab_info, completed):
+        """
+        Ends a streaming load. A load that did not complete leaves partial content, so
+        the tab is detached from the file to keep Save from truncating it.
+        """
+        stream = tab_info.loader
+        tab_info.loader = None
+        self.after_cancel(stream.after_id)
+        stream.close()
+        text_area = tab_info.text_area
+        if text_area.edit_modified():
+            stream.user_edited = True
+        text_area.mark_unset("stream_end")
+        text_area.config(undo=True)
+        text_area.edit_reset()
+        text_area.edit_modified(stream.user_edited)
+
+        restore, tab_info.restore = tab_info.restore, None
+        if completed:
+            self.restore_view(tab_info, restore)
+            tab_info.saved_digest = stream.content_digest.digest()
+            self.track_file(tab_info)
+            if stream.digest is not None and not stream.user_edited and tab_info.highlighter.cache is not None:
+                tab_info.highlighter.content_key = TokenCache.key_of(tab_info.file_type, stream.digest)
+        else:
+            tab_info.partial_of = tab_info.current_file_path.split('/')[-1]
+            tab_info.current_file_path = None
+            tab_info.saved_digest = None # Never matches: the file was not loaded completely
+        self.update_tab_label(tab_info)
+        self.update_title()
+
+    def cancel_loading(self):
+        """Stops streaming a file into the active tab, keeping what was loaded so far."""
+        current_tab = self.get_current_tab_info()
+        if current_tab and current_tab.loader:
+            self._finish_streaming_load(current_tab, completed=False)
+
+    def save_file(self, wait=False):
+        """
+        Saves the current content of the active tab to its current file path.
+        If no file path is set, it calls save_file_as for the active tab.
+        The file is written in the background unless wait is set; returns False if the
+        save was cancelled or (when waiting) failed.
+        """
+        current_tab = self.get_current_tab_info()
+        if not current_tab:
+            return False
+        if current_tab.loader:
+            messagebox.showerror("Error", "The file is still loading. Wait for it to finish or cancel loading first.")
+            return False
+        if current_tab.pager is not None:
+            messagebox.showinfo("Read-only", "Files this large are opened read-only.")
+            return False
+
+        if current_tab.current_file_path:
+            request = self.save_tab(current_tab)
+            if wait:
+                return self.wait_for_save(request)
+            return True
+        else:
+            return self.save_file_as(wait=wait)
+
+    def save_tab(self, tab_info):
+        """
+        Snapshots a tab's text and queues it for writing. The tab counts as unmodified from
+        here on; if the write fails, _collect_save_results() marks it modified again.
+        """
+        text_area = tab_info.text_area
+        with METRICS.timer("save"):
+            request = SaveRequest(tab_info, tab_info.current_file_path, text_area.get("1.0", "end-1c"))
+            tab_info.saving = request
+            text_area.edit_modified(False)
+            self.diff_worker.save_point(tab_info, request)
+            self.file_saver.submit(request)
+        self.set_status(f"Saving {request.file_path}...")
+        if self.save_poll_id is None:
+            self.save_poll_id = self.after(self.SAVE_POLL_INTERVAL, self._collect_save_results)
+        return request
+
+    def wait_for_save(self, request):
+        """Blocks until a queued save is written; returns whether it succeeded."""
+        request.done.wait()
+        self._collect_save_results(reschedule=False)
+        return request.error is None and not request.superseded
+
+    def save_all(self):
+        """
+        Saves every tab with unsaved changes. Tabs with a file are written concurrently;
+        Untitled ones ask for a file name one after the other.
+        """
+        untitled = []
+        for tab_info in self.tabs:
+            if tab_info.loader or not self.is_tab_modified(tab_info):
+                continue
+            if tab_info.current_file_path:
+                self.save_tab(tab_info)
+            else:
+                untitled.append(tab_info)
+        for tab_info in untitled:
+            self.select_tab(tab_info)
+            if not self.save_file_as():
+                break # Stop asking once the user cancels a dialog
+
+    def _collect_save_results(self, reschedule=True):
+        """Reports finished saves on the Tk thread and updates their tabs."""
+        for request in self.file_saver.collect():
+            tab_info = request.tab_info
+            if tab_info.saving is request:
+                tab_info.saving = None
+            if request.superseded:
+                continue # A newer snapshot of the same file is written instead
+            if request.error is not None:
+                self.set_status(f"Could not save {request.file_path}: {request.error}", error=True)
+                if tab_info in self.tabs and tab_info.saving is None: # Unless a newer save is on its way
+                    tab_info.text_area.edit_modified(True) # The text on disk is not this one
+                continue
+            self.set_status(f"Saved {request.file_path}")
+            self.mark_search_stale(request.file_path)
+            if tab_info.current_file_path == request.file_path:
+                tab_info.saved_digest = request.digest
+                self.diff_worker.saved(tab_info, request)
+                self.track_file(tab_info)
+            if tab_info.saving is None and tab_info in self.tabs and not tab_info.text_area.edit_modified():
+                self.discard_journal(tab_info)
+            elif tab_info.journal is not None and tab_info.journal.header.get('file') == request.file_path:
+                # Edited while the save was being written: the journal's base is the file as it was
+                # before, which replay would now reject
+                self.restart_journal(tab_info)
+        if not reschedule:
+            return
+        if self.file_saver.is_idle():
+            self.save_poll_id = None
+        else:
+            self.save_poll_id = self.after(self.SAVE_POLL_INTERVAL, self._collect_save_results)
+
+    def set_status(self, message, error=False):
+        """Shows a message in the status bar."""
+        self.status_bar.config(text=message, fg="#c0392b" if error else "black")
+
+    def save_file_as(self, wait=False):
+        """
+        Saves the current content of the active tab to a new file path chosen by the user.
+        Returns False if the dialog was cancelled (or, when waiting, the save failed).
+        """
+        current_tab = self.get_current_tab_info()
+        if not current_tab:
+            return False
+        if current_tab.loader:
+            messagebox.showerror("Error", "The file is still loading. Wait for it to finish or cancel loading first.")
+            return False
+        if current_tab.pager is not None:
+            messagebox.showinfo("Read-only", "Files this large are opened read-only.")
+            return False
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[
+                ("All Files", "*.*"),
+                ("Text Documents", "*.txt"),
+                ("Python Files", "*.py"),
+                ("HTML Files", "*.html"),
+                ("CSS Files", "*.css"),
+                ("JavaScript Files", "*.js")
+            ]
+        )
+        if file_path:
+            self.untrack_file(current_tab)
+            current_tab.current_file_path = file_path
+            current_tab.partial_of = None
+            self.set_file_type_for_tab(current_tab, file_path)
+            saved = self.save_file(wait=wait) # Call save_file to actually write the content
+            self.update_tab_label(current_tab) # Update tab title
+            self.update_title()
+            self.apply_syntax_highlighting_for_tab(current_tab)
+            self.index_tab(current_tab) # The file type may have changed
+            return saved
+        return False
+
+    def close_current_tab(self):
+        """Closes the currently active tab after prompting to save changes."""
+        current_tab_info = self.get_current_tab_info()
+        if not current_tab_info:
+            return
+
+        if self.confirm_save_changes_for_tab(current_tab_info):
+            self.dispose_tab(current_tab_info)
+            if not self.tabs: # If no tabs left, open a new empty one
+                self.add_new_tab()
+            self.update_title()
+
+    def dispose_tab(self, tab_info):
+        """Removes a tab without asking, stops everything working on it and destroys its widgets."""
+        self.notebook.forget(tab_info.frame)
+        self.tabs.remove(tab_info)
+        self.untrack_file(tab_info)
+        self.discard_journal(tab_info)
+        if tab_info in self.symbol_indexer:
+            self.symbol_indexer.forget(tab_info)
+        self.diff_worker.forget(tab_info)
+        if tab_info.loader is not None:
+            self.after_cancel(tab_info.loader.after_id)
+            tab_info.loader.close()
+            tab_info.loader = None
+        if tab_info.pager is not None:
+            tab_info.pager.close()
+        if tab_info.follower is not None:
+            tab_info.follower.close()
+        if tab_info.highlighter is not None and tab_info.highlighter.after_id is not None:
+            self.after_cancel(tab_info.highlighter.after_id)
+            tab_info.highlighter.after_id = None
+        if tab_info.gutter is not None:
+            tab_info.gutter.close()
+        tab_info.frame.destroy() # Also destroys the text widget, its gutter canvas and scrollbars
+
+
+    def is_tab_modified(self, tab_info):
+        """
+        Tells whether a tab has unsaved changes, without touching the disk.
+        Unedited tabs are answered from the Text widget's modified flag; edited ones are
+        compared against the digest taken at load/save, so undoing back to the saved text
+        counts as unmodified again.
+        """
+        text_area = tab_info.text_area
+        if text_area is None or not text_area.edit_modified(): # Placeholders are never modified
+            return False
+        if tab_info.saved_digest is not None and content_digest(text_area.get("1.0", "end-1c")) == tab_info.saved_digest:
+            text_area.edit_modified(False)
+            return False
+        return True
+
+    def _on_modified_flag_change(self, tab_info):
+        """
+        Keeps the unsaved-changes marker on the tab label in sync with the modified flag,
+        and drops the recovery journal once the tab matches its file again.
+        """
+        if not tab_info.loader: # The label shows the load progress meanwhile
+            self.update_tab_label(tab_info)
+        if not tab_info.saving and not tab_info.text_area.edit_modified(): # Saves drop it once written
+            self.discard_journal(tab_info)
+
+    def update_tab_label(self, tab_info):
+        """Shows the tab's file name, prefixed with '*' while it has unsaved changes."""
+        if tab_info.current_file_path:
+            label = tab_info.current_file_path.split('/')[-1]
+        elif tab_info.partial_of:
+            label = f"{tab_info.partial_of} (partial)"
+        else:
+            label = "Untitled"
+        if tab_info.text_area.edit_modified():
+            label = "*" + label
+        self.notebook.tab(tab_info.frame, text=label)
+
+    def confirm_save_changes_for_tab(self, tab_info):
+        """
+        Checks if a specific tab has unsaved changes (see is_tab_modified).
+        If so, it prompts the user to save changes for that tab.
+        Returns True if it's safe to proceed (either saved or user chose not to save),
+        False if the operation should be cancelled.
+        """
+        if tab_info.loader:
+            # The tab only holds part of the file; it only counts as modified if the user typed into it
+            self._finish_streaming_load(tab_info, completed=False)
+        if tab_info.saving:
+            # A save still in progress clears the modified flag early; wait to see if it worked
+            self.wait_for_save(tab_info.saving)
+
+        if self.is_tab_modified(tab_info):
+            response = messagebox.askyesnocancel(
+                "Save Changes",
+                f"Do you want to save changes to {'Untitled' if tab_info.current_file_path is None else tab_info.current_file_path.split('/')[-1]}?"
+            )
+            if response is True:  # Yes
+                # Activate the tab to ensure save_file operates on the correct one
+                self.select_tab(tab_info)
+                return self.save_file(wait=True) # Keep the tab if the save failed or was cancelled
+            elif response is False:  # No
+                return True
+            else:  # Cancel
+                return False
+        return True # No unsaved changes
+
+    def on_closing(self):
+        """
+        Handles the window closing event, prompting to save unsaved changes for all tabs.
+        """
+        self.save_session() # Before the prompts, which may detach tabs from partially loaded files
+        # Iterating the registry goes over a copy, so tabs might be removed during the loop
+        for tab_info in self.tabs:
+            if not tab_info.loader and not tab_info.saving and not self.is_tab_modified(tab_info):
+                continue # Nothing to ask about; no need to show the tab
+            # Temporarily select the tab to ensure confirm_save_changes_for_tab operates on the correct one
+            self.select_tab(tab_info)
+            if not self.confirm_save_changes_for_tab(tab_info):
+                return # If user cancels saving for any tab, stop closing
+        if self.search_executor is not None:
+            self.search_executor.shutdown(wait=False, cancel_futures=True)
+        self.read_pool.shutdown(wait=False, cancel_futures=True)
+        self.file_watcher.stop()
+        self.journal_writer.close(discard_all=True) # Whatever is unsaved now, the user chose not to save
+        self.destroy() # Close the application
+
+    def update_title(self):
+        """Updates the main window title based on the active tab."""
+        current_tab = self.get_current_tab_info()
+        if current_tab:
+            file_name = "Untitled"
+            if current_tab.current_file_path:
+                file_name = current_tab.current_file_path.split('/')[-1]
+            self.title(f"Breeze Code Editor - {file_name}")
+        else:
+            self.title("Breeze Code Editor")
+
+    def show_about_info(self):
+        """
+        Displays a simple 'About' message box.
+        """
+        messagebox.showinfo("About", "Breeze Code Editor\nVersion 1.0\nCreated by Mahendra.uk")
+
+    # --- Startup and Other Launches ---
+    def _on_first_paint(self, event):
+        """Records the startup time once the window is first drawn and starts the deferred work."""
+        self.unbind("<Expose>")
+        self.first_paint_ms = (time.perf_counter() - STARTED_AT) * 1000
+        METRICS.record("startup.first_paint", self.first_paint_ms)
+        if self.report_startup:
+            print(f"{self.first_paint_ms:.1f}", flush=True)
+            self.after_idle(self.destroy)
+            return
+        self.after_idle(self._after_first_paint)
+
+    def _after_first_paint(self):
+        self.offer_recovery()
+        self._finish_opening()
+        if self.instance_server is not None:
+            self.after(self.INSTANCE_POLL_INTERVAL, self._poll_instance_requests)
+
+    def open_targets(self, targets):
+        """
+        Opens (path, line) targets in tabs, in order. The files are read in parallel on
+        read_pool; they are put in tabs as they come in (after the first paint at startup).
+        A path that does not exist opens as an empty tab that saving creates.
+        """
+        for path, line in targets:
+            self.pending_opens.append((path, line, self.read_pool.submit(read_for_tab, path, self.streaming_threshold)))
+        if self.first_paint_ms is not None and self.open_poll_id is None:
+            self._finish_opening()
+
+    def _finish_opening(self):
+        """Puts the files read so far into tabs, keeping the order they were asked for."""
+        self.open_poll_id = None
+        while self.pending_opens and self.pending_opens[0][2].done():
+            path, line, future = self.pending_opens.pop(0)
+            tab_info = self.tabs.find_file(path)
+            if tab_info is None:
+                try:
+                    content = future.result()
+                except FileNotFoundError:
+                    content = ""
+                except Exception as e:
+                    self.set_status(f"Could not open {path}: {e}", error=True)
+                    continue
+                if content is None: # Large: streamed in or paged
+                    tab_info = self.open_path(path)
+                else:
+                    tab_info = self.add_new_tab(file_path=path, content=content)
+                    self.track_file(tab_info)
+                if tab_info is None:
+                    continue
+            self.select_tab(tab_info)
+            if line:
+                self.show_line(tab_info, line)
+        if self.pending_opens:
+            self.open_poll_id = self.after(10, self._finish_opening)
+        elif not self.tabs:
+            self.add_new_tab() # Nothing could be opened
+
+    def _poll_instance_requests(self):
+        """Opens the files that later launches handed over, and brings the window to the front (also for none)."""
+        requests = self.instance_server.collect()
+        for targets in requests:
+            self.open_targets(targets)
+        if requests:
+            self.deiconify()
+            self.lift()
+            self.focus_force()
+        self.after(self.INSTANCE_POLL_INTERVAL, self._poll_instance_requests)
+
+    # --- Crash Recovery ---
+    def journal_for(self, tab_info):
+        """
+        The journal an edit of the tab is about to be recorded in, started if needed, or
+        None for edits that are not journaled. Called before the edit is made, since a
+        new journal's base is the text as it is now.
+        """
+        if self.journal_paused or tab_info.loader or tab_info.pager is not None:
+            return None
+        if tab_info.journal is None:
+            text_area = tab_info.text_area
+            if not text_area.edit_modified() and tab_info.current_file_path and tab_info.saved_digest:
+                base = {'file': tab_info.current_file_path, 'digest': tab_info.saved_digest.hex()}
+            elif not text_area.edit_modified() and tab_info.saved_digest == EMPTY_DIGEST:
+                base = {'text': ""}
+            else: # Rare (e.g. after a failed save): copy the text
+                base = {'text': text_area.get("1.0", "end-1c")}
+            self.start_journal(tab_info, base)
+        return tab_info.journal
+
+    def start_journal(self, tab_info, base):
+        tab_info.journal = journal.Journal(tab_info.current_file_path, self.notebook.tab(tab_info.frame, "text").lstrip("*"), base)
+        self.journal_writer.add(tab_info.journal)
+
+    def journal_edit(self, tab_info, tab_journal, args, positions):
+        """Records an insert, delete or replace that was just made, with its indices from before it."""
+        if tab_journal.stale: # Its file base is gone: start over from the text, which includes this edit
+            self.restart_journal(tab_info)
+            return
+        record = self.journal_writer.record
+        if args[0] == "insert":
+            record(tab_journal, ["i", positions[0], "".join(args[2::2])]) # insert index chars ?tags chars tags...?
+        elif args[0] == "replace":
+            record(tab_journal, ["d", positions[0], positions[1]])
+            record(tab_journal, ["i", positions[0], "".join(args[3::2])])
+        elif len(positions) <= 2:
+            record(tab_journal, ["d", positions[0], positions[1] if len(positions) == 2 else None])
+        else: # Several ranges at once (never done by the editor itself): start over from a copy
+            self.discard_journal(tab_info)
+            self.start_journal(tab_info, {'text': tab_info.text_area.get("1.0", "end-1c")})
+
+    def restart_journal(self, tab_info):
+        """
+        Starts the tab's journal over from a copy of its text, for when the file its base
+        refers to changed or is gone (replay would reject that base).
+        """
+        if tab_info.pager is not None or tab_info.loader:
+            return
+        self.discard_journal(tab_info)
+        self.start_journal(tab_info, {'text': tab_info.text_area.get("1.0", "end-1c")})
+
+    def discard_journal(self, tab_info):
+        if tab_info.journal is not None:
+            self.journal_writer.discard(tab_info.journal)
+            tab_info.journal = None
+
+    def offer_recovery(self):
+        """Offers the unsaved edits left behind by an editor that crashed, as new tabs."""
+        recovered = journal.recover(RECOVERY_DIR)
+        if recovered:
+            names = "\n".join(path or name for path, name, _ in recovered)
+            if messagebox.askyesno("Recover Unsaved Changes", f"Breeze Code did not exit cleanly. Recover the unsaved changes of these tabs?\n\n{names}"):
+                for path, name, text in recovered:
+                    self.recover_tab(path, name, text)
+        if self.journal_writer.flush(): # Only once the recovered text is journaled again
+            journal.remove_orphans(RECOVERY_DIR)
+
+    def recover_tab(self, file_path, name, text):
+        """Opens recovered text in a tab, replacing an unedited tab of the same file."""
+        for tab_info in self.tabs.with_file(file_path) if file_path else []:
+            if not self.is_tab_modified(tab_info):
+                self.dispose_tab(tab_info)
+        tab_info = self.add_new_tab(file_path=file_path, content=text)
+        if not file_path and name and name != "Untitled":
+            tab_info.partial_of = name.replace(" (partial)", "")
+        tab_info.saved_digest = None # Whatever is on disk, this text is not saved
+        if file_path:
+            try:
+                tab_info.saved_digest = file_digest(file_path)
+            except (OSError, ValueError):
+                pass
+            self.diff_worker.load_base_file(tab_info, file_path) # Marks what the recovered text changed
+            self.track_file(tab_info)
+        tab_info.text_area.edit_modified(True)
+        self.update_tab_label(tab_info)
+        self.start_journal(tab_info, {'text': text})
+
+    # --- External Changes ---
+    WATCH_INTERVAL = 500 # ms between checks for changes found by the file watcher
+
+    def track_file(self, tab_info):
+        """Tells the file watcher that the tab now holds what is on disk."""
+        if tab_info.current_file_path:
+            self.file_watcher.track(tab_info.current_file_path, None if tab_info.pager is not None else tab_info.saved_digest)
+
+    def untrack_file(self, tab_info):
+        """Stops watching the tab's file, unless another tab shows it too."""
+        file_path = tab_info.current_file_path
+        if file_path and not [tab for tab in self.tabs.with_file(file_path) if tab is not tab_info]:
+            self.file_watcher.untrack(file_path)
+
+    def _collect_file_changes(self):
+        """Handles files changed by other programs: clean tabs reload, dirty ones ask."""
+        self.file_changes += self.file_watcher.collect()
+        while self.file_changes and not self.resolving_conflict: # A prompt runs a nested event loop
+            change = self.file_changes.pop(0)
+            self.mark_search_stale(change.file_path)
+            for tab_info in self.tabs.with_file(change.file_path):
+                self._handle_file_change(tab_info, change)
+        self.after(self.WATCH_INTERVAL, self._collect_file_changes)
+
+    def _handle_file_change(self, tab_info, change):
+        file_path = tab_info.current_file_path
+        if tab_info.text_area is None or tab_info.loader or tab_info.follower is not None or tab_info.saving:
+            return # Not read yet, being read, following the file anyway, or our own save
+        if change.digest is not None and change.digest == tab_info.saved_digest:
+            return # Already up to date (a save of ours that finished meanwhile)
+        if change.deleted and tab_info.pager is not None:
+            # Read-only: there is nothing to save, and the mapping keeps the old contents readable
+            self.set_status(f"{file_path} was deleted or moved by another program; the tab shows it as it was", error=True)
+            return
+        if change.deleted:
+            tab_info.saved_digest = None # Nothing on disk matches the text now, so it stays unsaved
+            tab_info.text_area.edit_modified(True) # Closing should offer to save it again
+            self.update_tab_label(tab_info)
+            self.restart_journal(tab_info) # The tab holds the only copy
+            self.set_status(f"{file_path} was deleted or moved by another program", error=True)
+            return
+        if tab_info.pager is not None:
+            self.reload_tab(tab_info)
+            return
+        if self.is_tab_modified(tab_info):
+            self.select_tab(tab_info)
+            self.resolving_conflict = True
+            try:
+                reload = messagebox.askyesno(
+                    "File Changed",
+                    f"{file_path} was changed by another program, and this tab has unsaved changes.\n\n"
+                    "Reload it and lose your changes? Choose No to keep your version; saving it will overwrite the file."
+                )
+            finally:
+                self.resolving_conflict = False
+            if tab_info not in self.tabs:
+                return
+            if not reload:
+                tab_info.saved_digest = None # Even undoing back to the old text differs from the file now
+                self.update_tab_label(tab_info)
+                self.restart_journal(tab_info)
+                return
+        self.reload_tab(tab_info)
+
+    def reload_tab(self, tab_info):
+        """Reads a tab's file again, keeping the cursor and scroll position."""
+        file_path = tab_info.current_file_path
+        text_area = tab_info.text_area
+        try:
+            if tab_info.pager is not None:
+                tab_info.pager.request_refresh() # Appended lines are indexed from where the index ends
+                self.track_file(tab_info)
+                return
+            view = {'cursor': text_area.index("insert"), 'top': text_area.index("@0,0")}
+            if os.path.getsize(file_path) >= self.streaming_threshold:
+                stream = FileStream(file_path)
+                self.journal_paused = True
+                text_area.delete("1.0", tk.END)
+                self.journal_paused = False
+                self.discard_journal(tab_info)
+                tab_info.restore = view
+                self._start_streaming_load(tab_info, stream) # Tracked again once it is in
+                return
+            with open(file_path, "r", encoding="utf-8") as file:
+                content = file.read()
+        except Exception as e:
+            self.set_status(f"Could not reload {file_path}: {e}", error=True)
+            return
+        self.journal_paused = True # The file is the new base
+        text_area.delete("1.0", tk.END)
+        text_area.insert("1.0", content)
+        self.journal_paused = False
+        self.discard_journal(tab_info)
+        text_area.edit_reset()
+        text_area.edit_modified(False)
+        tab_info.saved_digest = content_digest(content)
+        self.start_diffing(tab_info) # Also picks up a tab that was too large to diff before
+        self.apply_syntax_highlighting_for_tab(tab_info, content)
+        self.restore_view(tab_info, view)
+        self.track_file(tab_info)
+        self.update_tab_label(tab_info)
+        self.set_status(f"Reloaded {file_path}, which was changed by another program")
+
+    # --- Follow Mode ---
+    FOLLOW_INTERVAL = 200 # ms between checks of followed files
+    FOLLOW_CATCH_UP = 10 # ms until the next check while a file has more to read
+
+    def toggle_follow(self):
+        """Turns follow mode of the active tab on or off (File > Follow File)."""
+        current_tab = self.get_current_tab_info()
+        if not current_tab:
+            return
+        if not self.follow_var.get():
+            self.stop_following(current_tab)
+            return
+        reason = None
+        if not current_tab.current_file_path:
+            reason = "Save the tab to a file first."
+        elif current_tab.loader or current_tab.pager is not None:
+            reason = "Files that are loading or open read-only cannot be followed."
+        if reason is None:
+            try:
+                current_tab.follower = FileFollower(current_tab.current_file_path)
+            except OSError as e:
+                reason = f"Could not open file: {e}"
+        if reason is not None:
+            messagebox.showinfo("Follow File", reason)
+            self.follow_var.set(False)
+            return
+        # Kept up to date over the appended text, so the tab stays recognizably unsaved or not
+        current_tab.follower.text_digest = content_hasher(current_tab.text_area.get("1.0", "end-1c")) if not self.is_tab_modified(current_tab) else None
+        self.stop_diffing(current_tab) # Everything appended is on disk anyway, and logs grow without bound
+        current_tab.text_area.see("end-1c")
+        self.set_status(f"Following {current_tab.current_file_path}")
+        if self.follow_poll_id is None:
+            self.follow_poll_id = self.after(self.FOLLOW_INTERVAL, self._poll_followed_files)
+
+    def stop_following(self, tab_info, message=None):
+        if tab_info.follower is None:
+            return
+        tab_info.follower.close()
+        tab_info.follower = None
+        if tab_info in self.tabs:
+            self.start_diffing(tab_info)
+        if tab_info is self.tabs.current():
+            self.follow_var.set(False)
+        if message:
+            self.set_status(message, error=True)
+
+    def _poll_followed_files(self):
+        """Appends what was written to every followed file since the last check."""
+        self.follow_poll_id = None
+        behind = False
+        following = False
+        for tab_info in self.tabs:
+            if tab_info.follower is None:
+                continue
+            with METRICS.timer("follow"):
+                self._follow(tab_info)
+            if tab_info.follower is not None:
+                following = True
+                behind = behind or tab_info.follower.behind
+        if following:
+            self.follow_poll_id = self.after(self.FOLLOW_CATCH_UP if behind else self.FOLLOW_INTERVAL, self._poll_followed_files)
+
+    def _follow(self, tab_info):
+        """
+        Appends one batch of new text to a followed tab. Appends are not undoable and
+        leave a tab without unsaved changes unmodified. The view stays at the bottom
+        unless the user scrolled away from it.
+        """
+        follower = tab_info.follower
+        try:
+            reset, text = follower.poll()
+        except OSError as e:
+            self.stop_following(tab_info, f"Stopped following {follower.file_path}: {e}")
+            return
+        if not text and not reset:
+            return
+        text_area = tab_info.text_area
+        clean = not self.is_tab_modified(tab_info)
+        if reset and not clean:
+            self.stop_following(tab_info, f"{follower.file_path} was truncated or replaced; stopped following because the tab has unsaved changes")
+            return
+        pinned = text_area.yview()[1] >= 1.0
+        self.journal_paused = clean # A clean tab has no journal to keep up to date
+        text_area.config(undo=False)
+        if reset:
+            text_area.delete("1.0", tk.END)
+            text_area.edit_reset() # The undo history refers to text that is gone
+            self.set_status(f"{follower.file_path} was truncated or replaced; following it from the start")
+        text_area.insert("end-1c", text)
+        self.journal_paused = False
+        text_area.config(undo=True)
+        if clean:
+            text_area.edit_modified(False)
+            if reset:
+                follower.text_digest = content_hasher()
+            if follower.text_digest is not None: # Else unknown until the next reset
+                follower.text_digest.update(text.encode("utf-8", "surrogatepass"))
+                tab_info.saved_digest = follower.text_digest.digest()
+            else:
+                tab_info.saved_digest = None
+        else:
+            follower.text_digest = None # The buffer no longer tells what the file holds
+            tab_info.saved_digest = None # And the file no longer holds the text last saved
+        if pinned:
+            text_area.see("end-1c")
+
+    # --- Find / Replace ---
+    def show_find_dialog(self, scope=None):
+        """Opens (or raises) the Find / Replace window."""
+        if self.find_dialog is None:
+            self.find_dialog = FindDialog(self)
+        else:
+            self.find_dialog.deiconify()
+            self.find_dialog.lift()
+        if scope:
+            self.find_dialog.scope_var.set(scope)
+        current_tab = self.get_current_tab_info()
+        if current_tab and current_tab.text_area.tag_ranges("sel"):
+            selected = current_tab.text_area.get("sel.first", "sel.last")
+            if "\n" not in selected:
+                self.find_dialog.find_var.set(selected)
+
+    def search_pool(self):
+        """
+        Returns (executor, workers) of the process pool used for directory searches and
+        symbol indexing, starting it on first use. Worker processes are spawned rather
+        than forked: this process runs threads. Called from symbol walker threads too.
+        """
+        with self.search_pool_lock:
+            if self.search_executor is None:
+                workers = os.cpu_count() or 2
+                import multiprocessing # Deferred until the first directory search: slow to import
+                from concurrent.futures import ProcessPoolExecutor
+                self.search_executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+                self.search_workers = workers
+        return self.search_executor, self.search_workers
+
+    def mark_search_stale(self, file_path):
+        """Tells the trigram indexes that a file was written, so the next indexed search reads it again."""
+        for index in self.search_indexes.values():
+            index.mark_stale(file_path)
+
+    def search_index_for(self, root):
+        """Returns the trigram index of a directory tree, kept for the rest of the session."""
+        if root not in self.search_indexes:
+            self.search_indexes[root] = search.TrigramIndex(root)
+        return self.search_indexes[root]
+
+    # --- Symbols: Outline, Go to Symbol, Quick Open ---
+    SYMBOL_POLL_INTERVAL = 300 # ms between checks for updated symbols
+
+    def index_tab(self, tab_info, content=None):
+        """(Re)indexes the symbols of a tab whose text or file type was replaced; edits are picked up by the proxy."""
+        if tab_info.pager is None and symbols.indexable(tab_info.file_type):
+            text = content if content is not None else tab_info.text_area.get("1.0", "end-1c")
+            self.symbol_indexer.open_text(tab_info, tab_info.file_type, text)
+        elif tab_info in self.symbol_indexer:
+            self.symbol_indexer.forget(tab_info)
+
+    def symbol_roots(self):
+        """The directory trees Quick Open covers: the projects of the open files, else the working directory."""
+        roots = {symbols.project_root(tab.current_file_path) for tab in self.tabs if tab.current_file_path}
+        return sorted(roots) or [os.getcwd()]
+
+    def symbol_directories(self):
+        """The symbols.DirectorySymbols of symbol_roots() indexed so far."""
+        directories = [self.symbol_indexer.directory(root) for root in self.symbol_roots()]
+        return [directory for directory in directories if directory is not None]
+
+    def show_quick_open(self, query=""):
+        """Opens the fuzzy finder; "@" starts it on the symbols of the open tabs (Go to Symbol)."""
+        # Changed files are read and lexed on the process pool, away from the Tk thread; the
+        # pool is only started if a walk finds enough of them (not when the cache is current)
+        for root in self.symbol_roots():
+            self.symbol_indexer.index_directory(root, lambda: self.search_pool()[0]) # Catches up with changes on disk
+        if self.quick_open_dialog is None:
+            self.quick_open_dialog = QuickOpenDialog(self)
+        self.quick_open_dialog.show(query)
+
+    def toggle_outline(self):
+        """Shows or hides the symbols of the active tab next to the editor (View > Outline)."""
+        if not self.outline_var.get():
+            self.outline_frame.grid_remove()
+            return
+        if self.outline_frame is None:
+            self.outline_frame = tk.Frame(self)
+            self.outline_tree = ttk.Treeview(self.outline_frame, show="tree", selectmode="browse")
+            scrollbar = tk.Scrollbar(self.outline_frame, command=self.outline_tree.yview)
+            self.outline_tree.config(yscrollcommand=scrollbar.set)
+            self.outline_tree.grid(row=0, column=0, sticky="nsew")
+            scrollbar.grid(row=0, column=1, sticky="ns")
+            self.outline_frame.grid_rowconfigure(0, weight=1)
+            self.outline_tree.bind("<<TreeviewSelect>>", lambda event: self._on_outline_select())
+        self.outline_frame.grid(row=0, column=1, sticky="ns", pady=5)
+        self.refresh_outline()
+
+    def refresh_outline(self):
+        """Fills the outline with the active tab's symbols, nested by indentation."""
+        tree = self.outline_tree
+        tree.delete(*tree.get_children())
+        self.outline_lines = {}
+        current_tab = self.tabs.current()
+        if current_tab is None:
+            return
+        parents = [] # (indent, item) of the enclosing symbols
+        for name, kind, line, indent in self.symbol_indexer.symbols(current_tab)[:self.OUTLINE_LIMIT]:
+            while parents and parents[-1][0] >= indent:
+                parents.pop()
+            item = tree.insert(parents[-1][1] if parents else "", tk.END, text=f"{name}  ({kind})", open=True)
+            self.outline_lines[item] = line
+            parents.append((indent, item))
+
+    OUTLINE_LIMIT = 5000 # Symbols shown; building the tree gets slow beyond
+
+    def _on_outline_select(self):
+        selection = self.outline_tree.selection()
+        current_tab = self.get_current_tab_info()
+        if selection and current_tab and selection[0] in self.outline_lines:
+            self.show_line(current_tab, self.outline_lines[selection[0]])
+
+    def _collect_symbol_changes(self):
+        """Updates the outline and the Quick Open list when the symbol index changed."""
+        changed = self.symbol_indexer.collect()
+        if changed:
+            if self.outline_var.get() and self.tabs.current() in changed:
+                self.refresh_outline()
+            dialog = self.quick_open_dialog
+            if dialog is not None and dialog.winfo_viewable():
+                dialog.refresh()
+        self.after(self.SYMBOL_POLL_INTERVAL, self._collect_symbol_changes)
+
+    # --- Changes Since Save ---
+    DIFF_POLL_INTERVAL = 100 # ms between checks for updated diffs
+
+    def start_diffing(self, tab_info):
+        """
+        Tracks a tab in the diff worker again, with its file as the base if it has unsaved
+        changes. Texts of streaming_threshold or more are not diffed: the worker would
+        hold a copy of every line, and another for each save in flight.
+        """
+        content = tab_info.text_area.get("1.0", "end-1c")
+        if len(content) >= self.streaming_threshold:
+            return
+        self.diff_worker.load(tab_info, content)
+        if self.is_tab_modified(tab_info) and tab_info.current_file_path:
+            self.diff_worker.load_base_file(tab_info, tab_info.current_file_path)
+
+    def stop_diffing(self, tab_info):
+        """Drops a tab's diff and clears its change markers."""
+        self.diff_worker.forget(tab_info)
+        if tab_info.gutter is not None:
+            tab_info.gutter.set_changes(None)
+
+    def _collect_diff_changes(self):
+        """Hands updated diffs to the gutters; tabs without a file have nothing to diff against."""
+        for tab_info in self.diff_worker.collect():
+            if tab_info in self.tabs and tab_info.gutter is not None:
+                tracked = tab_info in self.diff_worker and tab_info.current_file_path
+                tab_info.gutter.set_changes(self.diff_worker.changes(tab_info) if tracked else None)
+        self.after(self.DIFF_POLL_INTERVAL, self._collect_diff_changes)
+
+    def current_changes(self):
+        """The active tab and its up-to-date diffing.Changes, or (tab, None) if it has none."""
+        current_tab = self.get_current_tab_info()
+        if not current_tab or current_tab not in self.diff_worker or not current_tab.current_file_path:
+            return current_tab, None
+        return current_tab, self.diff_worker.flush(current_tab) # Includes the last keystrokes
+
+    def next_change(self):
+        """Moves the cursor to the next changed line of the active tab, wrapping around at the end."""
+        current_tab, changes = self.current_changes()
+        if not changes:
+            self.set_status("No changes since the file was saved")
+            return
+        line = int(current_tab.text_area.index("insert").split('.')[0])
+        hunk = changes.next_after(line)
+        self.show_line(current_tab, changes.line_of(hunk))
+        current_tab.text_area.focus_set()
+        self.set_status(f"Change {changes.hunks.index(hunk) + 1} of {len(changes)}")
+
+    def revert_change(self):
+        """Puts back the saved text of the change at the cursor (one undoable edit)."""
+        current_tab, changes = self.current_changes()
+        if not changes:
+            self.set_status("No changes since the file was saved")
+            return
+        text_area = current_tab.text_area
+        hunk = changes.hunk_at(int(text_area.index("insert").split('.')[0]))
+        if hunk is None:
+            self.set_status("There is no change at the cursor; use Edit -> Next Change to find one")
+            return
+        start, end, base_start, base_end = hunk
+        saved = "\n".join(changes.base_lines[base_start:base_end])
+        line_count = int(text_area.index("end-1c").split('.')[0])
+        text_area.edit_separator()
+        if start == end: # Removed lines: insert them again
+            if start < line_count:
+                text_area.insert(f"{start + 1}.0", saved + "\n")
+            else:
+                text_area.insert("end-1c", "\n" + saved)
+        elif base_start == base_end: # Added lines: delete them with their line break
+            if end < line_count:
+                text_area.delete(f"{start + 1}.0", f"{end + 1}.0")
+            else:
+                text_area.delete(f"{start}.0 lineend", "end-1c")
+        else:
+            text_area.replace(f"{start + 1}.0", f"{end}.0 lineend", saved)
+        text_area.edit_separator()
+        text_area.mark_set("insert", f"{max(start, 0) + 1}.0")
+        text_area.see("insert")
+        self.set_status(f"Reverted the change at line {changes.line_of(hunk)}")
+
+    # --- Performance Instrumentation ---
+    PERF_OVERLAY_INTERVAL = 500 # ms between overlay refreshes
+    PERF_OVERLAY_METRICS = [("edit", "edit"), ("highlight.latency", "highlight"), ("line_numbers", "gutter"), ("ui.lag", "event loop lag")]
+
+    def toggle_perf_overlay(self):
+        """Shows or hides the line with p50/p99 latencies of the hot paths."""
+        if self.perf_overlay_var.get():
+            self.perf_label.grid(row=2, column=0, columnspan=2, sticky="ew")
+            self.perf_tick = None
+            self._refresh_perf_overlay()
+        else:
+            self.perf_label.grid_remove()
+            if self.perf_overlay_id is not None:
+                self.after_cancel(self.perf_overlay_id)
+                self.perf_overlay_id = None
+
+    def _refresh_perf_overlay(self):
+        """Updates the overlay; how late this callback runs is recorded as event loop lag."""
+        now = time.perf_counter()
+        if self.perf_tick is not None:
+            METRICS.record("ui.lag", max(0.0, (now - self.perf_tick) * 1000 - self.PERF_OVERLAY_INTERVAL))
+        self.perf_tick = now
+        parts = []
+        for name, label in self.PERF_OVERLAY_METRICS:
+            summary = METRICS.summary(name)
+            if summary["count"]:
+                parts.append(f"{label} p50 {summary['p50']:.1f} / p99 {summary['p99']:.1f} ms")
+        self.perf_label.config(text="  |  ".join(parts) or "No samples yet")
+        self.perf_overlay_id = self.after(self.PERF_OVERLAY_INTERVAL, self._refresh_perf_overlay)
+
+    def toggle_profiling(self):
+        """Starts or stops a cProfile + tracemalloc capture; the result goes into the exported report."""
+        if self.profiling_var.get():
+            self.profile_capture.start()
+            self.set_status("Profiling... use Help > Profile Session again to stop.")
+        else:
+            result = self.profile_capture.stop()
+            self.set_status(f"Profile captured ({result['duration_s']:.1f} s). Use Help > Export Performance Report to save it.")
+
+    def export_performance_report(self):
+        """Writes the timing histograms, the last profile and per-pattern costs to a JSON file."""
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")])
+        if not file_path:
+            return
+        if self.profile_capture.active:
+            self.profiling_var.set(False)
+            self.toggle_profiling()
+        extra = {"open_tabs": len(self.tabs), "token_cache": self.token_cache.stats()}
+        current_tab = self.get_current_tab_info()
+        if current_tab and lexer_for(current_tab.file_type):
+            # Each rule on its own, over (the start of) the active buffer
+            lines = current_tab.highlighter.view.get_lines(1, min(current_tab.highlighter.line_count(), 2000))
+            extra["pattern_costs"] = {current_tab.file_type: pattern_costs(current_tab.file_type, lines)}
+        try:
+            write_file_atomically(file_path, json.dumps(build_report(METRICS, self.profile_capture, extra), indent=2))
+            self.set_status(f"Performance report written to {file_path}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not write report: {e}")
+
+    def show_cache_stats(self):
+        """
+        Displays the hit/miss counters of the syntax highlighting token cache.
+        """
+        stats = self.token_cache.stats()
+        messagebox.showinfo(
+            "Highlight Cache",
+            f"Hits: {stats['hits']}\nMisses: {stats['misses']}\nHit rate: {stats['hit_rate']:.0%}\n"
+            f"Cached files in memory: {stats['entries']} ({stats['lines']} lines)"
+        )
+
+    # --- Line Number Functions (adapted for tabs) ---
+    def _on_text_area_scroll(self, scrollbar, highlighter, gutter, first, last):
+        """
+        Keeps the scrollbar and line numbers in sync and, for lazily highlighted buffers,
+        schedules the lines that scrolled into view to be highlighted.
+        """
+        scrollbar.set(first, last)
+        gutter.redraw() # The view is already updated when Tk calls yscrollcommand
+        if highlighter.is_lazy():
+            self.schedule_highlight(highlighter)
+
+    def _on_mouse_wheel(self, event, text_area):
+        """
+        Handle mouse wheel scrolling for a specific tab; the line numbers follow through yscrollcommand.
+        """
+        text_area.yview_scroll(-1 * (event.delta // 120), "units")
+        return "break" # Prevent default scroll behavior for Mac/Linux
+
+    def update_line_numbers_for_tab(self, tab_info):
+        """
+        Updates the line numbers displayed in the line_numbers canvas for a specific tab.
+        Cheap when nothing moved; see LineNumberGutter.
+        """
+        tab_info.gutter.redraw()
+
+    # --- Syntax Highlighting Functions (adapted for tabs) ---
+    def configure_syntax_highlighting(self, text_widget):
+        """
+        Configures the text area tags for different syntax elements.
+        This method should be called for each new text_area. The patterns that produce
+        these tags live in HIGHLIGHT_RULES (highlighting.py).
+        """
+        # Define a base font for syntax highlighting
+        base_font = ("Consolas", 11)
+
+        # Python
+        text_widget.tag_configure("python_keyword", foreground="#c678dd", font=base_font)
+        text_widget.tag_configure("python_string", foreground="#98c379", font=base_font)
+        text_widget.tag_configure("python_comment", foreground="#5c6370", font=(base_font[0], base_font[1], "italic"))
+        text_widget.tag_configure("python_function", foreground="#61afef", font=base_font)
+        text_widget.tag_configure("python_class", foreground="#e6c07b", font=base_font)
+        text_widget.tag_configure("python_number", foreground="#d19a66", font=base_font)
+
+        # HTML
+        text_widget.tag_configure("html_tag", foreground="#e06c75", font=base_font)
+        text_widget.tag_configure("html_attribute", foreground="#d19a66", font=base_font)
+        text_widget.tag_configure("html_string", foreground="#98c379", font=base_font)
+        text_widget.tag_configure("html_comment", foreground="#5c6370", font=(base_font[0], base_font[1], "italic"))
+
+        # CSS
+        text_widget.tag_configure("css_property", foreground="#61afef", font=base_font)
+        text_widget.tag_configure("css_value", foreground="#98c379", font=base_font)
+        text_widget.tag_configure("css_selector", foreground="#e06c75", font=base_font)
+        text_widget.tag_configure("css_comment", foreground="#5c6370", font=(base_font[0], base_font[1], "italic"))
+
+        # JavaScript
+        text_widget.tag_configure("js_keyword", foreground="#c678dd", font=base_font)
+        text_widget.tag_configure("js_string", foreground="#98c379", font=base_font)
+        text_widget.tag_configure("js_comment", foreground="#5c6370", font=(base_font[0], base_font[1], "italic"))
+        text_widget.tag_configure("js_function", foreground="#61afef", font=base_font)
+        text_widget.tag_configure("js_number", foreground="#d19a66", font=base_font)
+        text_widget.tag_configure("js_variable", foreground="#e6c07b", font=base_font) # let, const, var
+
+    def set_file_type_for_tab(self, tab_info, file_path):
+        """Determines the file type for a specific tab based on its extension."""
+        tab_info.file_type = file_type_for(file_path)
+
+    def apply_syntax_highlighting_for_tab(self, tab_info, content=None):
+        """
+        Re-highlights the whole text area of a specific tab based on its detected file type.
+        Needed when the file type changes; edits are handled incrementally by the tab's highlighter.
+        Pass the text area's content when it is known to let the token cache answer instead.
+        """
+        highlighter = tab_info.highlighter
+        content_key = None
+        if content and lexer_for(tab_info.file_type) is not None:
+            content_key = TokenCache.key(tab_info.file_type, content)
+        highlighter.set_file_type(tab_info.file_type, content_key)
+        self.schedule_highlight(highlighter, delay=0)
+
+    def schedule_highlight(self, highlighter, delay=None):
+        """
+        Debounces highlight requests: the pass starts once no request came in for
+        highlight_delay ms, but never later than highlight_max_delay ms after the first.
+        """
+        delay = self.highlight_delay if delay is None else delay
+        now = time.monotonic()
+        if highlighter.after_id is not None:
+            if (now - highlighter.requested_at) * 1000 + delay >= self.highlight_max_delay:
+                return # Let the pending pass run; it will see this edit too
+            self.after_cancel(highlighter.after_id)
+        else:
+            highlighter.requested_at = now
+        highlighter.after_id = self.after(delay, self._submit_highlight, highlighter)
+
+    def _submit_highlight(self, highlighter):
+        """Snapshots what the highlighter needs and hands it to the worker thread."""
+        highlighter.after_id = None
+        if not highlighter.view.exists():
+            return
+        with METRICS.timer("highlight.prepare"):
+            job = highlighter.prepare()
+        if job is not None:
+            job.requested_at = highlighter.requested_at
+            self.highlight_worker.submit(job)
+            if self.highlight_poll_id is None:
+                self.highlight_poll_id = self.after(self.HIGHLIGHT_POLL_INTERVAL, self._collect_highlight_results)
+
+    def _collect_highlight_results(self):
+        """Applies finished highlight jobs on the Tk thread; stale ones are redone."""
+        for job in self.highlight_worker.collect():
+            highlighter = job.highlighter
+            METRICS.record(f"highlight.lex.{job.file_type}", job.run_ms)
+            if not highlighter.view.exists():
+                continue
+            with METRICS.timer("highlight.apply"):
+                applied = highlighter.apply(job)
+            if applied:
+                METRICS.record("highlight.latency", (time.monotonic() - job.requested_at) * 1000)
+            else:
+                self.schedule_highlight(highlighter, delay=0)
+        if self.highlight_worker.is_idle():
+            self.highlight_poll_id = None
+        else:
+            self.highlight_poll_id = self.after(self.HIGHLIGHT_POLL_INTERVAL, self._collect_highlight_results)
+
+
+def main(arguments):
+    """Runs the editor for the parsed command line (see instance.parse_arguments)."""
+    server = None if arguments.startup_time else instance.InstanceServer.start()
+    editor = CodeEditor(targets=arguments.targets, instance_server=server, report_startup=arguments.startup_time)
+    try:
+        editor.mainloop()
+    finally:
+        if server is not None:
+            server.close()
+
+
+if __name__ == "__main__":
+    main(ARGUMENTS)
\ No newline at end of file
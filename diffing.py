@@ -0,0 +1,326 @@
+"""
+Live diff of each tab against its saved file, for the change markers in the line
+number gutter. Nothing here needs Tk.
+
+A LineDiff keeps the lines of the saved file (the base) and of the tab's text, both
+with their hashes, and the hunks between them. Edits only mark the region they
+touched; diff() then re-diffs that region, widened to the hunks it overlaps, and
+shifts the hunks after it, so a keystroke in a large file costs about as much as
+the lines around it. The region itself is diffed on line hashes with difflib after
+trimming its common head and tail.
+
+A DiffWorker thread keeps a LineDiff per open tab, fed with the tab's edits in
+order, and re-diffs each one at most every DIFF_INTERVAL seconds. The Tk thread
+reads the result as an immutable Changes and only looks at the lines on screen.
+"""
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from difflib import SequenceMatcher
+
+from instrumentation import METRICS
+
+
+class Changes:
+    """
+    The hunks of one diff, as (start, end, base_start, base_end): lines start..end-1
+    of the text (0-based) replaced lines base_start..base_end-1 of the base. A hunk
+    with start == end is a removal, one with base_start == base_end an addition.
+    base_lines is the base itself, for reverting. Never changed once published.
+    """
+    def __init__(self, hunks, base_lines):
+        self.hunks = hunks
+        self.ends = [hunk[1] for hunk in hunks] # For bisect: hunks are sorted by start and end alike
+        self.base_lines = base_lines
+
+    def __len__(self):
+        return len(self.hunks)
+
+    def markers(self, first, last):
+        """
+        {line: "added" | "modified" | "removed"} for the 1-based lines first..last. A
+        removal is marked on the line above the gap (line 1 for a removal at the top);
+        a line that was also changed shows that instead.
+        """
+        found = {}
+        index = bisect_left(self.ends, first - 1)
+        for start, end, base_start, base_end in self.hunks[index:]:
+            if start > last: # A removal at start == last is still marked on line last
+                break
+            if start == end:
+                line = max(start, 1)
+                if first <= line <= last:
+                    found.setdefault(line, "removed")
+                continue
+            kind = "added" if base_start == base_end else "modified"
+            for line in range(max(start + 1, first), min(end, last) + 1):
+                found[line] = kind
+        return found
+
+    def line_of(self, hunk):
+        """The 1-based line a hunk is marked on."""
+        start, end = hunk[0], hunk[1]
+        return max(start, 1) if start == end else start + 1
+
+    def hunk_at(self, line):
+        """The hunk marked on a 1-based line, or None."""
+        index = bisect_left(self.ends, line - 1)
+        for hunk in self.hunks[index:]:
+            if hunk[0] > line:
+                break
+            if hunk[0] < line <= hunk[1] or hunk[0] == hunk[1] and self.line_of(hunk) == line:
+                return hunk
+        return None
+
+    def next_after(self, line):
+        """The first hunk marked below a 1-based line, wrapping around to the top; None if there are none."""
+        for hunk in self.hunks:
+            if self.line_of(hunk) > line:
+                return hunk
+        return self.hunks[0] if self.hunks else None
+
+
+NO_CHANGES = Changes([], [""])
+
+
+def diff_range(base_hashes, hashes, base_offset=0, offset=0):
+    """Hunks between two lists of line hashes, with offset added to their line numbers."""
+    low = 0
+    limit = min(len(base_hashes), len(hashes))
+    while low < limit and base_hashes[low] == hashes[low]:
+        low += 1
+    base_high, high = len(base_hashes), len(hashes)
+    while base_high > low and high > low and base_hashes[base_high - 1] == hashes[high - 1]:
+        base_high -= 1
+        high -= 1
+    if base_high == low or high == low:
+        if base_high == low and high == low:
+            return []
+        return [(offset + low, offset + high, base_offset + low, base_offset + base_high)]
+    base_middle, middle = base_hashes[low:base_high], hashes[low:high]
+    # Junk heuristics keep very large regions (a reload, a big paste) from going quadratic
+    matcher = SequenceMatcher(None, base_middle, middle, autojunk=len(base_middle) + len(middle) > 4000)
+    hunks = []
+    for operation, base_start, base_end, start, end in matcher.get_opcodes():
+        if operation == "equal":
+            continue
+        hunks.append((offset + low + start, offset + low + end, base_offset + low + base_start, base_offset + low + base_end))
+    return hunks
+
+
+class LineDiff:
+    """The base and current lines of one text and the hunks between them."""
+    def __init__(self, text=""):
+        self.lines = text.split("\n")
+        self.hashes = list(map(hash, self.lines))
+        self.set_base(list(self.lines), list(self.hashes))
+
+    def set_base(self, base_lines, base_hashes=None):
+        """Makes base_lines (which must not be changed afterwards) the saved text and diffs everything again."""
+        self.base_lines = base_lines
+        self.base_hashes = base_hashes if base_hashes is not None else list(map(hash, base_lines))
+        self.hunks = diff_range(self.base_hashes, self.hashes)
+        self.dirty = None
+
+    def edit(self, first, old_last, new_lines):
+        """Lines first..old_last (1-based; old_last = first - 1 for none) were replaced by new_lines."""
+        low, high = first - 1, old_last
+        self.lines[low:high] = new_lines
+        self.hashes[low:high] = map(hash, new_lines)
+        new_high = low + len(new_lines)
+        if self.dirty is None:
+            self.dirty = (low, high, new_high)
+            return
+        # Merge with the region edited since the last diff: lines dirty_low..dirty_old of
+        # the text the hunks are for became dirty_low..dirty_new, which this edit then changed
+        dirty_low, dirty_old, dirty_new = self.dirty
+        end = max(dirty_new, high) # In the text before this edit
+        old_end = dirty_old if end == dirty_new else end - (dirty_new - dirty_old)
+        self.dirty = (min(dirty_low, low), old_end, end + new_high - high)
+
+    def diff(self):
+        """Brings the hunks up to date with the edits; returns False if there were none."""
+        if self.dirty is None:
+            return False
+        low, old_high, new_high = self.dirty
+        self.dirty = None
+        before, touched, after = [], [], []
+        for hunk in self.hunks:
+            if hunk[1] < low:
+                before.append(hunk)
+            elif hunk[0] > old_high:
+                after.append(hunk)
+            else:
+                touched.append(hunk)
+        # Outside the hunks, a line's base line is its own number plus the lines the hunks above it removed
+        shift = sum(base_end - base_start - (end - start) for start, end, base_start, base_end in before)
+        start = min([low] + [hunk[0] for hunk in touched])
+        end = max([old_high] + [hunk[1] for hunk in touched])
+        base_start = start + shift
+        base_end = end + shift + sum(hunk_base_end - hunk_base_start - (hunk_end - hunk_start) for hunk_start, hunk_end, hunk_base_start, hunk_base_end in touched)
+        delta = new_high - old_high
+        region = diff_range(self.base_hashes[base_start:base_end], self.hashes[start:end + delta], base_start, start)
+        self.hunks = before + region + [(hunk_start + delta, hunk_end + delta, hunk_base_start, hunk_base_end) for hunk_start, hunk_end, hunk_base_start, hunk_base_end in after]
+        return True
+
+
+class DiffWorker:
+    """
+    Diffs the open tabs against their saved files on a background thread. The Tk
+    thread tells it what the tabs hold (load, edit, forget) and when their base
+    changes (rebase, load_base_file, save_point/saved); results are read with
+    changes(), and collect() returns the tabs whose changes were updated.
+    """
+    DIFF_INTERVAL = 0.15 # Seconds between diffs of one tab while it is being edited
+
+    def __init__(self):
+        self.tasks = deque()
+        self.condition = threading.Condition()
+        self.keys = set() # Tabs with a LineDiff, as seen by the Tk thread
+        self.diffs = {} # key -> LineDiff, used by the worker thread only
+        self.save_points = {} # key -> [(token, base lines)] of saves still being written
+        self.results = {} # key -> Changes
+        self.changed = set()
+        threading.Thread(target=self._run, name="diff-worker", daemon=True).start()
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def load(self, key, text):
+        """Starts tracking a tab holding text, which is its saved file; key is anything hashable that identifies it."""
+        self.keys.add(key)
+        self._queue(("load", key, text))
+
+    def edit(self, key, first, old_last, new_lines):
+        """Lines first..old_last of the tab's text were replaced by new_lines (see LineDiff.edit)."""
+        self._queue(("edit", key, first, old_last, new_lines))
+
+    def rebase(self, key):
+        """The tab's text, as of the edits so far, is what is on disk now."""
+        self._queue(("rebase", key))
+
+    def load_base_file(self, key, file_path):
+        """Reads file_path (on the worker thread) as the tab's base; an unreadable file leaves the base as it was."""
+        self._queue(("base_file", key, file_path))
+
+    def save_point(self, key, token):
+        """The tab's text as of now is being saved; saved(key, token) makes it the base once it is written."""
+        self._queue(("save_point", key, token))
+
+    def saved(self, key, token):
+        self._queue(("saved", key, token))
+
+    def forget(self, key):
+        self.keys.discard(key)
+        self._queue(("forget", key))
+
+    def flush(self, key, timeout=1.0):
+        """Diffs a tab right away, with every edit sent so far; returns its Changes (None on timeout)."""
+        done = threading.Event()
+        self._queue(("flush", key, done))
+        if not done.wait(timeout):
+            return None
+        return self.changes(key)
+
+    def changes(self, key):
+        return self.results.get(key, NO_CHANGES)
+
+    def collect(self):
+        with self.condition:
+            changed, self.changed = self.changed, set()
+        return changed
+
+    def _queue(self, task):
+        with self.condition:
+            self.tasks.append(task)
+            self.condition.notify()
+
+    def _run(self):
+        due = {} # key -> time its next diff may run
+        while True:
+            with self.condition:
+                while not self.tasks:
+                    if not due:
+                        self.condition.wait()
+                        continue
+                    timeout = min(due.values()) - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    self.condition.wait(timeout)
+                tasks = [self.tasks.popleft() for _ in range(len(self.tasks))]
+            flushed = []
+            for task in tasks:
+                try:
+                    key = task[1]
+                    if task[0] == "flush":
+                        flushed.append(task[2])
+                        if key in self.diffs:
+                            self._diff(key)
+                            due.pop(key, None)
+                    elif task[0] == "forget":
+                        self.diffs.pop(key, None)
+                        self.save_points.pop(key, None)
+                        self.results.pop(key, None)
+                        due.pop(key, None)
+                    else:
+                        self._apply(task, due)
+                except Exception:
+                    pass # A broken task must not stop the worker; the tab just shows stale markers
+            now = time.monotonic()
+            for key in [key for key, when in due.items() if when <= now]:
+                del due[key]
+                self._diff(key)
+            for done in flushed:
+                done.set()
+
+    def _apply(self, task, due):
+        operation, key = task[0], task[1]
+        if operation == "load":
+            self.diffs[key] = LineDiff(task[2])
+            self.save_points.pop(key, None)
+            self._publish(key)
+            return
+        diff = self.diffs.get(key)
+        if diff is None:
+            return
+        if operation == "edit":
+            diff.edit(*task[2:])
+            due.setdefault(key, time.monotonic() + self.DIFF_INTERVAL) # The first edit after a diff starts the clock
+        elif operation == "rebase":
+            diff.set_base(list(diff.lines), list(diff.hashes))
+            due.pop(key, None)
+            self._publish(key)
+        elif operation == "base_file":
+            try:
+                with open(task[2], "r", encoding="utf-8") as file:
+                    base_lines = file.read().split("\n")
+            except (OSError, ValueError):
+                return
+            diff.set_base(base_lines)
+            due.pop(key, None)
+            self._publish(key)
+        elif operation == "save_point":
+            self.save_points.setdefault(key, []).append((task[2], list(diff.lines), list(diff.hashes)))
+        elif operation == "saved":
+            points = self.save_points.get(key, [])
+            for index, (token, base_lines, base_hashes) in enumerate(points):
+                if token is task[2]:
+                    del points[:index + 1] # Earlier saves were superseded or failed
+                    diff.set_base(base_lines, base_hashes)
+                    due.pop(key, None)
+                    self._publish(key)
+                    break
+
+    def _diff(self, key):
+        diff = self.diffs[key]
+        with METRICS.timer("diff"):
+            updated = diff.diff()
+        if updated:
+            self._publish(key)
+
+    def _publish(self, key):
+        diff = self.diffs[key]
+        self.results[key] = Changes(diff.hunks, diff.base_lines)
+        with self.condition:
+            self.changed.add(key)
@@ -0,0 +1,410 @@
+"""
+File input/output helpers of Breeze Code that do not need Tk: fingerprints of text and
+files, reading large files incrementally, paging through files too large to load,
+following files that grow, and replacing files atomically.
+"""
+import codecs
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import threading
+from array import array
+from bisect import bisect_right
+
+
+def content_digest(text):
+    """Fingerprint of a buffer's text, used to tell whether it still matches the saved file."""
+    return content_hasher(text).digest()
+
+
+def content_hasher(text=""):
+    """A hash object whose digest() is content_digest() of text plus whatever update() adds (UTF-8 encoded)."""
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=20)
+
+
+def file_digest(file_path):
+    """
+    content_digest() of the text a tab would load from file_path, computed piece by
+    piece. Raises OSError, or UnicodeDecodeError if the file is not valid UTF-8.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    stream = FileStream(file_path)
+    try:
+        while True:
+            chunk = stream.read_chunk()
+            if chunk is None:
+                return digest.digest()
+            digest.update(chunk.encode("utf-8", "surrogatepass"))
+    finally:
+        stream.close()
+
+
+def stat_key(file_path):
+    """(mtime_ns, size, inode) of a file, or None if it cannot be stat'ed."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class FileStream:
+    """
+    Reads a file piece by piece from a memory map, decoding UTF-8 incrementally and
+    translating newlines the way open(path, "r") does, so large files can be loaded
+    into a tab in batches instead of as one string.
+    """
+    def __init__(self, file_path, chunk_size=256 * 1024):
+        self.file = open(file_path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError): # Empty files (and some special files) cannot be mapped
+            self.data = None
+        self.chunk_size = chunk_size
+        self.position = 0
+        self.finished = False
+        self.decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+
+    def read_chunk(self):
+        """
+        Returns the next piece of text, or None once the whole file has been read.
+        Raises UnicodeDecodeError for content that is not valid UTF-8.
+        """
+        if self.finished:
+            return None
+        if self.data is not None:
+            raw = self.data[self.position:self.position + self.chunk_size]
+        else:
+            raw = self.file.read(self.chunk_size)
+        self.position += len(raw)
+        if not raw:
+            self.finished = True
+            return self.decoder.decode(b"", final=True)
+        return self.decoder.decode(raw)
+
+    def progress(self):
+        """Fraction of the file read so far."""
+        return self.position / self.size if self.size else 1.0
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.file.close()
+
+
+class PagedFile:
+    """
+    Random access by line number to a file too large to load into a tab. The file is
+    memory-mapped, and a background thread records a checkpoint (line number and byte
+    offset of that line) about every CHECKPOINT_BYTES, so any line is found by scanning
+    at most that far from the checkpoint before it. The index takes a few kB per GB no
+    matter how many lines there are, and pages the indexer has read are handed back to
+    the OS, so memory use stays bounded.
+
+    Line numbers count like a Text widget does: a trailing newline starts one more
+    (empty) line. Lines are decoded as UTF-8 with invalid bytes replaced, "\r\n" is
+    read as a newline, and lines longer than MAX_LINE_BYTES are cut short.
+    """
+    CHECKPOINT_BYTES = 1024 * 1024 # A multiple of the page size
+    MAX_LINE_BYTES = 64 * 1024
+    TAIL_BYTES = 64 # Compared by grow() to tell an append from a rewrite
+
+    def __init__(self, file_path):
+        self.file = open(file_path, "rb")
+        self.size = os.fstat(self.file.fileno()).st_size
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError): # Empty files (and some special files) cannot be mapped
+            self.data = None
+        self.lock = threading.Lock()
+        self.lines = array("q", [1]) # Line number of each checkpoint...
+        self.offsets = array("q", [0]) # ...and the offset that line starts at
+        self.indexed_bytes = 0 # Every line starting before this offset is indexed
+        self.indexed_lines = 1
+        self.line_count = None # Known once the index is complete
+        self.error = None
+        self.recent = (1, 0) # Last line located, to continue from when paging forward
+        self.tail = self.data[-self.TAIL_BYTES:] if self.data is not None else b""
+        self.cancelled = threading.Event()
+        self._start_indexer(0, 1)
+
+    def _start_indexer(self, position, line):
+        self.indexer = threading.Thread(target=self._build_index, args=(position, line), name="line-index", daemon=True)
+        self.indexer.start()
+
+    def grow(self):
+        """
+        Takes in what was appended to the file since it was opened (or last grown),
+        indexing only the new part. Returns False, changing nothing, if the file was not
+        just appended to: it shrank, the path names another file now, or the bytes before
+        the old end changed. Then it has to be opened again.
+        """
+        stat = os.fstat(self.file.fileno())
+        try:
+            same_file = os.path.samestat(stat, os.stat(self.file.name))
+        except OSError:
+            same_file = False
+        if not same_file or self.data is None or self.error is not None or stat.st_size < self.size:
+            return False
+        if self.data[self.size - len(self.tail):self.size] != self.tail:
+            return False
+        if stat.st_size == self.size:
+            return True # Only touched
+        data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.cancelled.set()
+        self.indexer.join()
+        self.cancelled.clear()
+        if self.line_count is None: # The indexer stopped at a block boundary
+            position, line = self.indexed_bytes, self.indexed_lines
+        else: # Go on from the page the old end is in (madvise needs page-aligned offsets)
+            position = self.size - self.size % mmap.ALLOCATIONGRANULARITY
+            line = self.line_count - self.data[position:self.size].count(b"\n")
+        old_data = self.data
+        with self.lock:
+            self.data = data
+            self.size = stat.st_size
+            self.line_count = None
+        old_data.close()
+        self.tail = data[max(0, self.size - self.TAIL_BYTES):self.size]
+        self._start_indexer(position, line)
+        return True
+
+    def _build_index(self, position, line):
+        if self.data is None:
+            self.indexed_bytes, self.line_count = self.size, 1
+            return
+        if hasattr(self.data, "madvise"):
+            self.data.madvise(mmap.MADV_SEQUENTIAL)
+        try:
+            while position < self.size and not self.cancelled.is_set():
+                self._check_size()
+                block = self.data[position:position + self.CHECKPOINT_BYTES]
+                newlines = block.count(b"\n")
+                if hasattr(mmap, "MADV_DONTNEED"):
+                    self.data.madvise(mmap.MADV_DONTNEED, position, len(block))
+                with self.lock:
+                    if newlines:
+                        line += newlines
+                        self.lines.append(line)
+                        self.offsets.append(position + block.rfind(b"\n") + 1)
+                    position += len(block)
+                    # After grow(), the first blocks were indexed before already
+                    self.indexed_bytes, self.indexed_lines = max(self.indexed_bytes, position), max(self.indexed_lines, line)
+            if position >= self.size:
+                self.line_count = line
+        except (OSError, ValueError) as e: # Truncated underneath us, or closed
+            self.error = e
+
+    def _check_size(self):
+        """
+        Touching a page past the end of a file that shrank kills the process (SIGBUS), so
+        this runs before each access to the mapping. Raises OSError if the file shrank.
+        """
+        if os.fstat(self.file.fileno()).st_size < self.size:
+            raise OSError("the file was truncated while it was open")
+
+    def progress(self):
+        """Fraction of the file indexed so far."""
+        return self.indexed_bytes / self.size if self.size else 1.0
+
+    def known_lines(self):
+        """Number of lines that can be read (all of them once indexing is done)."""
+        return self.line_count or self.indexed_lines
+
+    def estimated_lines(self):
+        """The line count, or an estimate from the part indexed so far."""
+        if self.line_count is not None:
+            return self.line_count
+        return max(self.indexed_lines, int(self.indexed_lines * self.size / max(self.indexed_bytes, 1)))
+
+    def locate(self, line):
+        """Returns the byte offset line starts at, or None if it is not indexed (yet)."""
+        if line < 1 or line > self.known_lines() or self.data is None:
+            return 0 if line == 1 else None
+        with self.lock:
+            index = bisect_right(self.lines, line) - 1
+            found, offset = self.lines[index], self.offsets[index]
+        if found < self.recent[0] <= line:
+            found, offset = self.recent
+        if found < line:
+            self._check_size() # Before touching the mapping, and after waiting for the lock
+        while found < line:
+            offset = self.data.find(b"\n", offset) + 1
+            found += 1
+        self.recent = (line, offset)
+        return offset
+
+    def read_lines(self, first, count):
+        """Returns up to count lines starting at line first (fewer at the end of the index)."""
+        offset = self.locate(first)
+        if offset is None:
+            return []
+        if self.data is None:
+            return [""]
+        self._check_size()
+        count = min(count, self.known_lines() - first + 1)
+        lines = []
+        for line in range(first, first + count):
+            self.recent = (line, offset)
+            end = self.data.find(b"\n", offset)
+            if end == -1:
+                end = self.size
+            raw = self.data[offset:min(end, offset + self.MAX_LINE_BYTES)]
+            if raw.endswith(b"\r"):
+                raw = raw[:-1]
+            lines.append(raw.decode("utf-8", "replace"))
+            offset = end + 1
+        return lines
+
+    def close(self):
+        self.cancelled.set()
+        self.indexer.join()
+        if self.data is not None:
+            self.data.close()
+        self.file.close()
+
+
+class FileFollower:
+    """
+    Picks up what is appended to a growing file, such as a log. poll() costs a single
+    stat() while nothing changes; otherwise it reads only the bytes after the last
+    offset, at most MAX_READ_BYTES per call, decoding UTF-8 incrementally (invalid bytes
+    replaced) and translating newlines like open(path, "r") does. A file that shrank
+    (truncated), that the path no longer names (rotated: renamed away and recreated,
+    a new inode) or whose last TAIL_BYTES bytes read changed (truncated in place and
+    grown back past the offset, as copytruncate does) is read again from its start.
+    Following begins at the current end of the file.
+    """
+    MAX_READ_BYTES = 1024 * 1024
+    TAIL_BYTES = 64 # Re-read whenever the file changed, to notice it was rewritten
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.file = None
+        self._open()
+        stat = os.fstat(self.file.fileno())
+        self.offset = stat.st_size
+        self.seen = (stat.st_size, stat.st_mtime_ns) # What the last poll() saw
+        self.file.seek(max(0, self.offset - self.TAIL_BYTES))
+        self.tail = self.file.read(self.offset - self.file.tell())
+        self.behind = False # More was appended than the last poll() read
+
+    def _open(self):
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.file_path, "rb")
+        stat = os.fstat(self.file.fileno())
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.seen = None
+        self._restart()
+
+    def _restart(self):
+        self.offset = 0
+        self.tail = b""
+        self.decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")("replace"), translate=True)
+
+    def _rewritten(self):
+        """Whether the bytes before the offset are no longer the ones read."""
+        if not self.tail:
+            return False
+        self.file.seek(self.offset - len(self.tail))
+        return self.file.read(len(self.tail)) != self.tail
+
+    def poll(self):
+        """
+        Returns (reset, text): the text appended since the last call ("" if none), and
+        whether the file was truncated or replaced, in which case text is the start of
+        the new content rather than a continuation. Raises OSError if it cannot be read.
+        """
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return False, "" # Rotated away; the new file is not there yet
+        reset = False
+        size = stat.st_size
+        seen = (size, stat.st_mtime_ns)
+        if (stat.st_dev, stat.st_ino) != self.identity:
+            self._open()
+            size = os.fstat(self.file.fileno()).st_size
+            reset = True
+        elif seen == self.seen and not self.behind:
+            return False, ""
+        elif size < self.offset or self._rewritten():
+            self._restart()
+            reset = True
+        self.seen = seen
+        if size == self.offset:
+            self.behind = False
+            return reset, ""
+        self.file.seek(self.offset)
+        raw = self.file.read(min(size - self.offset, self.MAX_READ_BYTES))
+        self.offset += len(raw)
+        self.tail = (self.tail + raw)[-self.TAIL_BYTES:]
+        self.behind = self.offset < size
+        return reset, self.decoder.decode(raw)
+
+    def close(self):
+        self.file.close()
+
+
+def _read_umask():
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+# Read once, while importing: setting the umask to read it would race with threads creating files
+UMASK = _read_umask()
+
+
+def write_file_atomically(file_path, text):
+    """
+    Replaces file_path with text (UTF-8). The text goes to a temporary file in the same
+    directory, which is fsynced and then renamed over the original, so a crash or a full
+    disk leaves either the old or the new file, never a truncated one.
+
+    A symlink is followed and its target replaced. The new file gets the mode of the
+    old one, or 0666 minus the umask like open() would give it. A file with other hard
+    links is written in place instead, since a rename would split it from them.
+    """
+    real_path = os.path.realpath(file_path)
+    try:
+        existing = os.stat(real_path)
+    except FileNotFoundError:
+        existing = None
+    if existing is not None and existing.st_nlink > 1:
+        with open(real_path, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        return
+    directory = os.path.dirname(real_path)
+    fd, temp_path = tempfile.mkstemp(prefix="." + os.path.basename(real_path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with open(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        # mkstemp creates it 0600
+        os.chmod(temp_path, existing.st_mode & 0o7777 if existing is not None else 0o666 & ~UMASK)
+        if existing is not None and hasattr(os, "chown"):
+            try:
+                os.chown(temp_path, existing.st_uid, existing.st_gid) # Only works as root or for our own groups
+            except OSError:
+                pass
+        os.replace(temp_path, real_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"): # Make the rename itself durable (POSIX only)
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,646 @@
+"""
+Syntax highlighting engine of Breeze Code.
+
+Everything here is plain Python and can be imported without Tk (the benchmarks in
+benchmarks/ do). A SyntaxHighlighter reads and tags its buffer through a small view
+object: CodeEditor wraps each Tk Text widget in a TextWidgetView, and LineBuffer is
+an in-memory stand-in for tests and benchmarks.
+"""
+import re
+import os
+import json
+import zlib
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# --- Syntax Highlighting Rules ---
+# Every language is an ordered list of (pattern, {group: tag}, opens_state) rules.
+# A line is scanned left to right: at each step the earliest match wins and ties go
+# to the rule listed first. A rule with an opens_state starts a construct that may
+# span several lines (block comment, triple-quoted string, ...); the matching entry
+# in HIGHLIGHT_CONTINUATIONS gives its tag and the pattern that closes it.
+PYTHON_KEYWORDS = r'\b(False|None|True|and|as|assert|async|await|break|class|continue|def|del|elif|else|except|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise|return|try|while|with|yield)\b'
+JS_KEYWORDS = r'\b(break|case|catch|class|const|continue|debugger|default|delete|do|else|export|extends|finally|for|function|if|import|in|instanceof|new|return|super|switch|this|throw|try|typeof|var|void|while|with|yield)\b'
+NUMBERS = r'\b\d+(\.\d*)?\b|\b\.\d+\b'
+QUOTED_STRINGS = r'"(?:[^"\\]|\\.)*"?|\'(?:[^\'\\]|\\.)*\'?' # Unterminated strings run to the end of the line
+
+HIGHLIGHT_RULES = {
+    "py": [
+        (r'#.*', {0: "python_comment"}, None),
+        (r'"""', {}, "triple_double"),
+        (r"'''", {}, "triple_single"),
+        (QUOTED_STRINGS, {0: "python_string"}, None),
+        (r'\b(class)\s+(\w+)\b', {1: "python_keyword", 2: "python_class"}, None),
+        (PYTHON_KEYWORDS, {0: "python_keyword"}, None),
+        (r'\b(\w+)(?=\()', {0: "python_function"}, None), # Simple regex for function calls (not def)
+        (NUMBERS, {0: "python_number"}, None)
+    ],
+    "html": [
+        (r'<!--', {}, "comment"),
+        (r'</?[\w\d]+>', {0: "html_tag"}, None),
+        (r'\b([\w\d-]+)=', {1: "html_attribute"}, None),
+        (r'"[^"]*"|\'[^\']*\'', {0: "html_string"}, None)
+    ],
+    "css": [
+        (r'/\*', {}, "comment"),
+        (r'[^\s{};/][^{};/]*(?=\{)', {0: "css_selector"}, None), # Everything in front of a '{'
+        (r'\b([\w-]+)(?=\s*:)', {1: "css_property"}, None),
+        (r':\s*([^;{}]+)', {1: "css_value"}, None)
+    ],
+    "js": [
+        (r'//.*', {0: "js_comment"}, None),
+        (r'/\*', {}, "comment"),
+        (r'`', {}, "template"), # Template literals may span lines
+        (QUOTED_STRINGS, {0: "js_string"}, None),
+        (r'\b(let|const|var)\s+(\w+)\b', {1: "js_keyword", 2: "js_variable"}, None),
+        (JS_KEYWORDS, {0: "js_keyword"}, None),
+        (r'\b(\w+)(?=\()', {0: "js_function"}, None),
+        (NUMBERS, {0: "js_number"}, None)
+    ]
+}
+
+# state -> (tag, pattern matching the rest of the construct up to and including its end)
+HIGHLIGHT_CONTINUATIONS = {
+    "py": {
+        "triple_double": ("python_string", r'(?:\\.|[^\\])*?"""'),
+        "triple_single": ("python_string", r"(?:\\.|[^\\])*?'''")
+    },
+    "html": {"comment": ("html_comment", r'.*?-->')},
+    "css": {"comment": ("css_comment", r'.*?\*/')},
+    "js": {
+        "comment": ("js_comment", r'.*?\*/'),
+        "template": ("js_string", r'(?:\\.|[^`\\])*`')
+    }
+}
+
+HIGHLIGHT_TAG_PREFIXES = ("python_", "html_", "css_", "js_")
+
+
+class LineLexer:
+    """
+    Tokenizes text one line at a time for a single language.
+    lex_line() takes the state at the start of a line (None when outside any
+    multi-line construct) and returns the line's tokens and the state at its end.
+    All rules of the language are compiled into one alternation, so each line is
+    scanned in a single pass; use lexer_for() to share the compiled lexers.
+    """
+    def __init__(self, file_type):
+        rules = HIGHLIGHT_RULES[file_type]
+        # Alternatives are tried left to right at each position, which gives the same
+        # "earliest match wins, ties go to the first rule" order as scanning rule by rule
+        self.master = re.compile("|".join(f"(?P<r{index}>{pattern})" for index, (pattern, _, _) in enumerate(rules)))
+        self.actions = {} # group name -> (opens_state, [(tag, group_number), ...])
+        for index, (_, groups, opens) in enumerate(rules):
+            offset = self.master.groupindex[f"r{index}"]
+            self.actions[f"r{index}"] = (opens, [(tag, offset + group) for group, tag in groups.items()])
+        self.continuations = {
+            state: (tag, re.compile(pattern))
+            for state, (tag, pattern) in HIGHLIGHT_CONTINUATIONS.get(file_type, {}).items()
+        }
+        self.tags = sorted({tag for _, groups, _ in rules for tag in groups.values()} | {tag for tag, _ in self.continuations.values()})
+        # Lines in which no multi-line construct can start keep the state they begin in
+        opener_patterns = [pattern for pattern, _, opens in rules if opens is not None]
+        self.openers = re.compile("|".join(opener_patterns)) if opener_patterns else None
+
+    def lex_line(self, line, state=None):
+        """Returns ([(tag, start_column, end_column), ...], end_state) for one line."""
+        tokens = []
+        pos = 0
+        if state is not None:
+            pos, state = self._continue(line, 0, 0, state, tokens)
+        while state is None:
+            for match in self.master.finditer(line, pos):
+                opens, spans = self.actions[match.lastgroup]
+                if opens is not None:
+                    # Restart the scan after the construct if it closes on this line
+                    pos, state = self._continue(line, match.start(), match.end(), opens, tokens)
+                    break
+                for tag, group in spans:
+                    start, end = match.span(group)
+                    if end > start:
+                        tokens.append((tag, start, end))
+            else:
+                break
+        return tokens, state
+
+    def end_state(self, line, state=None):
+        """Returns only the state at the end of a line, skipping the scan where possible."""
+        if state is None and (self.openers is None or not self.openers.search(line)):
+            return None
+        return self.lex_line(line, state)[1]
+
+    def _continue(self, line, token_start, scan_from, state, tokens):
+        """Tags a multi-line construct from token_start until it closes or the line ends."""
+        tag, closing = self.continuations[state]
+        match = closing.match(line, scan_from)
+        end = match.end() if match else len(line)
+        if end > token_start:
+            tokens.append((tag, token_start, end))
+        return end, (None if match else state)
+
+
+FILE_TYPES = {"py": "py", "html": "html", "htm": "html", "css": "css", "js": "js"} # extension -> file type
+
+
+def file_type_for(file_path):
+    """Returns the file type ("py", "html", ...) for a path, "txt" for anything else."""
+    extension = file_path.split('.')[-1].lower() if file_path else "txt"
+    return FILE_TYPES.get(extension, "txt")
+
+
+_lexers = {} # file_type -> LineLexer, compiled once and shared by all tabs
+
+def lexer_for(file_type):
+    """Returns the shared LineLexer for a file type, or None if it is not highlighted."""
+    if file_type not in HIGHLIGHT_RULES:
+        return None
+    if file_type not in _lexers:
+        _lexers[file_type] = LineLexer(file_type)
+    return _lexers[file_type]
+
+
+class LineBuffer:
+    """
+    In-memory buffer with the view interface SyntaxHighlighter uses, for running the
+    engine without Tk. Tags are not stored; tag_ranges() only counts the ranges.
+    edit() mirrors what CodeEditor's edit proxy reports for a Text widget.
+    """
+    def __init__(self, text, visible=50):
+        self.lines = text.split("\n")
+        self.top = 1 # First line of the simulated viewport
+        self.visible = visible # Lines in the viewport
+        self.ranges_added = 0
+        self.ranges_removed = 0
+        self.highlighters = []
+
+    def line_count(self):
+        return len(self.lines)
+
+    def visible_lines(self):
+        return self.top, min(len(self.lines), self.top + self.visible - 1)
+
+    def get_lines(self, first, last):
+        return self.lines[first - 1:last]
+
+    def tag_ranges(self, operation, tag, indices):
+        if operation == "add":
+            self.ranges_added += len(indices) // 2
+        else:
+            self.ranges_removed += len(indices) // 2
+
+    def remove_tags(self, prefixes):
+        pass
+
+    def exists(self):
+        return True
+
+    def scroll_to(self, line):
+        self.top = max(1, min(line, len(self.lines)))
+
+    def edit(self, first, last, text):
+        """Replaces lines first..last (1-based, inclusive) with the lines of text."""
+        new_lines = text.split("\n")
+        self.lines[first - 1:last] = new_lines
+        for highlighter in self.highlighters:
+            highlighter.lines_changed(first, last, first + len(new_lines) - 1)
+
+
+class SyntaxHighlighter:
+    """
+    Keeps the syntax highlighting of one buffer up to date incrementally.
+    The lexer state at the end of every line is remembered, so after an edit only the
+    changed lines are lexed again, continuing past them only until a line ends in the
+    same state as before. The result is identical to highlighting the whole buffer.
+
+    Buffers longer than lazy_threshold lines are only tagged around the viewport
+    (plus margin lines on each side); tags far outside it are dropped again and lines
+    scrolled into view are tagged on demand.
+
+    A pass is split in three so the lexing can run off the Tk thread: prepare()
+    snapshots the lines involved into a HighlightJob, job.run() lexes them, and
+    apply() installs the result unless the buffer changed in the meantime.
+
+    The buffer is reached through a view with line_count(), visible_lines(),
+    get_lines(first, last), tag_ranges(operation, tag, indices) taking Tk-style
+    "line.column" index pairs, remove_tags(prefixes) and exists().
+    """
+    RETAIN_FACTOR = 5 # Tags within RETAIN_FACTOR * margin lines of the viewport are kept
+
+    def __init__(self, view, file_type, margin=100, lazy_threshold=5000, cache=None):
+        self.view = view
+        self.margin = margin
+        self.lazy_threshold = lazy_threshold
+        self.cache = cache # Optional TokenCache shared between tabs
+        self.start_state = None # Lexer state before line 1 (set when the view is a window into a larger file)
+        self.revision = 0 # Bumped whenever the line states change; older jobs are stale
+        self.after_id = None # Pending scheduled highlight and when it was first requested,
+        self.requested_at = 0 # both managed by CodeEditor.schedule_highlight()
+        self.set_file_type(file_type)
+
+    def set_file_type(self, file_type, content_key=None):
+        """
+        Switches language and schedules the whole buffer to be highlighted again.
+        content_key (see TokenCache.key) lets the first pass reuse a cached result.
+        """
+        self.file_type = file_type
+        self.lexer = lexer_for(file_type)
+        self.reset()
+        self.content_key = content_key if self.cache is not None else None
+
+    def reset(self):
+        """Forgets all lexer states and tags."""
+        total = self.line_count()
+        self.line_states = [None] * total # State at the end of each line (index 0 is line 1)
+        self.tagged = bytearray(total) # 1 where the line's tags match its current state
+        self.valid = 0 # Lines 1..valid have up-to-date states
+        self.converge = None # (dirty_end, extent): lines up to extent are valid again once a
+                             # line at or after dirty_end ends in the state it had before
+        self.clear_tags = True # Tags of a previous language may still be present
+        self.revision += 1
+
+    def line_count(self):
+        return self.view.line_count()
+
+    def is_lazy(self):
+        """True when only the lines around the viewport are highlighted."""
+        return self.lexer is not None and len(self.line_states) > self.lazy_threshold
+
+    def lines_changed(self, first, old_last, new_last):
+        """
+        Records that lines first..old_last were replaced by lines first..new_last.
+        Called for every insert/delete before the next pass is prepared.
+        """
+        self.revision += 1
+        self.content_key = None # No longer matches the cached content
+        # The old end state of old_last is what the line after the edit was lexed with,
+        # so it is kept as the reference value to detect when lexing can stop.
+        self.line_states[first - 1:old_last] = [None] * (new_last - first) + [self.line_states[old_last - 1]]
+        self.tagged[first - 1:old_last] = bytes(new_last - first + 1)
+
+        dirty_end, known = self.converge if self.converge else (0, self.valid)
+        if known < first:
+            return # Nothing is known about these lines yet
+        self.valid = min(self.valid, first - 1)
+        if dirty_end >= old_last:
+            dirty_end += new_last - old_last
+        elif dirty_end >= first:
+            dirty_end = new_last
+        known = known + new_last - old_last if known >= old_last else first - 1
+        self.converge = (max(dirty_end, new_last), known) if known > self.valid else None
+
+    def highlight(self):
+        """Runs a whole pass synchronously on the calling thread."""
+        job = self.prepare()
+        if job is not None:
+            job.run()
+            self.apply(job)
+
+    def prepare(self):
+        """
+        Returns a HighlightJob for whatever is out of date in the highlighted range (the
+        whole buffer, or the viewport plus margin for large buffers), or None if the
+        range is already up to date.
+        """
+        total = self.line_count()
+        if len(self.line_states) != total:
+            self.reset() # An edit slipped past lines_changed(); fall back to a full pass
+            self.content_key = None
+        if self.clear_tags:
+            self.view.remove_tags(HIGHLIGHT_TAG_PREFIXES)
+            self.clear_tags = False
+        if self.lexer is None:
+            return None
+
+        lazy = self.is_lazy()
+        if lazy:
+            top, bottom = self.view.visible_lines()
+            low, high = max(1, top - self.margin), min(total, bottom + self.margin)
+        else:
+            low, high = 1, total
+        untagged = self.tagged.find(0, low - 1, high) + 1
+        if self.valid >= high and not untagged:
+            if lazy:
+                self._drop_tags(low, high)
+            return None
+
+        # Snapshot every line from the first one that needs lexing to the end of the range
+        first = min(self.valid + 1, untagged or high)
+        lines = self.view.get_lines(first, high)
+        states = ([self.start_state] if first == 1 else []) + self.line_states[max(first - 2, 0):high]
+        return HighlightJob(self, first, lines, states, self.tagged[low - 1:high], low, high, lazy)
+
+    def apply(self, job):
+        """
+        Installs the result of a finished job. Returns False (and changes nothing) if
+        the buffer or the line states changed since the job was prepared.
+        """
+        if job.revision != self.revision or len(self.line_states) != job.total:
+            return False
+        self.revision += 1
+        if job.cached_states is not None:
+            self.line_states = list(job.cached_states)
+            self.content_key = None
+        else:
+            self.line_states[job.first - 1:job.high] = job.states[1:]
+        self.valid, self.converge = job.valid, job.converge
+        for first, last in job.lexed:
+            self.tagged[first - 1:last] = bytes(last - first + 1)
+        for line in job.tokens_by_line:
+            self.tagged[line - 1] = 1
+        self._apply_tags(sorted(job.tokens_by_line), job.tokens_by_line)
+        if job.lazy:
+            self._drop_tags(job.low, job.high)
+
+        if self.content_key and self.valid == job.total:
+            # The unedited buffer is fully lexed now; remember the result for next time
+            tokens = None
+            if len(job.tokens_by_line) == job.total:
+                tokens = [job.tokens_by_line[line] for line in range(1, job.total + 1)]
+            self.cache.put(self.content_key, list(self.line_states), tokens)
+            self.content_key = None
+        return True
+
+    def _apply_tags(self, lines, tokens_by_line):
+        """
+        Replaces the tags of the given (ascending) lines with their tokens, sending
+        the view a single "tag remove" and a single "tag add" per tag.
+        """
+        if not lines:
+            return
+        stale = [] # index pairs covering each contiguous run of lines
+        run_start = previous = lines[0]
+        for line in lines[1:] + [None]:
+            if line != previous + 1:
+                stale += (f"{run_start}.0", f"{previous}.end")
+                run_start = line
+            previous = line
+        ranges = {tag: [] for tag in self.lexer.tags}
+        for line in lines:
+            for tag, start, end in tokens_by_line[line]:
+                ranges[tag] += (f"{line}.{start}", f"{line}.{end}")
+        for tag, indices in ranges.items():
+            self.view.tag_ranges("remove", tag, stale)
+            if indices:
+                self.view.tag_ranges("add", tag, indices)
+
+    def _drop_tags(self, low, high):
+        """Removes the tags of lines far outside low..high to bound memory."""
+        keep_first = max(1, low - self.RETAIN_FACTOR * self.margin)
+        keep_last = min(len(self.tagged), high + self.RETAIN_FACTOR * self.margin)
+        stale = []
+        if self.tagged.find(1, 0, keep_first - 1) != -1:
+            stale += ("1.0", f"{keep_first}.0")
+            self.tagged[:keep_first - 1] = bytes(keep_first - 1)
+        if self.tagged.find(1, keep_last) != -1:
+            stale += (f"{keep_last + 1}.0", "end")
+            self.tagged[keep_last:] = bytes(len(self.tagged) - keep_last)
+        if stale:
+            for tag in self.lexer.tags:
+                self.view.tag_ranges("remove", tag, stale)
+
+
+class HighlightJob:
+    """
+    Snapshot of the lines and states one highlight pass needs, taken on the Tk thread
+    by SyntaxHighlighter.prepare(). run() only touches the snapshot, so it may be
+    called from a worker thread; SyntaxHighlighter.apply() installs the result.
+    """
+    def __init__(self, highlighter, first, lines, states, tagged, low, high, lazy):
+        self.highlighter = highlighter
+        self.revision = highlighter.revision
+        self.total = len(highlighter.line_states)
+        self.lexer = highlighter.lexer
+        self.file_type = highlighter.file_type
+        self.first = first # lines[0] is line `first`
+        self.lines = lines
+        self.states = states # states[i] is the end state of line first - 1 + i
+        self.tagged = tagged # Tagged flags of lines low..high
+        self.low, self.high, self.lazy = low, high, lazy
+        self.valid, self.converge = highlighter.valid, highlighter.converge
+        self.cache = highlighter.cache
+        self.cache_key = highlighter.content_key if self.valid == 0 else None
+        # Results
+        self.cached_states = None # Set when the whole result came from the cache
+        self.tokens_by_line = {} # Lines of low..high to re-tag
+        self.lexed = [] # (first, last) runs of lines whose states were recomputed
+        self.run_ms = None # Set by HighlightWorker
+        self.requested_at = None # time.monotonic() of the first request this pass covers, set by the editor
+
+    def run(self):
+        lexer, lines, states, first = self.lexer, self.lines, self.states, self.first
+        low, high = self.low, self.high
+        if self.cache_key:
+            entry = self.cache.get(self.cache_key)
+            if entry is not None and len(entry[0]) == self.total:
+                self._use_cached(*entry)
+                return
+
+        # Bring the line states up to date through the end of the range; lines inside
+        # the range keep their tokens, lines before it only need their end state.
+        line = run_start = self.valid + 1
+        while line <= high:
+            text, state = lines[line - first], states[line - first]
+            if line >= low:
+                self.tokens_by_line[line], end_state = lexer.lex_line(text, state)
+            else:
+                end_state = lexer.end_state(text, state)
+            previous_state = states[line - first + 1]
+            states[line - first + 1] = end_state
+            self.valid = line
+            if self.converge:
+                dirty_end, known = self.converge
+                if dirty_end <= line <= known and end_state == previous_state:
+                    # The rest of the known lines were lexed with this same state
+                    self.lexed.append((run_start, line))
+                    self.valid, self.converge = known, None
+                    line = run_start = known + 1
+                    continue
+                if line >= known:
+                    self.converge = None
+            line += 1
+        if line > run_start:
+            self.lexed.append((run_start, line - 1))
+        if self.converge and self.valid >= self.converge[0]:
+            # Lines up to valid now hold new states; only older ones further on can match
+            self.converge = (self.valid + 1, self.converge[1])
+
+        # Tokens for the rest of the range whose tags are missing or stale
+        for line in range(low, high + 1):
+            if not self.tagged[line - low] and line not in self.tokens_by_line:
+                self.tokens_by_line[line] = lexer.lex_line(lines[line - first], states[line - first])[0]
+
+    def _use_cached(self, cached_states, cached_tokens):
+        """Takes all states, and the range's tokens where cached, from a TokenCache entry."""
+        self.cached_states = cached_states
+        self.valid, self.converge = self.total, None
+        for line in range(self.low, self.high + 1):
+            if not self.tagged[line - self.low]:
+                if cached_tokens is not None:
+                    self.tokens_by_line[line] = cached_tokens[line - 1]
+                else:
+                    start_state = cached_states[line - 2] if line > 1 else None
+                    self.tokens_by_line[line] = self.lexer.lex_line(self.lines[line - self.first], start_state)[0]
+
+
+class HighlightWorker:
+    """
+    Runs highlight jobs on a background thread. Only the newest job of each
+    highlighter is kept while it waits, so a burst of edits is lexed once;
+    finished jobs are handed back to the Tk thread through collect().
+    """
+    def __init__(self):
+        self.pending = {} # highlighter -> newest job, in submission order
+        self.running = None
+        self.finished = []
+        self.condition = threading.Condition()
+        threading.Thread(target=self._run, name="highlight-worker", daemon=True).start()
+
+    def submit(self, job):
+        with self.condition:
+            self.pending.pop(job.highlighter, None) # Coalesce with a job that has not started
+            self.pending[job.highlighter] = job
+            self.condition.notify()
+
+    def collect(self):
+        """Returns the jobs finished since the last call."""
+        with self.condition:
+            finished, self.finished = self.finished, []
+        return finished
+
+    def is_idle(self):
+        with self.condition:
+            return not self.pending and self.running is None and not self.finished
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                highlighter = next(iter(self.pending))
+                self.running = self.pending.pop(highlighter)
+            start = time.perf_counter()
+            self.running.run()
+            self.running.run_ms = (time.perf_counter() - start) * 1000
+            with self.condition:
+                self.finished.append(self.running)
+                self.running = None
+
+
+class TokenCache:
+    """
+    Caches complete highlight results (the end state of every line, plus every
+    line's tokens when they were all computed) keyed by language and content hash.
+    Entries live in an in-memory LRU shared by all tabs and, if disk_dir is given,
+    in compressed files there, evicted oldest-first once they exceed disk_limit bytes.
+    Safe to use from the highlight worker thread.
+    """
+    def __init__(self, max_lines=200000, disk_dir=None, disk_limit=64 * 1024 * 1024):
+        self.entries = OrderedDict() # key -> (states, tokens or None), least recently used first
+        self.max_lines = max_lines # Bounds memory: total lines held in memory
+        self.lines = 0
+        self.disk_dir = disk_dir
+        self.disk_limit = disk_limit
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def hasher(file_type):
+        """Returns a hash object to feed content into (UTF-8 encoded) for key_of()."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((HIGHLIGHT_RULES.get(file_type), HIGHLIGHT_CONTINUATIONS.get(file_type))).encode("utf-8"))
+        return digest
+
+    @staticmethod
+    def key_of(file_type, digest):
+        return f"{file_type}-{digest.hexdigest()}"
+
+    @staticmethod
+    def key(file_type, content):
+        """Identifies some content as highlighted by the current rules for file_type."""
+        digest = TokenCache.hasher(file_type)
+        digest.update(content.encode("utf-8", "surrogatepass"))
+        return TokenCache.key_of(file_type, digest)
+
+    def get(self, key):
+        """Returns (states, tokens or None) for a key, or None on a miss."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._read(key)
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, states, tokens=None):
+        entry = (states, tokens)
+        with self.lock:
+            self._remember(key, entry)
+        if self.disk_dir:
+            threading.Thread(target=self._write, args=(key, entry), name="token-cache-writer", daemon=True).start()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'lines': self.lines
+            }
+
+    def _remember(self, key, entry):
+        """Inserts into the memory LRU and evicts until it fits again. Needs the lock."""
+        if key in self.entries:
+            self.lines -= len(self.entries.pop(key)[0])
+        self.entries[key] = entry
+        self.lines += len(entry[0])
+        while self.lines > self.max_lines and len(self.entries) > 1:
+            self.lines -= len(self.entries.popitem(last=False)[1][0])
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key + ".json.z")
+
+    def _read(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as file:
+                states, tokens = json.loads(zlib.decompress(file.read()))
+            os.utime(self._path(key)) # Mark as recently used for eviction
+            return states, tokens
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def _write(self, key, entry):
+        """Stores an entry on disk, then trims the directory to disk_limit."""
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            temp_path = self._path(key) + f".{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(zlib.compress(json.dumps(entry, separators=(',', ':')).encode("utf-8"), 1))
+            os.replace(temp_path, self._path(key))
+
+            files = []
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json.z"):
+                    stat = os.stat(os.path.join(self.disk_dir, name))
+                    files.append((stat.st_mtime, stat.st_size, name))
+            total = sum(size for _, size, _ in files)
+            for _, size, name in sorted(files):
+                if total <= self.disk_limit:
+                    break
+                os.remove(os.path.join(self.disk_dir, name))
+                total -= size
+        except OSError:
+            pass # The disk cache is best effort
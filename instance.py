@@ -0,0 +1,192 @@
+"""
+Command line and single-instance support for Breeze Code.
+
+Launching the editor with files while one is already running hands them to it over
+a Unix socket (forward()) instead of starting a second editor; the running one
+listens with InstanceServer. This module is imported before Tk and the rest of the
+editor, so a forwarding launch stays fast: keep its imports light.
+
+The socket lives in a directory only this user can write to, and both ends check
+that the other one runs as this user where the platform can tell (SO_PEERCRED), so
+another user can neither pose as the running editor nor send it paths to open.
+"""
+import argparse
+import json
+import os
+import socket
+import stat
+import struct
+import threading
+
+SUPPORTED = hasattr(socket, "AF_UNIX") and hasattr(os, "getuid")
+
+
+def parse_target(argument):
+    """
+    Turns FILE or FILE:LINE into (absolute path, line or None). A name that exists as
+    given is taken as a file name even if it ends in :digits.
+    """
+    path, line = argument, None
+    head, separator, tail = argument.rpartition(":")
+    if separator and head and tail.isdigit() and not os.path.exists(argument):
+        path, line = head, int(tail)
+    return os.path.abspath(os.path.expanduser(path)), line
+
+
+def parse_arguments(argv):
+    parser = argparse.ArgumentParser(prog="breeze-code", description="Breeze Code Editor")
+    parser.add_argument("files", nargs="*", metavar="FILE[:LINE]", help="files to open, optionally at a line")
+    parser.add_argument("--new-instance", action="store_true", help="start another editor even if one is running")
+    parser.add_argument("--startup-time", action="store_true", help="print the milliseconds to the first paint and exit")
+    arguments = parser.parse_args(argv)
+    arguments.targets = [parse_target(argument) for argument in arguments.files]
+    return arguments
+
+
+def socket_path(create=False):
+    """
+    The socket of this user's running editor, or None if the directory it would be in
+    is not this user's alone. Without XDG_RUNTIME_DIR (which is private already) it
+    goes in a private directory under TMPDIR or /tmp, created if create is set.
+    """
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if not directory:
+        directory = os.path.join(os.environ.get("TMPDIR") or "/tmp", f"breeze-code-{os.getuid()}")
+        if create:
+            try:
+                os.mkdir(directory, 0o700)
+            except FileExistsError:
+                pass
+            except OSError:
+                return None
+    if not owned_by_us(directory, stat.S_ISDIR):
+        return None
+    return os.path.join(directory, f"breeze-code-{os.getuid()}.sock")
+
+
+def owned_by_us(path, is_type):
+    """Whether path (not followed if a symlink) is of the type is_type tests for, ours, and not writable by others."""
+    try:
+        status = os.lstat(path)
+    except OSError:
+        return False
+    return is_type(status.st_mode) and status.st_uid == os.getuid() and not status.st_mode & 0o022
+
+
+def peer_is_us(connection):
+    """Whether the other end of a connected Unix socket runs as this user; True where that cannot be checked."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True # The socket's private directory and 0600 mode still keep others out
+    credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", credentials)
+    return uid == os.getuid()
+
+
+def forward(targets, timeout=2.0):
+    """
+    Sends [(path, line), ...] to the running editor, which opens them and comes to the
+    front (also for none). Returns False if there is none (or it did not answer), in
+    which case the caller starts an editor itself.
+    """
+    return _send({'open': targets}, timeout)
+
+
+def _send(message, timeout):
+    if not SUPPORTED:
+        return False
+    path = socket_path()
+    if path is None or not owned_by_us(path, stat.S_ISSOCK):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(timeout)
+            connection.connect(path)
+            if not peer_is_us(connection):
+                return False
+            connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+            return connection.makefile("rb").readline().strip() == b"ok"
+    except OSError:
+        return False
+
+
+class InstanceServer:
+    """
+    Accepts the targets that later launches forward(), on a background thread, and
+    hands them to the Tk thread through collect().
+    """
+    def __init__(self, listener, path):
+        self.listener = listener
+        self.path = path
+        self.inode = os.stat(path).st_ino # To only remove our own socket on close
+        self.requests = [] # One list of targets per launch
+        self.lock = threading.Lock()
+        threading.Thread(target=self._serve, name="instance-server", daemon=True).start()
+
+    @classmethod
+    def start(cls):
+        """Returns a listening server, or None if another editor is running, the socket directory is not private or sockets are unsupported."""
+        if not SUPPORTED:
+            return None
+        path = socket_path(create=True)
+        if path is None:
+            return None
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177) # Only this user may connect
+        try:
+            try:
+                listener.bind(path)
+            except OSError:
+                if _send({'ping': True}, 2.0): # Someone is answering on it
+                    listener.close()
+                    return None
+                if not owned_by_us(path, stat.S_ISSOCK):
+                    listener.close()
+                    return None
+                os.unlink(path) # Left behind by an editor that crashed
+                listener.bind(path)
+        except OSError:
+            listener.close()
+            return None
+        finally:
+            os.umask(old_umask)
+        listener.listen(8)
+        return cls(listener, path)
+
+    def collect(self):
+        """Returns the requests received since the last call, each a list of targets (maybe empty)."""
+        with self.lock:
+            requests, self.requests = self.requests, []
+        return requests
+
+    def close(self):
+        self.listener.close()
+        try:
+            if os.stat(self.path).st_ino == self.inode:
+                os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return # Closed
+            with connection:
+                try:
+                    if not peer_is_us(connection):
+                        continue
+                    connection.settimeout(2.0)
+                    request = json.loads(connection.makefile("rb").readline())
+                    if request.get('ping'):
+                        connection.sendall(b"ok\n")
+                        continue
+                    targets = [(str(path), int(line) if line else None) for path, line in request['open']]
+                except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                    continue
+                with self.lock:
+                    self.requests.append(targets)
+                try:
+                    connection.sendall(b"ok\n")
+                except OSError:
+                    pass
@@ -0,0 +1,172 @@
+"""
+Performance instrumentation for Breeze Code.
+
+METRICS collects timings of the editor's hot paths into rolling histograms (the
+most recent samples of each metric), from any thread. ProfileCapture wraps
+cProfile and tracemalloc for a session started and stopped from the UI, and
+build_report() puts both into a JSON-serializable dict for bug reports.
+Nothing here needs Tk.
+"""
+import io
+import platform
+import re
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+from highlighting import HIGHLIGHT_RULES
+
+
+class RollingHistogram:
+    """Keeps the last `size` samples of one metric (in milliseconds) plus lifetime totals."""
+    def __init__(self, size=2000):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def summary(self):
+        """Returns count, mean and p50/p90/p99/max over the recent samples."""
+        recent = sorted(self.samples)
+        if not recent:
+            return {"count": self.count}
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(len(recent) * p))]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "p99": percentile(0.99),
+            "max": recent[-1]
+        }
+
+
+class Metrics:
+    """Named RollingHistograms; record() and timer() may be called from any thread."""
+    def __init__(self):
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, milliseconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = RollingHistogram()
+            histogram.add(milliseconds)
+
+    @contextmanager
+    def timer(self, name):
+        """Records how long the with-block took under name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def summary(self, name):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            return histogram.summary() if histogram else {"count": 0}
+
+    def snapshot(self):
+        """Returns the summary of every metric, by name."""
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+
+METRICS = Metrics() # Shared by the whole editor
+
+
+class ProfileCapture:
+    """
+    One cProfile + tracemalloc session. cProfile only sees the thread that started
+    it (the Tk thread); time spent in worker threads shows up in METRICS instead.
+    """
+    def __init__(self):
+        self.profile = None
+        self.started_at = None
+        self.result = None # Filled in by stop()
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def start(self):
+        import cProfile # Deferred, like pstats below: only needed while profiling, and slow to import
+        self.result = None
+        self.started_at = time.time()
+        tracemalloc.start()
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self, top=40):
+        """Ends the session and keeps the `top` functions and allocation sites."""
+        import pstats
+        self.profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        functions = []
+        for (file_name, line, function), (calls, _, own_time, cumulative_time, _) in stats.stats.items():
+            functions.append({
+                "function": f"{file_name}:{line}({function})",
+                "calls": calls,
+                "own_s": own_time,
+                "cumulative_s": cumulative_time
+            })
+        functions.sort(key=lambda entry: entry["cumulative_s"], reverse=True)
+        allocations = [
+            {"location": str(statistic.traceback), "size_bytes": statistic.size, "count": statistic.count}
+            for statistic in snapshot.statistics("lineno")[:top]
+        ]
+        self.result = {
+            "duration_s": time.time() - self.started_at,
+            "functions": functions[:top],
+            "memory": {"current_bytes": current, "peak_bytes": peak, "top_allocations": allocations}
+        }
+        self.profile = None
+        return self.result
+
+
+def pattern_costs(file_type, lines):
+    """
+    Times each highlighting rule of a language on its own over lines. The lexer runs
+    all rules as one alternation, so this is the only way to see which pattern is
+    expensive. Returns [{pattern, matches, ms}, ...], most expensive first.
+    """
+    costs = []
+    for pattern, _, _ in HIGHLIGHT_RULES.get(file_type, []):
+        compiled = re.compile(pattern)
+        start = time.perf_counter()
+        matches = sum(1 for line in lines for _ in compiled.finditer(line))
+        costs.append({"pattern": pattern, "matches": matches, "ms": (time.perf_counter() - start) * 1000})
+    costs.sort(key=lambda entry: entry["ms"], reverse=True)
+    return costs
+
+
+def build_report(metrics, capture=None, extra=None):
+    """Everything worth attaching to a "the editor is slow" report, as a JSON-ready dict."""
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        },
+        "metrics_ms": metrics.snapshot(),
+        "profile": capture.result if capture is not None else None
+    }
+    report.update(extra or {})
+    return report
@@ -0,0 +1,273 @@
+"""
+Crash recovery for Breeze Code: a journal of the unsaved edits of each tab. Nothing
+here needs Tk.
+
+A journal starts with a base (the file the tab was loaded from, identified by its
+content fingerprint, or the full text) followed by the edits made since, as Tk
+insert/delete operations with numeric "line.column" indices. The editor only appends
+edits to an in-memory list; a JournalWriter thread writes them out every
+FLUSH_INTERVAL seconds (sooner after FLUSH_EDITS edits) and, once a journal has grown
+past COMPACT_EDITS edits, replays it and rewrites it as a new base.
+
+Each editor process keeps its journals in a directory named after its pid. A
+directory whose process is gone was left behind by a crash; recover() replays its
+journals so the editor can offer them on the next start.
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import deque
+
+from fileio import content_digest, write_file_atomically
+
+
+class TextModel:
+    """Just enough of a Text widget to replay journaled edits (the text without Tk's final newline)."""
+    def __init__(self, text):
+        self.lines = text.split("\n")
+
+    def position(self, index):
+        """(line, column) of a "line.column" index, clamped the way Tk clamps indices."""
+        line, column = (int(part) for part in index.split("."))
+        if line > len(self.lines):
+            return len(self.lines), len(self.lines[-1])
+        line = max(line, 1)
+        return line, min(column, len(self.lines[line - 1]))
+
+    def insert(self, index, text):
+        line, column = self.position(index)
+        current = self.lines[line - 1]
+        new_lines = (current[:column] + text + current[column:]).split("\n")
+        self.lines[line - 1:line] = new_lines
+
+    def delete(self, start, end=None):
+        first_line, first_column = self.position(start)
+        if end is None: # One character; the newline at the end of a line joins the next one
+            last_line, last_column = first_line, first_column + 1
+            if last_column > len(self.lines[first_line - 1]):
+                if first_line == len(self.lines):
+                    return
+                last_line, last_column = first_line + 1, 0
+        else:
+            last_line, last_column = self.position(end)
+        if (last_line, last_column) <= (first_line, first_column):
+            return
+        self.lines[first_line - 1:last_line] = [self.lines[first_line - 1][:first_column] + self.lines[last_line - 1][last_column:]]
+
+    def apply(self, edit):
+        if edit[0] == "i":
+            self.insert(edit[1], edit[2])
+        elif edit[0] == "d":
+            self.delete(edit[1], edit[2])
+
+    def text(self):
+        return "\n".join(self.lines)
+
+
+class Journal:
+    """
+    The journal of one tab. base describes the text before the first edit: {'file':
+    path, 'digest': hex} when that was the saved file, or {'text': ...}; path and name
+    say where the text belongs. Edits are ["i", index, text] and ["d", index, index or None].
+    """
+    def __init__(self, path, name, base):
+        self.id = uuid.uuid4().hex
+        self.header = dict(base, path=path, name=name)
+        self.pending = deque() # Edits not written yet; appended and popped from different threads
+        self.written = 0 # Edits in the file since its base
+        self.file_path = None # Set by the JournalWriter
+        self.discarded = False
+        # Set by the JournalWriter when the file base no longer matches the disk, so the
+        # journal can neither be compacted nor replayed; the editor then starts it over
+        self.stale = False
+
+
+class JournalWriter:
+    """Writes, compacts and deletes the journals of this process on a background thread."""
+    FLUSH_INTERVAL = 1.0 # Seconds
+    FLUSH_EDITS = 200 # Write sooner once this many edits are pending
+    COMPACT_EDITS = 5000 # Rewrite a journal as a new base past this many edits
+
+    def __init__(self, directory):
+        self.directory = os.path.join(directory, str(os.getpid()))
+        self.journals = []
+        self.pending_edits = 0
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.flush_wanted = False
+        self.passes_started = 0 # Writing passes, for flush() to wait on
+        self.passes_done = 0
+        self.thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self.thread.start()
+
+    def add(self, journal):
+        journal.file_path = os.path.join(self.directory, journal.id + ".jsonl")
+        with self.condition:
+            self.journals.append(journal)
+            self.condition.notify_all()
+
+    def record(self, journal, edit):
+        """Queues an edit; cheap enough to call for every keystroke."""
+        journal.pending.append(edit)
+        self.pending_edits += 1
+        if self.pending_edits >= self.FLUSH_EDITS:
+            with self.condition:
+                self.condition.notify_all()
+
+    def discard(self, journal):
+        """Drops a journal whose edits are saved (or not wanted); its file is deleted."""
+        journal.discarded = True
+        with self.condition:
+            self.condition.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Blocks until everything added or recorded so far is written; returns False on timeout."""
+        with self.condition:
+            target = self.passes_started + 1 # A pass already running may have missed the latest journals
+            self.flush_wanted = True
+            self.condition.notify_all()
+            return self.condition.wait_for(lambda: self.passes_done >= target, timeout)
+
+    def close(self, discard_all=False):
+        """Writes everything out and stops; with discard_all, deletes every journal instead."""
+        with self.condition:
+            if discard_all:
+                for journal in self.journals:
+                    journal.discarded = True
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join()
+        if discard_all:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _run(self):
+        while True:
+            with self.condition:
+                if not self.stopped and not self.flush_wanted:
+                    self.condition.wait(self.FLUSH_INTERVAL)
+                self.flush_wanted = False
+                self.passes_started += 1
+                stopped = self.stopped
+                journals = list(self.journals)
+                self.pending_edits = 0
+            for journal in journals:
+                try:
+                    self._flush(journal)
+                except (OSError, ValueError):
+                    pass # Try again next time; recovery is best effort
+            with self.condition:
+                self.journals = [journal for journal in self.journals if not journal.discarded]
+                self.passes_done += 1
+                self.condition.notify_all()
+            if stopped:
+                return
+
+    def _flush(self, journal):
+        if journal.discarded:
+            if journal.file_path and os.path.exists(journal.file_path):
+                os.unlink(journal.file_path)
+            return
+        edits = [journal.pending.popleft() for _ in range(len(journal.pending))]
+        if not edits and os.path.exists(journal.file_path):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        if not os.path.exists(journal.file_path):
+            write_file_atomically(journal.file_path, json.dumps(journal.header) + "\n")
+            journal.written = 0
+        with open(journal.file_path, "a", encoding="utf-8") as file:
+            file.write("".join(json.dumps(edit) + "\n" for edit in edits))
+            file.flush()
+            os.fsync(file.fileno())
+        journal.written += len(edits)
+        if journal.written > self.COMPACT_EDITS and not journal.stale:
+            self._compact(journal)
+
+    def _compact(self, journal):
+        """Replays the journal and makes the result its new base."""
+        header, text = replay(journal.file_path)
+        if text is None: # The file changed on disk since the tab loaded it
+            journal.stale = True
+            return
+        journal.header = {'text': text, 'path': header.get('path'), 'name': header.get('name')}
+        write_file_atomically(journal.file_path, json.dumps(journal.header) + "\n")
+        journal.written = 0
+
+
+def replay(journal_path):
+    """
+    Returns (header, text) of a journal file, or (header, None) if its base cannot be
+    rebuilt (the file it refers to changed). A damaged last line (a crash while
+    writing) ends the replay.
+    """
+    with open(journal_path, "r", encoding="utf-8") as file:
+        lines = file.read().split("\n")
+    header = json.loads(lines[0])
+    if 'text' in header:
+        base = header['text']
+    else:
+        try:
+            with open(header['file'], "r", encoding="utf-8") as file:
+                base = file.read()
+        except (OSError, ValueError):
+            return header, None
+        if content_digest(base).hex() != header['digest']:
+            return header, None
+    model = TextModel(base)
+    for line in lines[1:]:
+        try:
+            edit = json.loads(line)
+        except ValueError:
+            break
+        model.apply(edit)
+    return header, model.text()
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True # Exists, but belongs to someone else
+    return True
+
+
+def orphaned_journals(directory):
+    """Journal files left behind by editor processes that are no longer running."""
+    found = []
+    try:
+        entries = os.listdir(directory)
+    except OSError:
+        return found
+    for entry in entries:
+        if not entry.isdigit() or int(entry) == os.getpid() or process_alive(int(entry)):
+            continue
+        process_directory = os.path.join(directory, entry)
+        for name in sorted(os.listdir(process_directory)):
+            if name.endswith(".jsonl"):
+                found.append(os.path.join(process_directory, name))
+    return found
+
+
+def recover(directory):
+    """
+    Replays the journals left behind by crashed editors. Returns [(path, name, text)] of
+    those that could be rebuilt; path is None for Untitled tabs.
+    """
+    recovered = []
+    for journal_path in orphaned_journals(directory):
+        try:
+            header, text = replay(journal_path)
+        except (OSError, ValueError, KeyError, IndexError):
+            continue
+        if text is not None:
+            recovered.append((header.get('path'), header.get('name'), text))
+    return recovered
+
+
+def remove_orphans(directory):
+    """Deletes the journals of crashed editors (once they were recovered or declined)."""
+    for journal_path in orphaned_journals(directory):
+        shutil.rmtree(os.path.dirname(journal_path), ignore_errors=True)
@@ -0,0 +1,544 @@
+"""
+Text search for Breeze Code: regex matches in strings and files, directory searches
+that scan files in batches on a process pool, and an optional trigram index that
+narrows repeated searches of a tree down to the files that can contain a match.
+Nothing here needs Tk; the functions run in the pool's worker processes.
+"""
+import os
+import re
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from concurrent.futures import FIRST_COMPLETED, wait
+from functools import lru_cache
+
+from fileio import stat_key, write_file_atomically
+
+SKIPPED_DIRECTORIES = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".tox", ".mypy_cache", ".pytest_cache"}
+MAX_FILE_SIZE = 8 * 1024 * 1024 # Larger files are not searched
+MAX_MATCHES_PER_FILE = 1000
+MAX_LINE_TEXT = 300 # Characters of the matching line kept for display
+
+
+def compile_query(query, regex=False, match_case=False, whole_word=False):
+    """
+    Compiles what the user typed into a pattern. ^ and $ match at every line.
+    Raises re.error for an invalid regular expression.
+    """
+    pattern = query if regex else re.escape(query)
+    if whole_word:
+        pattern = rf"\b(?:{pattern})\b"
+    return re.compile(pattern, re.MULTILINE | (0 if match_case else re.IGNORECASE))
+
+
+@lru_cache(maxsize=16)
+def _compiled(pattern, flags):
+    return re.compile(pattern, flags)
+
+
+def find_matches(regex, text, limit=None):
+    """
+    Returns [(line, column, end_line, end_column, line_text), ...] for the non-empty
+    matches of regex in text; lines are 1-based, columns 0-based.
+    """
+    matches = []
+    line = 1
+    line_start = 0
+    scanned = 0 # Newlines before here are counted in line
+    for match in regex.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue # Zero-width matches (^, \b, ...) are nothing to show or replace
+        newlines = text.count("\n", scanned, start)
+        if newlines:
+            line += newlines
+            line_start = text.rindex("\n", scanned, start) + 1
+        scanned = start
+        end_line = line + text.count("\n", start, end)
+        end_column = end - (text.rindex("\n", start, end) + 1 if end_line != line else line_start)
+        line_end = text.find("\n", start)
+        line_text = text[line_start:line_end if line_end != -1 else len(text)][:MAX_LINE_TEXT]
+        matches.append((line, start - line_start, end_line, end_column, line_text))
+        if limit is not None and len(matches) >= limit:
+            break
+    return matches
+
+
+def read_text(file_path, translate=True):
+    """
+    Returns a file's text with newlines translated like open(path, "r") does (unless
+    translate is False), or None for files that are too large, binary or not UTF-8.
+    """
+    try:
+        if os.path.getsize(file_path) > MAX_FILE_SIZE:
+            return None
+        with open(file_path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    if b"\0" in data[:8192]:
+        return None
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    if translate and "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+NEWLINE = re.compile(r'\r\n|\r|\n')
+
+
+def iter_files(root):
+    """Yields the paths of all regular files under root, skipping VCS and tool directories."""
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIPPED_DIRECTORIES:
+                        pending.append(entry.path)
+                elif entry.is_file():
+                    yield entry.path
+            except OSError:
+                continue
+
+
+# --- Trigram Index ---
+def signature_bits(trigram_count):
+    """Size of a file's signature: about two bits per distinct trigram, 512 to 65536 bits."""
+    bits = 512
+    while bits < 2 * trigram_count and bits < 65536:
+        bits *= 2
+    return bits
+
+
+def trigram_positions(trigrams, bits):
+    return {zlib.crc32(trigram.encode("utf-8", "surrogatepass")) % bits for trigram in trigrams}
+
+
+def trigram_signature(text):
+    """
+    Returns (bits, value): every lowercased trigram of text hashed into a bit set of
+    `bits` bits, stored as an int. A query can only match if all of its trigrams' bits
+    are set; different trigrams may share a bit, so the reverse does not hold.
+    """
+    lowered = text.lower()
+    trigrams = {lowered[index:index + 3] for index in range(len(lowered) - 2)}
+    bits = signature_bits(len(trigrams))
+    bitmap = bytearray(bits // 8)
+    for position in trigram_positions(trigrams, bits):
+        bitmap[position >> 3] |= 1 << (position & 7)
+    return bits, int.from_bytes(bitmap, "little")
+
+
+QUANTIFIERS = "*?+{"
+
+
+def required_literals(pattern, regex=True):
+    """
+    Returns literal strings that every match of the query must contain. Conservative:
+    groups and classes contribute nothing, which only makes the index filter less
+    selective, and a pattern with anything the parser does not fully understand
+    (alternation, verbose mode, an unterminated class or group) returns [], so every
+    file is scanned.
+    """
+    if not regex:
+        return [pattern]
+    if "|" in pattern or re.compile(pattern).flags & re.VERBOSE:
+        return []
+    runs = []
+    current = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            if index + 1 == len(pattern):
+                return []
+            escaped = pattern[index + 1]
+            if escaped.isalnum() or escaped == "_": # \w, \d, \b, \x41, \101, back-references, \n, ...
+                index = _skip_escape(pattern, index)
+                if index is None:
+                    return []
+                runs.append("".join(current))
+                current = []
+                continue
+            current.append(escaped)
+            index += 2
+        elif char in "([":
+            # Skip the whole group or class; it may be optional or match anything
+            runs.append("".join(current))
+            current = []
+            index = _skip_group(pattern, index) if char == "(" else _skip_class(pattern, index)
+            if index is None:
+                return []
+            while index < len(pattern) and pattern[index] in QUANTIFIERS:
+                index = _skip_quantifier(pattern, index)
+            continue
+        elif char in QUANTIFIERS:
+            # The previous character may repeat; with * ? {0,} it may be absent altogether
+            if char != "+" and current:
+                current.pop()
+            runs.append("".join(current))
+            current = []
+            index = _skip_quantifier(pattern, index)
+            continue
+        elif char in ".^$":
+            runs.append("".join(current))
+            current = []
+            index += 1
+            continue
+        else:
+            current.append(char)
+            index += 1
+    runs.append("".join(current))
+    return [run for run in runs if len(run) >= 3]
+
+
+ESCAPE_DIGITS = {"x": 2, "u": 4, "U": 8} # Hex digits after \x, \u and \U
+OCTAL_DIGITS = "01234567"
+
+
+def _skip_escape(pattern, index):
+    """
+    Returns the index after the escape sequence starting at index (a backslash followed
+    by a letter, digit or _), or None if it is malformed.
+    """
+    letter = pattern[index + 1]
+    index += 2
+    if letter in ESCAPE_DIGITS:
+        return index + ESCAPE_DIGITS[letter] if index + ESCAPE_DIGITS[letter] <= len(pattern) else None
+    if letter == "N":
+        closing = pattern.find("}", index)
+        return closing + 1 if pattern.startswith("{", index) and closing != -1 else None
+    if letter == "0": # Octal: \0 plus up to two more digits
+        end = index
+        while end < min(len(pattern), index + 2) and pattern[end] in OCTAL_DIGITS:
+            end += 1
+        return end
+    if letter.isdigit():
+        # Three octal digits are a character (\101), otherwise one or two digits a back-reference
+        if letter in OCTAL_DIGITS and len(pattern) >= index + 2 and pattern[index] in OCTAL_DIGITS and pattern[index + 1] in OCTAL_DIGITS:
+            return index + 2
+        return index + 1 if index < len(pattern) and pattern[index].isdigit() else index
+    return index
+
+
+def _skip_class(pattern, index):
+    """Returns the index after the character class starting at index, or None if it is not closed."""
+    index += 1
+    if index < len(pattern) and pattern[index] == "^":
+        index += 1
+    if index < len(pattern) and pattern[index] == "]": # A ] right after [ or [^ is a literal
+        index += 1
+    while index < len(pattern):
+        if pattern[index] == "\\":
+            index += 2
+        elif pattern[index] == "]":
+            return index + 1
+        else:
+            index += 1
+    return None
+
+
+def _skip_group(pattern, index):
+    """Returns the index after the group starting at index (classes inside may hold parentheses), or None if it is not closed."""
+    depth = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == "[":
+            index = _skip_class(pattern, index)
+            if index is None:
+                return None
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+        index += 1
+    return None
+
+
+def _skip_quantifier(pattern, index):
+    """Returns the index after the quantifier at index, including a lazy/possessive suffix."""
+    if pattern[index] == "{":
+        closing = pattern.find("}", index)
+        index = closing + 1 if closing != -1 else index + 1
+    else:
+        index += 1
+    if index < len(pattern) and pattern[index] in "?+":
+        index += 1
+    return index
+
+
+def query_trigrams(literals):
+    trigrams = set()
+    for literal in literals:
+        lowered = literal.lower()
+        trigrams.update(lowered[index:index + 3] for index in range(len(lowered) - 2))
+    return trigrams
+
+
+class TrigramIndex:
+    """
+    Trigram signatures (see trigram_signature) of every file in one directory tree,
+    keyed by path with the (mtime_ns, size) they were computed for. Filled in by the
+    first indexed DirectorySearch of the tree, then kept up to date by re-scanning
+    only the files whose stat changed.
+
+    Searches do not walk the tree: once the index is ready, a background thread walks
+    it every REFRESH_INTERVAL seconds and collects the paths whose stat changed, and
+    the editor reports the files it writes itself (mark_stale()). A search scans
+    those stale paths along with the candidates.
+    """
+    REFRESH_INTERVAL = 30.0 # Seconds between walks of the tree
+
+    def __init__(self, root):
+        self.root = root
+        self.files = {} # path -> (stat_key, bits, value)
+        self.ready = False # True once every file of the tree has been indexed
+        self.stale = set() # Paths changed since they were indexed, to be scanned by the next search
+        self.refresher = None
+        self.lock = threading.Lock()
+
+    def set_ready(self):
+        """Marks the index complete and starts refreshing it in the background."""
+        self.ready = True
+        if self.refresher is None:
+            self.refresher = threading.Thread(target=self._refresh, name="trigram-refresh", daemon=True)
+            self.refresher.start()
+
+    def mark_stale(self, path):
+        """A file under root was written; the next search scans it again."""
+        if path.startswith(os.path.join(self.root, "")):
+            with self.lock:
+                self.stale.add(path)
+
+    def candidates(self, trigrams):
+        """Paths of the files that may contain all trigrams."""
+        masks = {}
+        with self.lock:
+            if not trigrams:
+                return list(self.files)
+            result = []
+            for path, (_, bits, value) in self.files.items():
+                mask = masks.get(bits)
+                if mask is None:
+                    mask = masks[bits] = sum(1 << position for position in trigram_positions(trigrams, bits))
+                if value & mask == mask:
+                    result.append(path)
+            return result
+
+    def update(self, path, key, signature):
+        with self.lock:
+            if signature is None:
+                self.files.pop(path, None) # Binary, too large or unreadable: never a match
+            else:
+                self.files[path] = (key, *signature)
+
+    def changes(self):
+        """Returns the stale paths and forgets them; the caller scans and re-indexes them."""
+        with self.lock:
+            stale, self.stale = self.stale, set()
+        return list(stale)
+
+    def walk(self):
+        """
+        Walks the tree: paths that are new or whose stat changed since they were
+        indexed become stale, indexed paths that no longer exist are dropped.
+        """
+        with self.lock:
+            known = {path: entry[0] for path, entry in self.files.items()}
+        changed = []
+        for path in iter_files(self.root):
+            key = known.pop(path, None)
+            if key is None or key != stat_key(path):
+                changed.append(path)
+        with self.lock:
+            self.stale.update(changed)
+        self.remove(known)
+
+    def _refresh(self):
+        while True:
+            time.sleep(self.REFRESH_INTERVAL)
+            try:
+                self.walk()
+            except Exception:
+                pass # The next walk tries again; the stale paths found so far are kept
+
+    def remove(self, paths):
+        with self.lock:
+            for path in paths:
+                self.files.pop(path, None)
+
+
+# --- Pool Workers ---
+def scan_files(paths, pattern, flags, with_signatures):
+    """
+    Searches a batch of files (in a pool worker). Returns [(path, key, signature,
+    matches), ...]; signature is None unless with_signatures is set.
+    """
+    regex = _compiled(pattern, flags)
+    results = []
+    for path in paths:
+        key = stat_key(path) # Before reading, so a later change is noticed next time
+        text = read_text(path)
+        if text is None:
+            results.append((path, key, None, []))
+            continue
+        signature = trigram_signature(text) if with_signatures else None
+        results.append((path, key, signature, find_matches(regex, text, MAX_MATCHES_PER_FILE)))
+    return results
+
+
+def replace_in_file(path, pattern, flags, replacement, literal, limit=None, key=None):
+    """
+    Replaces the non-empty matches in a file (in a pool worker), only the first limit
+    of them if given, like find_matches() lists them; returns the number replaced.
+    With key (the file's stat_key when it was searched), a file that changed since
+    is left alone and None is returned: its matches may not be the ones listed.
+    Matching sees the text with translated newlines, like the search did; the file
+    keeps its own ("\r\n" or "\r"), which newlines in replacements also get.
+    """
+    if key is not None and stat_key(path) != key:
+        return None
+    raw = read_text(path, translate=False)
+    if raw is None:
+        return 0
+    regex = _compiled(pattern, flags)
+    # Each newline of raw: its offset in the translated text and the characters it has there
+    newlines = [(match.start(), match.end() - match.start()) for match in NEWLINE.finditer(raw)] if "\r" in raw else []
+    text = raw.replace("\r\n", "\n").replace("\r", "\n") if newlines else raw
+    starts = [] # Of the newlines in text, for bisect
+    extra = [0] # Characters raw has more than text before each newline, and after all of them
+    for start, length in newlines:
+        starts.append(start - extra[-1])
+        extra.append(extra[-1] + length - 1)
+    newline = raw[newlines[0][0]:sum(newlines[0])] if newlines else "\n"
+
+    def raw_offset(offset):
+        return offset + extra[bisect_left(starts, offset)]
+
+    pieces = []
+    copied = 0 # Offset in raw up to which pieces hold it
+    for match in regex.finditer(text):
+        if match.end() == match.start():
+            continue
+        if limit is not None and len(pieces) // 2 >= limit:
+            break
+        start, end = raw_offset(match.start()), raw_offset(match.end())
+        new = replacement if literal else match.expand(replacement)
+        pieces += [raw[copied:start], new.replace("\n", newline) if newline != "\n" else new]
+        copied = end
+    count = len(pieces) // 2
+    if count:
+        write_file_atomically(path, "".join(pieces) + raw[copied:])
+    return count
+
+
+class DirectorySearch:
+    """
+    Searches a directory tree on a process pool from a background thread. Files are
+    sent in batches and at most a few batches are in flight, so results stream in
+    while the tree is still being walked; collect() hands them to the Tk thread.
+
+    With a TrigramIndex that is ready, only its candidate files are read, then the
+    files it knows to have changed since they were indexed; those are scanned (and
+    re-indexed) too. Without a ready index every file is scanned, and the index,
+    if given, is built along the way.
+    """
+    BATCH_SIZE = 32
+
+    def __init__(self, executor, workers, root, regex, literals, index=None):
+        self.executor = executor
+        self.workers = workers
+        self.root = root
+        self.pattern, self.flags = regex.pattern, regex.flags
+        self.literals = literals
+        self.index = index
+        self.results = [] # (path, line, column, end_line, end_column, line_text)
+        self.files_scanned = 0
+        self.used_index = False
+        self.finished = False
+        self.error = None
+        self.cancelled = threading.Event()
+        self.lock = threading.Lock()
+        self.started_at = time.perf_counter()
+        self.elapsed = None
+        self.reported = set() # Paths whose matches were already reported
+        self.keys = {} # path -> stat_key of each file with matches, as it was searched
+        threading.Thread(target=self._run, name="directory-search", daemon=True).start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def collect(self):
+        """Returns the results found since the last call."""
+        with self.lock:
+            results, self.results = self.results, []
+        return results
+
+    def _run(self):
+        try:
+            index = self.index
+            if index is not None and index.ready:
+                self.used_index = True
+                self._scan(index.candidates(query_trigrams(self.literals)), with_signatures=False)
+                self._scan(index.changes(), with_signatures=True)
+            else:
+                self._scan(iter_files(self.root), with_signatures=index is not None)
+                if index is not None and not self.cancelled.is_set():
+                    index.set_ready()
+        except Exception as e: # Reported in the dialog; a dead pool must not hang the search
+            self.error = e
+        self.elapsed = time.perf_counter() - self.started_at
+        self.finished = True
+
+    def _scan(self, paths, with_signatures):
+        in_flight = set()
+        batch = []
+        paths = iter(paths)
+        exhausted = False
+        while not self.cancelled.is_set():
+            while not exhausted and len(in_flight) < 2 * self.workers:
+                for path in paths:
+                    batch.append(path)
+                    if len(batch) == self.BATCH_SIZE:
+                        break
+                else:
+                    exhausted = True
+                if batch:
+                    in_flight.add(self.executor.submit(scan_files, batch, self.pattern, self.flags, with_signatures))
+                    batch = []
+            if not in_flight:
+                return
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._record(future.result(), with_signatures)
+        for future in in_flight:
+            future.cancel()
+
+    def _record(self, file_results, with_signatures):
+        found = []
+        for path, key, signature, matches in file_results:
+            if with_signatures and self.index is not None:
+                self.index.update(path, key, signature)
+            if matches and path not in self.reported:
+                self.reported.add(path)
+                self.keys[path] = key
+                found += [(path,) + match for match in matches]
+        with self.lock:
+            self.files_scanned += len(file_results)
+            self.results += found
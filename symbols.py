@@ -0,0 +1,452 @@
+"""
+Symbol index of Breeze Code: the definitions in each file (Python def/class, JS
+function/class and top-level let/const/var, CSS selectors, HTML ids), for the outline
+panel, Go to Symbol and Quick Open. Nothing here needs Tk.
+
+Symbols are found with the highlighting lexers (highlighting.py): some come straight
+from tokens (python_class, js_variable, css_selector), the others from
+SYMBOL_PATTERNS, and anything inside a comment or string is ignored. A SymbolTable
+keeps each line's lexer state, so an edit only re-scans the lines it touched (plus
+the lines after it whose state changed, e.g. when a docstring was opened).
+
+A SymbolIndexer thread keeps a SymbolTable per open tab, fed with the tab's edits,
+and indexes directory trees, reusing a per-directory cache on disk for files that
+did not change. FuzzyMatcher answers Quick Open queries.
+"""
+import hashlib
+import json
+import operator
+import os
+import re
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from collections import deque
+from functools import lru_cache
+from itertools import accumulate, islice, repeat
+
+from fileio import stat_key
+from highlighting import HIGHLIGHT_CONTINUATIONS, HIGHLIGHT_RULES, file_type_for, lexer_for
+from search import iter_files, read_text
+
+# Tokens that name a symbol: tag -> kind
+SYMBOL_TOKENS = {"python_class": "class", "js_variable": "variable", "css_selector": "selector"}
+# Definitions the lexer has no token for: file type -> [(pattern with the name as group 1, kind)]
+SYMBOL_PATTERNS = {
+    "py": [(r'\b(?:async\s+)?def\s+(\w+)', "function")],
+    "js": [(r'\bfunction\s*\*?\s*([\w$]+)', "function"), (r'\bclass\s+([\w$]+)', "class")],
+    "html": [(r'\bid\s*=\s*["\']([^"\']+)', "id")],
+    "css": []
+}
+# Lines that cannot hold a symbol are only run through LineLexer.end_state
+SYMBOL_CANDIDATES = {
+    "py": r'\b(?:def|class)\b',
+    "js": r'\b(?:function|class|let|const|var)\b',
+    "html": r'\bid\s*=',
+    "css": r'\{'
+}
+HIDDEN_TAG_SUFFIXES = ("_comment", "_string") # Definitions in these are not symbols
+
+
+class SymbolTable:
+    """
+    The symbols of one text, updated line by line. symbols() returns
+    [(name, kind, line, indent), ...] in line order; line is 1-based and indent is
+    the line's leading whitespace, which the outline nests by.
+    """
+    def __init__(self, file_type, text=""):
+        self.file_type = file_type
+        self.lexer = lexer_for(file_type)
+        self.candidates = re.compile(SYMBOL_CANDIDATES[file_type])
+        # Most lines neither hold a symbol nor open a multi-line construct: one search tells
+        self.plain = re.compile("|".join(filter(None, (SYMBOL_CANDIDATES[file_type], self.lexer.openers and self.lexer.openers.pattern))))
+        self.patterns = [(re.compile(pattern), kind) for pattern, kind in SYMBOL_PATTERNS[file_type]]
+        self.lines = []
+        self.states = [] # Lexer state at the end of each line
+        self.found = [] # Symbols of each line: () or ((name, kind, indent), ...)
+        self.edit(1, 0, text.split("\n"))
+
+    def edit(self, first, old_last, new_lines):
+        """Lines first..old_last (1-based; old_last = first - 1 for none) were replaced by new_lines."""
+        low = first - 1
+        self.lines[low:old_last] = new_lines
+        self.states[low:old_last] = [False] * len(new_lines) # Never equal to a real state
+        self.found[low:old_last] = [()] * len(new_lines)
+        state = self.states[low - 1] if low > 0 else None
+        index = low
+        # Re-scan the new lines, then go on until a line ends in the state it ended in before
+        while index < len(self.lines):
+            old_state = self.states[index]
+            self.found[index], state = self._scan(self.lines[index], state)
+            self.states[index] = state
+            index += 1
+            if index >= low + len(new_lines) and state == old_state:
+                break
+
+    def symbols(self):
+        return [(name, kind, line, indent) for line, found in enumerate(self.found, 1) if found for name, kind, indent in found]
+
+    def _scan(self, line, state):
+        if state is None and not self.plain.search(line):
+            return (), None
+        if state is not None or not self.candidates.search(line):
+            return (), self.lexer.end_state(line, state)
+        tokens, end_state = self.lexer.lex_line(line, state)
+        hidden = [(start, end) for tag, start, end in tokens if tag.endswith(HIDDEN_TAG_SUFFIXES)]
+        indent = len(line) - len(line.lstrip())
+        found = []
+        for tag, start, end in tokens:
+            kind = SYMBOL_TOKENS.get(tag)
+            if kind == "variable" and indent: # Only top-level let/const/var; the rest are locals
+                continue
+            if kind is not None and line[start:end].strip():
+                found.append((start, line[start:end].strip(), kind))
+        for pattern, kind in self.patterns:
+            for match in pattern.finditer(line):
+                if not any(start <= match.start() < end for start, end in hidden):
+                    found.append((match.start(), match.group(1), kind))
+        found.sort()
+        return tuple((name, kind, indent) for _, name, kind in found), end_state
+
+
+def indexable(file_type):
+    return file_type in SYMBOL_PATTERNS and lexer_for(file_type) is not None
+
+
+PROJECT_MARKERS = (".git", ".hg", ".svn", "pyproject.toml", "setup.py", "package.json")
+
+
+def project_root(file_path):
+    """The directory tree Quick Open searches for a file: its repository or project, else its directory."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    candidate = directory
+    while True:
+        if any(os.path.exists(os.path.join(candidate, marker)) for marker in PROJECT_MARKERS):
+            return candidate
+        parent = os.path.dirname(candidate)
+        if parent == candidate:
+            return directory
+        candidate = parent
+
+
+class FuzzyMatcher:
+    """
+    Matches what the user types against a fixed list of names, shortest first, so
+    each query is a few scans in C instead of a Python loop over every name: first
+    names that start with the query, then names that contain it (str.find over all
+    names in one string, each after a newline), then names that contain its
+    characters in order. Scanning stops as soon as enough results are found, and
+    within a tier shorter names come first.
+
+    The last tier is a regular expression, which is slow to run over everything, so
+    it only sees the names that contain all the query's characters, in growing
+    batches (see subsequence_rows()).
+    """
+    FIRST_BATCH = 1000
+    MAX_BATCH = 16000
+
+    def __init__(self, names):
+        self.order = sorted(range(len(names)), key=lambda index: len(names[index]))
+        self.lowered = lowered = [names[index].lower().replace("\n", " ") for index in self.order]
+        self.lengths = [len(name) for name in lowered]
+        self.starts = list(accumulate((length + 1 for length in self.lengths), initial=1))[:-1] # Of each name in blob
+        self.blob = "".join("\n" + name for name in lowered)
+        self.narrowed = None # (query, rows) of the last query that found all its matches
+        self.containing = {} # character -> rows_containing(character)
+
+    def __len__(self):
+        return len(self.order)
+
+    def search(self, query, limit=100):
+        """Returns [((tier, length), index into names), ...] of the best matches, best first."""
+        query = query.lower()
+        if not query:
+            return [((0, self.lengths[row]), self.order[row]) for row in range(min(limit, len(self.order)))]
+        # [^x\n]*x takes the first x, which is all a subsequence test needs: no backtracking,
+        # and one attempt per name since the pattern starts at the newline before it
+        subsequence = _compiled("\n" + "".join(f"[^{re.escape(character)}\n]*{re.escape(character)}" for character in query))
+        found = {} # row -> tier
+        if self.narrowed is not None and query.startswith(self.narrowed[0]):
+            # Typing on: only names that matched the shorter query can match
+            for row in self.narrowed[1]:
+                name = self.lowered[row]
+                tier = 0 if name.startswith(query) else 1 if query in name else 2 if subsequence.match("\n" + name) else None
+                if tier is not None:
+                    found[row] = tier
+        else:
+            for tier, literal in enumerate(("\n" + query, query)): # str.find is much faster than re here
+                position = self.blob.find(literal)
+                while position != -1 and len(found) <= limit:
+                    row = bisect_right(self.starts, position + len(literal) - 1) - 1 # The last character found is in the name
+                    found.setdefault(row, tier)
+                    position = self.blob.find(literal, self.starts[row] + self.lengths[row]) # Next name
+            if len(found) <= limit:
+                for row in self.subsequence_rows(query, subsequence):
+                    found.setdefault(row, 2)
+                    if len(found) > limit:
+                        break
+        # Only a scan that ran to the end knows every match
+        self.narrowed = (query, list(found)) if len(found) <= limit else None
+        return sorted(((tier, self.lengths[row]), self.order[row]) for row, tier in found.items())[:limit]
+
+    def prepare(self):
+        """Does the per-character work of subsequence_rows() for every character up front (for background threads)."""
+        for character in set(self.blob) - {"\n"}:
+            self.rows_containing(character)
+
+    def rows_containing(self, character):
+        """An int with byte r set to 1 if name r contains character."""
+        bits = self.containing.get(character)
+        if bits is None: # Computed once per character, in C
+            bits = self.containing[character] = int.from_bytes(bytes(map(operator.contains, self.lowered, repeat(character))), "little")
+        return bits
+
+    def subsequence_rows(self, query, subsequence):
+        """
+        Yields the rows of the names that subsequence matches, shortest first. Only
+        names containing every character of query are tried, a batch at a time.
+        """
+        mask = -1
+        for character in set(query):
+            mask &= self.rows_containing(character)
+        ones = ONE_BYTE.finditer(mask.to_bytes(len(self.lowered), "little"))
+        batch = self.FIRST_BATCH
+        while True:
+            rows = [match.start() for match in islice(ones, batch)]
+            if not rows:
+                return
+            names = list(map(self.lowered.__getitem__, rows))
+            # Name i starts after i + 1 newlines and the names before it
+            starts = list(map(operator.add, accumulate(map(len, names), initial=0), range(1, len(names) + 1)))
+            for match in subsequence.finditer("\n" + "\n".join(names)):
+                yield rows[bisect_right(starts, match.start())] # match.start() is the newline before the name
+            batch = min(2 * batch, self.MAX_BATCH)
+
+
+ONE_BYTE = re.compile(rb'\x01')
+
+
+@lru_cache(maxsize=64)
+def _compiled(pattern):
+    return re.compile(pattern)
+
+
+def file_symbols(paths):
+    """Returns [(path, stat_key, symbols), ...] for a batch of files (in a pool worker)."""
+    results = []
+    for path in paths:
+        key = stat_key(path) # Before reading, so a later change is noticed next time
+        text = read_text(path) if key is not None else None
+        results.append((path, key, SymbolTable(file_type_for(path), text).symbols() if text is not None else []))
+    return results
+
+
+class DirectorySymbols:
+    """
+    What is known about one directory tree: files lists the indexed paths, symbols
+    holds (name, kind, path, line) of all of them, and the matchers search the file
+    names, the paths relative to root and the symbol names. Built by the indexer
+    thread and replaced, never changed, so the Tk thread can use it freely.
+    """
+    def __init__(self, root, entries, complete):
+        self.root = root
+        self.complete = complete # False while the first walk of the tree is still going
+        self.files = sorted(entries)
+        self.symbols = [(name, kind, path, line) for path in self.files for name, kind, line, _ in entries[path][1]]
+        self.file_matcher = FuzzyMatcher([os.path.basename(path) for path in self.files])
+        self.path_matcher = FuzzyMatcher([os.path.relpath(path, root) for path in self.files])
+        self.symbol_matcher = FuzzyMatcher([symbol[0] for symbol in self.symbols])
+        for matcher in (self.file_matcher, self.path_matcher, self.symbol_matcher):
+            matcher.prepare()
+
+
+class SymbolIndexer:
+    """
+    Indexes symbols in the background. The Tk thread tells it about open tabs
+    (open_text, edit, forget), whose tables are updated by one thread in the order
+    of the edits, and about directory trees (index_directory), each walked on a
+    thread of its own so a large tree does not hold up the tabs. Results are read
+    with symbols() and directory(); collect() returns the keys and roots whose
+    results changed since the last call.
+    """
+    MAX_FILES = 50000 # Files indexed per directory tree
+    BATCH_SIZE = 32 # Files per task sent to the executor
+    PUBLISH_INTERVAL = 2.0 # Seconds between snapshots of a tree that is still being walked
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir
+        self.tasks = deque()
+        self.condition = threading.Condition()
+        self.keys = set() # Tabs with a table, as seen by the Tk thread
+        self.tables = {} # key -> SymbolTable, used by the indexer thread only
+        self.results = {} # key -> symbols() of its table
+        self.directories = {} # root -> DirectorySymbols
+        self.entries = {} # root -> {path: (stat_key, symbols)}, used by the walking thread only
+        self.walking = set() # Roots being walked
+        self.changed = set()
+        threading.Thread(target=self._run, name="symbol-indexer", daemon=True).start()
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def open_text(self, key, file_type, text):
+        """Indexes the text of a tab (again); key is anything hashable that identifies the tab."""
+        self.keys.add(key)
+        self._queue(("open", key, file_type, text))
+
+    def edit(self, key, first, old_last, new_lines):
+        """Lines first..old_last of the tab's text were replaced by new_lines (see SymbolTable.edit)."""
+        self._queue(("edit", key, first, old_last, new_lines))
+
+    def forget(self, key):
+        self.keys.discard(key)
+        self._queue(("forget", key))
+
+    def index_directory(self, root, get_executor=None):
+        """
+        Indexes a directory tree, or brings its index up to date with what changed on
+        disk. New and changed files are read on the executor get_executor() returns (a
+        process pool, so lexing them does not compete with the Tk thread) if given,
+        else on the walking thread. get_executor is only called when more than
+        BATCH_SIZE files changed, so the pool can be started on demand.
+        """
+        with self.condition:
+            if root in self.walking:
+                return
+            self.walking.add(root)
+        threading.Thread(target=self._walk, args=(root, get_executor), name="symbol-walker", daemon=True).start()
+
+    def symbols(self, key):
+        return self.results.get(key, [])
+
+    def directory(self, root):
+        return self.directories.get(root)
+
+    def collect(self):
+        with self.condition:
+            changed, self.changed = self.changed, set()
+        return changed
+
+    def _queue(self, task):
+        with self.condition:
+            self.tasks.append(task)
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.tasks:
+                    self.condition.wait()
+                tasks = list(self.tasks)
+                self.tasks.clear()
+            touched = set()
+            for task in tasks:
+                key = task[1]
+                if task[0] == "open":
+                    self.tables[key] = SymbolTable(task[2], task[3])
+                elif task[0] == "forget":
+                    self.tables.pop(key, None)
+                    self.results.pop(key, None)
+                elif key in self.tables:
+                    self.tables[key].edit(*task[2:])
+                touched.add(key)
+            self._publish(touched)
+
+    def _publish(self, keys):
+        """Makes the new symbols of the tables touched by a batch of tasks visible."""
+        for key in keys:
+            table = self.tables.get(key)
+            if table is not None:
+                symbols = table.symbols()
+                if symbols == self.results.get(key):
+                    continue
+                self.results[key] = symbols
+            with self.condition:
+                self.changed.add(key)
+
+    # --- Directory Trees ---
+    def _walk(self, root, get_executor):
+        try:
+            self._index_directory(root, get_executor)
+        except Exception: # A dead pool; the next request walks again
+            pass
+        finally:
+            with self.condition:
+                self.walking.discard(root)
+
+    def _index_directory(self, root, get_executor):
+        entries = self.entries.get(root)
+        if entries is None:
+            entries = self.entries[root] = self._read_cache(root)
+            if entries:
+                self._publish_directory(root, entries, complete=False) # Usable while it is checked
+        changed = []
+        seen = set()
+        for path in iter_files(root):
+            if not indexable(file_type_for(path)):
+                continue
+            seen.add(path)
+            entry = entries.get(path)
+            if entry is None or entry[0] != stat_key(path):
+                changed.append(path)
+            if len(seen) >= self.MAX_FILES:
+                break
+        removed = set(entries) - seen
+        for path in removed:
+            del entries[path]
+        if not changed and not removed and root in self.directories and self.directories[root].complete:
+            return
+        batches = [changed[start:start + self.BATCH_SIZE] for start in range(0, len(changed), self.BATCH_SIZE)]
+        executor = get_executor() if get_executor is not None and len(batches) > 1 else None # A few files are quicker here
+        published_at = time.monotonic()
+        for results in (executor.map(file_symbols, batches) if executor is not None else map(file_symbols, batches)):
+            for path, key, symbols in results:
+                if key is None:
+                    entries.pop(path, None) # Gone meanwhile
+                else:
+                    entries[path] = (key, symbols)
+            if time.monotonic() - published_at > self.PUBLISH_INTERVAL:
+                self._publish_directory(root, entries, complete=False)
+                published_at = time.monotonic()
+        self._publish_directory(root, entries, complete=True)
+        self._write_cache(root, entries)
+
+    def _publish_directory(self, root, entries, complete):
+        self.directories[root] = DirectorySymbols(root, entries, complete)
+        with self.condition:
+            self.changed.add(root)
+
+    def _cache_path(self, root):
+        name = hashlib.blake2b(root.encode("utf-8", "surrogatepass"), digest_size=12).hexdigest()
+        return os.path.join(self.cache_dir, name + ".json.z")
+
+    def _read_cache(self, root):
+        """The entries cached for root by an earlier session; {} if none (or made with other rules)."""
+        if not self.cache_dir:
+            return {}
+        try:
+            with open(self._cache_path(root), "rb") as file:
+                cache = json.loads(zlib.decompress(file.read()))
+            if cache['root'] != root or cache['rules'] != RULES_VERSION:
+                return {}
+            return {path: (tuple(key), [tuple(symbol) for symbol in symbols]) for path, (key, symbols) in cache['files'].items()}
+        except (OSError, ValueError, KeyError, TypeError, zlib.error):
+            return {}
+
+    def _write_cache(self, root, entries):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(root)
+            data = json.dumps({'root': root, 'rules': RULES_VERSION, 'files': entries}, separators=(',', ':'))
+            with open(path + ".tmp", "wb") as file:
+                file.write(zlib.compress(data.encode("utf-8", "surrogatepass"), 1))
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass # The cache is best effort
+
+
+# Cached symbols are only reused if they were found with the same rules
+RULES_VERSION = hashlib.blake2b(repr((SYMBOL_TOKENS, SYMBOL_PATTERNS, SYMBOL_CANDIDATES, HIGHLIGHT_RULES, HIGHLIGHT_CONTINUATIONS)).encode("utf-8"), digest_size=12).hexdigest()
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from diffing import Changes, DiffWorker, LineDiff, diff_range
+
+
+def check_hunks(hunks, base, lines):
+    """Asserts that hunks, sorted and apart, turn base into lines and leave everything else alone."""
+    line = base_line = 0
+    for start, end, base_start, base_end in hunks:
+        assert start >= line and base_start >= base_line
+        assert start - line == base_start - base_line # Unchanged stretches are equally long
+        assert lines[line:start] == base[base_line:base_start]
+        assert (start, base_start) != (end, base_end)
+        line, base_line = end, base_end
+    assert lines[line:] == base[base_line:]
+
+
+def random_edit(rng, lines):
+    first = rng.randrange(1, len(lines) + 2)
+    old_last = rng.randrange(first - 1, min(len(lines), first + 4) + 1)
+    new_lines = [rng.choice("abcdef") for _ in range(rng.randrange(0, 4))]
+    if len(lines) - (old_last - first + 1) + len(new_lines) < 1: # A text always has a line
+        new_lines = ["a"]
+    return first, old_last, new_lines
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_incremental_diff_stays_correct(seed):
+    rng = random.Random(seed)
+    base = [rng.choice("abcdef") for _ in range(200)]
+    diff = LineDiff("\n".join(base))
+    lines = list(base)
+    for _ in range(300):
+        first, old_last, new_lines = random_edit(rng, lines)
+        lines[first - 1:old_last] = new_lines
+        diff.edit(first, old_last, new_lines)
+        if rng.random() < 0.3: # Several edits merge into one dirty region in between
+            diff.diff()
+            check_hunks(diff.hunks, base, lines)
+    diff.diff()
+    assert diff.lines == lines
+    check_hunks(diff.hunks, base, lines)
+
+
+def test_single_edit_matches_a_full_diff():
+    base = [f"line {number}" for number in range(100)]
+    diff = LineDiff("\n".join(base))
+    diff.edit(10, 12, ["new"])
+    diff.edit(50, 49, ["added", "lines"])
+    diff.diff()
+    lines = base[:9] + ["new"] + base[12:]
+    lines[49:49] = ["added", "lines"]
+    assert diff.hunks == diff_range(list(map(hash, base)), list(map(hash, lines)))
+
+
+def test_markers_and_navigation():
+    # Line 2 modified, lines 4-5 added, a line removed after line 7
+    changes = Changes([(1, 2, 1, 2), (3, 5, 3, 3), (7, 7, 5, 6)], [])
+    assert changes.markers(1, 10) == {2: "modified", 4: "added", 5: "added", 7: "removed"}
+    assert changes.markers(5, 6) == {5: "added"}
+    assert changes.markers(7, 7) == {7: "removed"}
+    assert changes.hunk_at(4) == (3, 5, 3, 3)
+    assert changes.hunk_at(7) == (7, 7, 5, 6)
+    assert changes.hunk_at(6) is None
+    assert changes.next_after(2) == (3, 5, 3, 3)
+    assert changes.next_after(7) == (1, 2, 1, 2) # Wraps around
+    assert Changes([(0, 0, 0, 1)], []).markers(1, 3) == {1: "removed"}
+
+
+def test_worker_rebases_on_save():
+    worker = DiffWorker()
+    key = object()
+    worker.load(key, "a\nb\nc")
+    worker.edit(key, 2, 2, ["B"])
+    assert worker.flush(key).hunks == [(1, 2, 1, 2)]
+    token = object()
+    worker.save_point(key, token)
+    worker.edit(key, 3, 2, ["d"]) # Typed while the save was being written
+    worker.saved(key, token)
+    changes = worker.flush(key)
+    assert changes.base_lines == ["a", "B", "c"]
+    assert changes.hunks == [(2, 3, 2, 2)]
+    worker.forget(key)
+    worker.flush(key)
+    assert key not in worker
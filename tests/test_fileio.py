@@ -0,0 +1,121 @@
+import mmap
+import os
+import stat
+
+import pytest
+
+from fileio import UMASK, FileFollower, PagedFile, content_digest, content_hasher, write_file_atomically
+
+
+def mode_of(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_new_file_gets_the_umask_mode(tmp_path):
+    path = tmp_path / "new.txt"
+    write_file_atomically(str(path), "text")
+    assert path.read_text(encoding="utf-8") == "text"
+    assert mode_of(path) == 0o666 & ~UMASK
+
+
+def test_existing_mode_is_kept(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text("old", encoding="utf-8")
+    os.chmod(path, 0o751)
+    write_file_atomically(str(path), "new")
+    assert mode_of(path) == 0o751
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_symlink_is_followed(tmp_path):
+    target = tmp_path / "target.txt"
+    target.write_text("old", encoding="utf-8")
+    link = tmp_path / "link.txt"
+    link.symlink_to(target)
+    write_file_atomically(str(link), "new")
+    assert link.is_symlink()
+    assert target.read_text(encoding="utf-8") == "new"
+
+
+def test_hard_links_stay_linked(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("old", encoding="utf-8")
+    other = tmp_path / "b.txt"
+    os.link(path, other)
+    write_file_atomically(str(path), "new")
+    assert other.read_text(encoding="utf-8") == "new"
+    assert os.stat(path).st_ino == os.stat(other).st_ino
+
+
+def test_follower_reads_appends(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("start\n", encoding="utf-8")
+    follower = FileFollower(str(path))
+    assert follower.poll() == (False, "")
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("next\n")
+    assert follower.poll() == (False, "next\n")
+    follower.close()
+
+
+def test_follower_notices_copytruncate_that_grew_back(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("start\n", encoding="utf-8")
+    follower = FileFollower(str(path))
+    with open(path, "r+", encoding="utf-8") as file:
+        file.truncate(0)
+    path.write_text("rotated and longer than before\n", encoding="utf-8")
+    assert follower.poll() == (True, "rotated and longer than before\n")
+    follower.close()
+
+
+def test_content_hasher_extends_content_digest():
+    hasher = content_hasher("line 1\n")
+    hasher.update("line 2\n".encode("utf-8"))
+    assert hasher.digest() == content_digest("line 1\nline 2\n")
+
+
+def test_paged_file_refuses_to_read_a_truncated_file(tmp_path):
+    path = tmp_path / "big.log"
+    path.write_bytes(b"".join(b"line %d\n" % number for number in range(1000)))
+    paged = PagedFile(str(path))
+    paged.indexer.join()
+    assert paged.read_lines(10, 2) == ["line 9", "line 10"]
+    with open(path, "r+b") as file:
+        file.truncate(10)
+    with pytest.raises(OSError):
+        paged.locate(500) # Would touch pages past the new end of the file (SIGBUS)
+    paged.close()
+
+
+def test_paged_file_grows_without_reindexing(tmp_path, monkeypatch):
+    monkeypatch.setattr(PagedFile, "CHECKPOINT_BYTES", mmap.ALLOCATIONGRANULARITY)
+    path = tmp_path / "app.log"
+    path.write_text("".join(f"line {number}\n" for number in range(1, 5001)), encoding="utf-8")
+    paged = PagedFile(str(path))
+    paged.indexer.join()
+    assert paged.line_count == 5001
+    checkpoints = len(paged.lines)
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("".join(f"line {number}\n" for number in range(5001, 6001)))
+    assert paged.grow()
+    paged.indexer.join()
+    assert paged.line_count == 6001
+    assert len(paged.lines) > checkpoints # Indexed on from the old end
+    assert paged.read_lines(4999, 4) == ["line 4999", "line 5000", "line 5001", "line 5002"]
+    assert paged.read_lines(6000, 2) == ["line 6000", ""]
+    paged.close()
+
+
+def test_paged_file_does_not_grow_over_a_rewrite(tmp_path):
+    path = tmp_path / "app.log"
+    path.write_text("old line\n" * 100, encoding="utf-8")
+    paged = PagedFile(str(path))
+    paged.indexer.join()
+    assert paged.grow() # Unchanged
+    path.write_text("new line\n" * 200, encoding="utf-8") # Same inode, different bytes before the old end
+    assert not paged.grow()
+    os.rename(path, tmp_path / "app.log.1") # Rotated: the path names another file
+    path.write_text("old line\n" * 200, encoding="utf-8")
+    assert not paged.grow()
+    paged.close()
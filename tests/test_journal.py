@@ -0,0 +1,117 @@
+import os
+import random
+
+import pytest
+
+from fileio import content_digest
+from journal import Journal, JournalWriter, TextModel, replay
+
+
+def index_of(text, offset):
+    before = text[:offset].split("\n")
+    return f"{len(before)}.{len(before[-1])}"
+
+
+def random_edits(rng, text, count):
+    """Random ["i", ...] and ["d", ...] edits and the text they leave, applied to a plain string."""
+    edits = []
+    for _ in range(count):
+        if text and rng.random() < 0.4:
+            start = rng.randrange(len(text))
+            end = rng.randrange(start, min(len(text), start + 20) + 1)
+            if rng.random() < 0.3:
+                edits.append(["d", index_of(text, start), None])
+                text = text[:start] + text[start + 1:]
+            else:
+                edits.append(["d", index_of(text, start), index_of(text, end)])
+                text = text[:start] + text[end:]
+        else:
+            offset = rng.randrange(len(text) + 1)
+            inserted = "".join(rng.choice("ab \n") for _ in range(rng.randrange(1, 8)))
+            edits.append(["i", index_of(text, offset), inserted])
+            text = text[:offset] + inserted + text[offset:]
+    return edits, text
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_text_model_replays_edits(seed):
+    rng = random.Random(seed)
+    base = "first line\nsecond\n\nlast"
+    edits, expected = random_edits(rng, base, 300)
+    model = TextModel(base)
+    for edit in edits:
+        model.apply(edit)
+    assert model.text() == expected
+
+
+def test_text_model_clamps_like_tk():
+    model = TextModel("ab\ncd")
+    model.insert("9.0", "!") # Past the end: appended
+    model.delete("1.2") # The newline at the end of a line joins the next one
+    model.delete("1.99") # Clamped to the end of line 1, which is now the last line
+    assert model.text() == "abcd!"
+
+
+def write_journal(writer, base, edits):
+    journal = Journal("/some/file.txt", "file.txt", base)
+    writer.add(journal)
+    for edit in edits:
+        writer.record(journal, edit)
+    assert writer.flush()
+    return journal
+
+
+def test_replay_from_the_saved_file(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("saved\ntext", encoding="utf-8")
+    edits, expected = random_edits(random.Random(1), "saved\ntext", 100)
+    writer = JournalWriter(str(tmp_path / "journals"))
+    journal = write_journal(writer, {'file': str(path), 'digest': content_digest("saved\ntext").hex()}, edits)
+    assert replay(journal.file_path) == (journal.header, expected)
+    writer.close()
+
+
+def test_restarted_journal_survives_a_save(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("saved", encoding="utf-8")
+    writer = JournalWriter(str(tmp_path / "journals"))
+    first = write_journal(writer, {'file': str(path), 'digest': content_digest("saved").hex()}, [["i", "1.5", " once"]])
+    path.write_text("saved once", encoding="utf-8") # Saved; the file base no longer matches
+    assert replay(first.file_path)[1] is None
+    # What the editor does after a save with edits still in flight: the text becomes the base
+    writer.discard(first)
+    second = write_journal(writer, {'text': "saved once, and more"}, [["i", "1.20", " after"]])
+    assert replay(second.file_path)[1] == "saved once, and more after"
+    writer.close()
+    assert not os.path.exists(first.file_path)
+
+
+def test_compaction_keeps_the_text(tmp_path):
+    edits, expected = random_edits(random.Random(2), "", 120)
+    writer = JournalWriter(str(tmp_path / "journals"))
+    writer.COMPACT_EDITS = 50
+    journal = Journal(None, "Untitled", {'text': ""})
+    writer.add(journal)
+    for start in range(0, len(edits), 40): # Several passes, so compaction runs in between
+        for edit in edits[start:start + 40]:
+            writer.record(journal, edit)
+        assert writer.flush()
+    header, text = replay(journal.file_path)
+    assert text == expected
+    assert 'text' in header
+    writer.close()
+
+
+def test_stale_file_base_is_flagged_instead_of_compacted(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("loaded", encoding="utf-8")
+    writer = JournalWriter(str(tmp_path / "journals"))
+    writer.COMPACT_EDITS = 5
+    journal = write_journal(writer, {'file': str(path), 'digest': content_digest("loaded").hex()}, [["i", "1.6", "!"]])
+    assert not journal.stale
+    path.write_text("changed by another program", encoding="utf-8")
+    for _ in range(10):
+        writer.record(journal, ["i", "1.0", "x"])
+    assert writer.flush()
+    assert journal.stale # The editor starts the journal over from its buffer
+    writer.close()
@@ -0,0 +1,134 @@
+import os
+import random
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fileio import stat_key
+from search import DirectorySearch, TrigramIndex, compile_query, replace_in_file, required_literals
+
+
+def assert_literals_in_every_match(pattern, texts):
+    literals = required_literals(pattern)
+    for text in texts:
+        if re.search(pattern, text):
+            for literal in literals:
+                assert literal.lower() in text.lower(), (pattern, text, literal)
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    (r"foo\x41bar", ["foo", "bar"]),
+    (r"abc\101def", ["abc", "def"]),
+    (r"abc\U00000041def", ["abc", "def"]),
+    (r"abc\N{LATIN SMALL LETTER A}def", ["abc", "def"]),
+    (r"abc\012def", ["abc", "def"]),
+    (r"(abc)\1defg", ["defg"]),
+    (r"x[]a]yzw", ["yzw"]),
+    (r"x[^]a]yzw", ["yzw"]),
+    (r"pre([)]x)post", ["pre", "post"]),
+    (r"hello\.world", ["hello.world"]),
+    (r"colou?r", ["colo"]),
+    (r"abc|def", []),
+])
+def test_required_literals(pattern, expected):
+    assert required_literals(pattern) == expected
+
+
+def test_plain_text_is_its_own_literal():
+    assert required_literals("a.b(c", regex=False) == ["a.b(c"]
+
+
+@pytest.mark.parametrize("pattern, text", [
+    (r"foo\x41bar", "fooAbar"),
+    (r"abc\101def", "abcAdef"),
+    (r"x[]a]yzw", "x]yzw"),
+    (r"x[^]a]yzw", "xbyzw"),
+])
+def test_literals_of_escapes_and_classes_are_in_the_match(pattern, text):
+    assert re.search(pattern, text)
+    assert_literals_in_every_match(pattern, [text])
+
+
+def test_literals_are_in_every_match_of_random_patterns():
+    rng = random.Random(0)
+    pieces = ["ab", "c", "x", ".", "\\.", "\\x41", "\\101", "\\d", "[]a]", "[^]b]", "(ab)", "?", "*", "+", "{2}", "\\1", "A"]
+    texts = ["".join(rng.choice("abcxA.]1") for _ in range(rng.randrange(0, 12))) for _ in range(300)]
+    for _ in range(500):
+        pattern = "".join(rng.choice(pieces) for _ in range(rng.randrange(1, 7)))
+        try:
+            re.compile(pattern)
+        except re.error:
+            continue
+        assert_literals_in_every_match(pattern, texts)
+
+
+def test_replace_in_file_stops_at_the_listed_matches(tmp_path):
+    path = tmp_path / "sample.txt"
+    path.write_text("cat cat cat\ncat\n", encoding="utf-8")
+    assert replace_in_file(str(path), "cat", 0, "dog", True, limit=3) == 3
+    assert path.read_text(encoding="utf-8") == "dog dog dog\ncat\n"
+
+
+def test_replace_in_file_skips_empty_matches(tmp_path):
+    path = tmp_path / "sample.txt"
+    path.write_text("ab\n", encoding="utf-8")
+    assert replace_in_file(str(path), "x*", 0, "-", True) == 0
+    assert replace_in_file(str(path), "(a)", 0, r"[\1]", False) == 1
+    assert path.read_text(encoding="utf-8") == "[a]b\n"
+
+
+def test_replace_in_file_keeps_crlf_newlines(tmp_path):
+    path = tmp_path / "dos.txt"
+    path.write_bytes(b"cat one\r\ndog two\r\nthree\r\n")
+    assert replace_in_file(str(path), "cat", re.IGNORECASE, "CAT", True) == 1
+    assert path.read_bytes() == b"CAT one\r\ndog two\r\nthree\r\n"
+    # Matched on translated text ($ before the newline, \n between lines); the file keeps its newlines
+    assert replace_in_file(str(path), r"two$\n", re.MULTILINE, "2\nand a half\n", True) == 1
+    assert path.read_bytes() == b"CAT one\r\ndog 2\r\nand a half\r\nthree\r\n"
+
+
+def test_replace_in_file_keeps_mixed_newlines(tmp_path):
+    path = tmp_path / "mixed.txt"
+    path.write_bytes(b"a\r\nb\nc\rd\r\n")
+    assert replace_in_file(str(path), "[bd]", 0, "x", True) == 2
+    assert path.read_bytes() == b"a\r\nx\nc\rx\r\n"
+
+
+def test_replace_in_file_skips_a_file_changed_since_the_search(tmp_path):
+    path = tmp_path / "sample.txt"
+    path.write_text("cat\n", encoding="utf-8")
+    key = stat_key(str(path))
+    path.write_text("cat cat\n", encoding="utf-8")
+    os.utime(path, ns=(key[0] + 10 ** 9, key[0] + 10 ** 9))
+    assert replace_in_file(str(path), "cat", 0, "dog", True, key=key) is None
+    assert path.read_text(encoding="utf-8") == "cat cat\n"
+    assert replace_in_file(str(path), "cat", 0, "dog", True, key=stat_key(str(path))) == 2
+
+
+def searched_paths(executor, root, query, index):
+    search = DirectorySearch(executor, 2, str(root), compile_query(query), required_literals(query, False), index)
+    while not search.finished:
+        time.sleep(0.01)
+    assert search.error is None
+    return {os.path.basename(result[0]) for result in search.collect()}
+
+
+def test_indexed_search_only_rescans_stale_files(tmp_path):
+    (tmp_path / "a.txt").write_text("alpha beta", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("gamma", encoding="utf-8")
+    index = TrigramIndex(str(tmp_path))
+    index.REFRESH_INTERVAL = 3600 # Walks only when the test asks
+    with ThreadPoolExecutor(2) as executor:
+        assert searched_paths(executor, tmp_path, "beta", index) == {"a.txt"}
+        assert index.ready
+        (tmp_path / "b.txt").write_text("beta too", encoding="utf-8")
+        assert searched_paths(executor, tmp_path, "beta", index) == {"a.txt"} # Not known to be stale yet
+        index.mark_stale(str(tmp_path / "b.txt"))
+        assert searched_paths(executor, tmp_path, "beta", index) == {"a.txt", "b.txt"}
+        (tmp_path / "c.txt").write_text("beta three", encoding="utf-8")
+        os.unlink(tmp_path / "a.txt")
+        index.walk()
+        assert searched_paths(executor, tmp_path, "beta", index) == {"b.txt", "c.txt"}
+        assert sorted(os.path.basename(path) for path in index.files) == ["b.txt", "c.txt"]
@@ -0,0 +1,114 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from symbols import FuzzyMatcher, SymbolIndexer, SymbolTable
+
+# Lines that define symbols, hide them (comments, strings) or open and close multi-line constructs
+LINES = {
+    "py": ['def handler(event):', 'class Parser:', '    def parse(self):', '    return 1', '"""',
+           'text = """def hidden():', '# def commented():', 'x = "class Quoted:"', '', 'async def fetch():'],
+    "js": ['function start() {', 'class Widget {', 'const limit = 10;', '  let local = 1;', '/*',
+           '*/', '// function commented() {', 's = "function quoted() {";', '}', 'var total = 0;', '`', '']
+}
+
+
+def random_lines(rng, file_type, count):
+    return [rng.choice(LINES[file_type]) for _ in range(count)]
+
+
+@pytest.mark.parametrize("file_type", ["py", "js"])
+@pytest.mark.parametrize("seed", range(3))
+def test_edits_match_a_full_scan(file_type, seed):
+    rng = random.Random(seed)
+    lines = random_lines(rng, file_type, 60)
+    table = SymbolTable(file_type, "\n".join(lines))
+    for _ in range(200):
+        first = rng.randrange(1, len(lines) + 2)
+        old_last = rng.randrange(first - 1, min(len(lines), first + 3) + 1)
+        new_lines = random_lines(rng, file_type, rng.randrange(0 if len(lines) > 1 else 1, 4))
+        if not new_lines and old_last < first: # Replacing nothing with nothing
+            continue
+        if len(lines) - (old_last - first + 1) + len(new_lines) < 1: # A text always has a line
+            continue
+        lines[first - 1:old_last] = new_lines
+        table.edit(first, old_last, new_lines)
+        assert table.symbols() == SymbolTable(file_type, "\n".join(lines)).symbols()
+
+
+def test_symbols_in_comments_and_strings_are_hidden():
+    table = SymbolTable("py", 'def shown():\n    """\ndef hidden():\n    """\n# def commented():\nclass Shown:')
+    assert [(name, kind, line) for name, kind, line, _ in table.symbols()] == [("shown", "function", 1), ("Shown", "class", 6)]
+
+
+def ranked(names, query, limit):
+    """What FuzzyMatcher.search should return, by checking every name."""
+    query = query.lower()
+    found = []
+    for index, name in enumerate(names):
+        name = name.lower()
+        position = 0
+        for character in query:
+            position = name.find(character, position) + 1
+            if not position:
+                break
+        if name.startswith(query):
+            found.append(((0, len(name)), index))
+        elif query in name:
+            found.append(((1, len(name)), index))
+        elif position:
+            found.append(((2, len(name)), index))
+    return sorted(found)[:limit]
+
+
+def test_fuzzy_tiers():
+    names = ["parse_args", "Parser", "sparse", "p_a_r_s_e", "unrelated", "parse"]
+    results = [names[index] for _, index in FuzzyMatcher(names).search("parse")]
+    assert results == ["parse", "Parser", "parse_args", "sparse", "p_a_r_s_e"]
+
+
+@pytest.mark.parametrize("limit", [5, 50, 1000])
+def test_fuzzy_matches_a_full_scan(limit):
+    rng = random.Random(limit)
+    names = ["".join(rng.choice("abcdeAB_") for _ in range(rng.randrange(1, 12))) for _ in range(2000)]
+    matcher = FuzzyMatcher(names)
+    matcher.FIRST_BATCH = 16 # Several subsequence batches
+    for _ in range(30):
+        word = rng.choice(names)
+        for length in range(len(word) + 1): # Typed one character at a time, like Quick Open
+            query = word[:length]
+            assert matcher.search(query, limit) == ranked(names, query, limit), query
+
+
+def index_tree(root, cache_dir, get_executor):
+    indexer = SymbolIndexer(str(cache_dir))
+    indexer.index_directory(str(root), get_executor)
+    while True:
+        directory = indexer.directory(str(root))
+        if directory is not None and directory.complete and str(root) not in indexer.walking:
+            return directory
+        time.sleep(0.01)
+
+
+def test_executor_is_only_requested_for_many_changed_files(tmp_path):
+    root = tmp_path / "tree"
+    root.mkdir()
+    requested = []
+
+    def get_executor():
+        requested.append(True)
+        return executor
+
+    with ThreadPoolExecutor(2) as executor:
+        (root / "one.py").write_text("def one():\n    pass\n", encoding="utf-8")
+        assert [symbol[0] for symbol in index_tree(root, tmp_path / "cache", get_executor).symbols] == ["one"]
+        assert not requested # One file is read on the walking thread
+        for number in range(SymbolIndexer.BATCH_SIZE + 1):
+            (root / f"module{number}.py").write_text(f"class Module{number}:\n    pass\n", encoding="utf-8")
+        assert len(index_tree(root, tmp_path / "cache", get_executor).symbols) == SymbolIndexer.BATCH_SIZE + 2
+        assert requested
+        requested.clear()
+        index_tree(root, tmp_path / "cache", get_executor) # From the cache, nothing changed
+        assert not requested
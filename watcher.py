@@ -0,0 +1,217 @@
+"""
+Notices when files open in the editor are changed by other programs. Nothing here
+needs Tk.
+
+FileWatcher checks every tracked file from one background thread. On Linux it waits
+for inotify events on the files' directories, so only files named in an event are
+stat'ed (plus a full sweep now and then, for file systems that do not report changes).
+Elsewhere, or if inotify is unavailable, it stats every tracked file each tick. A file
+is only read again (to compare fingerprints) when its stat changed, so overhead stays
+negligible with hundreds of open files.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+
+from fileio import file_digest, stat_key
+
+# inotify(7) event bits
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII") # wd, mask, cookie, length of the name that follows
+
+
+class Inotify:
+    """Minimal inotify binding through ctypes; raises OSError where it is not available."""
+    def __init__(self):
+        if not hasattr(os, "O_CLOEXEC"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {} # watch descriptor -> directory
+
+    def add_directory(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self.directories[wd] = directory
+        return wd
+
+    def remove(self, wd):
+        self.directories.pop(wd, None)
+        self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout):
+        """
+        Waits up to timeout seconds and returns the paths named in the events that
+        arrived, or None if events were lost (queue overflow) and everything must be checked.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        paths = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return paths
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self.directories.pop(wd, None) # The directory is gone
+                continue
+            directory = self.directories.get(wd)
+            if directory is not None and name:
+                paths.add(os.path.join(directory, os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileChange:
+    """A tracked file whose content on disk no longer matches what was tracked."""
+    def __init__(self, file_path, digest, deleted=False):
+        self.file_path = file_path
+        self.digest = digest # file_digest() of the new content (None if unreadable or not hashed)
+        self.deleted = deleted
+
+
+class FileWatcher:
+    """
+    Reports tracked files whose content changed on disk. track() records a file's
+    current stat together with the fingerprint of the text the editor has for it;
+    when the stat changes, the file is hashed again and, if the fingerprint differs,
+    a FileChange is handed to the Tk thread through collect(). Files of at least
+    hash_limit bytes are reported on any stat change without being read.
+    """
+    POLL_INTERVAL = 1.0 # Seconds between checks without inotify
+    SWEEP_INTERVAL = 30.0 # Seconds between full checks with inotify
+
+    def __init__(self, hash_limit=256 * 1024 * 1024, use_inotify=True):
+        self.hash_limit = hash_limit
+        self.tracked = {} # absolute path -> (stat_key, digest)
+        self.watches = {} # directory -> [watch descriptor, number of tracked files in it]
+        self.changes = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.inotify = None
+        if use_inotify:
+            try:
+                self.inotify = Inotify()
+            except OSError:
+                pass # Fall back to polling
+        threading.Thread(target=self._run, name="file-watcher", daemon=True).start()
+
+    def track(self, file_path, digest):
+        """Starts (or restarts) watching file_path, whose text currently has fingerprint digest."""
+        file_path = os.path.abspath(file_path)
+        key = stat_key(file_path)
+        with self.lock:
+            if file_path not in self.tracked:
+                self._watch_directory(os.path.dirname(file_path))
+            self.tracked[file_path] = (key, digest)
+
+    def untrack(self, file_path):
+        file_path = os.path.abspath(file_path)
+        with self.lock:
+            if self.tracked.pop(file_path, None) is None:
+                return
+            directory = os.path.dirname(file_path)
+            watch = self.watches.get(directory)
+            if watch is not None:
+                watch[1] -= 1
+                if watch[1] == 0:
+                    del self.watches[directory]
+                    if self.inotify is not None and watch[0] is not None:
+                        self.inotify.remove(watch[0])
+
+    def collect(self):
+        """Returns the FileChanges found since the last call."""
+        with self.lock:
+            changes, self.changes = self.changes, []
+        return changes
+
+    def stop(self):
+        self.stopped.set()
+
+    def _watch_directory(self, directory):
+        watch = self.watches.get(directory)
+        if watch is None:
+            wd = None
+            if self.inotify is not None:
+                try:
+                    wd = self.inotify.add_directory(directory)
+                except OSError:
+                    pass # Covered by the periodic sweep
+            watch = self.watches[directory] = [wd, 0]
+        watch[1] += 1
+
+    def _run(self):
+        last_sweep = time.monotonic()
+        while not self.stopped.is_set():
+            if self.inotify is None:
+                self.stopped.wait(self.POLL_INTERVAL)
+                suspects = None
+            else:
+                suspects = self.inotify.read(self.POLL_INTERVAL)
+                if time.monotonic() - last_sweep >= self.SWEEP_INTERVAL:
+                    suspects = None
+            if suspects is None:
+                last_sweep = time.monotonic()
+            with self.lock:
+                if suspects is None:
+                    paths = list(self.tracked)
+                else:
+                    paths = [path for path in suspects if path in self.tracked]
+            for path in paths:
+                self._check(path)
+        if self.inotify is not None:
+            self.inotify.close()
+
+    def _check(self, path):
+        key = stat_key(path)
+        with self.lock:
+            entry = self.tracked.get(path)
+        if entry is None or entry[0] == key:
+            return
+        change = None
+        if key is None:
+            change = FileChange(path, None, deleted=True)
+        elif key[1] >= self.hash_limit:
+            change = FileChange(path, None)
+        else:
+            try:
+                digest = file_digest(path)
+            except (OSError, ValueError): # Unreadable or not UTF-8 any more
+                digest = None
+            if digest is None or digest != entry[1]:
+                change = FileChange(path, digest)
+        with self.lock:
+            if self.tracked.get(path) is not entry:
+                return # Tracked again meanwhile (the editor saved or reloaded it)
+            self.tracked[path] = (key, change.digest if change and change.digest is not None else entry[1])
+            if change is not None:
+                self.changes.append(change)